@@ -0,0 +1,162 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from .compiler import OPERATORS, convert_value
+from .rule_schema import ComplianceRule, RuleCondition
+from .templates import expand_rule
+
+# Folded constants, expressed in the condition schema: an empty 'all' passes, an empty 'any' fails.
+ALWAYS_TRUE: Dict[str, List[Any]] = {'all': []}
+ALWAYS_FALSE: Dict[str, List[Any]] = {'any': []}
+
+_LOWER = ('greaterThan', 'greaterThanEqual')
+_UPPER = ('lessThan', 'lessThanEqual')
+
+class RuleFinding(BaseModel):
+    """
+    A static analysis finding for a rule's conditions.
+    - kind: 'contradiction' (group can never pass), 'tautology' (group always passes),
+      'duplicate' (condition listed twice) or 'redundant' (implied by a sibling condition).
+    - path: Location in the condition tree, e.g. 'all[1].any'.
+    - message: Human-readable explanation.
+    """
+    kind: str
+    path: str
+    message: str
+
+def _signature(node: Any) -> str:
+    if isinstance(node, RuleCondition):
+        where = _signature(node.where) if node.where else None
+        return json.dumps([node.fact, node.operator, node.value, node.path, node.params, node.aggregate, where], sort_keys=True, default=repr)
+    return json.dumps({mode: sorted(_signature(c) for c in children) for mode, children in node.items()}, sort_keys=True)
+
+def _describe(cond: RuleCondition) -> str:
+    target = f"{cond.fact}{cond.path or ''}"
+    return f"{target} {cond.operator} {cond.value!r}"
+
+def _is_constant(node: Any, value: bool) -> bool:
+    return isinstance(node, dict) and node == (ALWAYS_TRUE if value else ALWAYS_FALSE)
+
+def _subject(cond: RuleCondition) -> Optional[Tuple]:
+    """Key of the value a scalar condition tests, or None for conditions analysis does not reason about."""
+    if cond.aggregate is not None or cond.operator not in OPERATORS:
+        return None
+    return (cond.fact, cond.path, json.dumps(cond.params, sort_keys=True, default=repr))
+
+def _satisfiable(conds: List[RuleCondition]) -> bool:
+    """Whether some value of one fact satisfies every condition. Unknown (incomparable) cases count as satisfiable."""
+    try:
+        # A required value decides everything: test the other conditions against it exactly
+        for cond in conds:
+            if cond.operator == 'equal':
+                return all(OPERATORS[c.operator](cond.value, convert_value(c.operator, c.value)) for c in conds)
+        for cond in conds:
+            if cond.operator == 'in' and isinstance(cond.value, (list, tuple, set, frozenset)):
+                return any(all(OPERATORS[c.operator](candidate, convert_value(c.operator, c.value)) for c in conds)
+                           for candidate in cond.value)
+        lower = max((c for c in conds if c.operator in _LOWER), key=lambda c: (c.value, c.operator == 'greaterThan'), default=None)
+        upper = min((c for c in conds if c.operator in _UPPER), key=lambda c: (c.value, c.operator == 'lessThanEqual'), default=None)
+        if lower is None or upper is None:
+            return True
+        if lower.value > upper.value:
+            return False
+        if lower.value == upper.value:
+            return lower.operator == 'greaterThanEqual' and upper.operator == 'lessThanEqual'
+        return True
+    except TypeError:
+        return True
+
+def _covers_everything(conds: List[RuleCondition]) -> bool:
+    """Whether at least one condition passes for every value of one fact (missing values included)."""
+    # Constants are compared the way the operators compare them: 1, 1.0 and True are one value
+    equal = [c.value for c in conds if c.operator == 'equal']
+    not_equal = [c.value for c in conds if c.operator == 'notEqual']
+    if any(value == other for value in not_equal for other in equal):
+        return True
+    # No value equals two different constants, so it differs from at least one of them
+    if any(value != other for value in not_equal for other in not_equal):
+        return True
+    inside = {_signature_value(c.value) for c in conds if c.operator == 'in'}
+    return any(_signature_value(c.value) in inside for c in conds if c.operator == 'notIn')
+
+def _signature_value(value: Any) -> str:
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return json.dumps(sorted(json.dumps(v, sort_keys=True, default=repr) for v in value))
+    return json.dumps(value, sort_keys=True, default=repr)
+
+def _redundant_bounds(conds: List[RuleCondition], mode: str) -> List[RuleCondition]:
+    """Same-direction bounds implied by a sibling: in 'all' the tighter bound wins, in 'any' the looser one."""
+    redundant = []
+    for operators, tighter_is_larger in ((_LOWER, True), (_UPPER, False)):
+        bounds = [c for c in conds if c.operator in operators]
+        if len(bounds) < 2:
+            continue
+        try:
+            # Order by how restrictive the bound is; exclusive bounds are stricter at the same value
+            ordered = sorted(bounds, key=lambda c: (c.value, c.operator in ('greaterThan', 'lessThanEqual')), reverse=tighter_is_larger)
+        except TypeError:
+            continue
+        keep = ordered[0] if mode == 'all' else ordered[-1]
+        redundant.extend(c for c in bounds if c is not keep)
+    return redundant
+
+def fold_conditions(conditions: Dict[str, List[Any]], path: str = '') -> Tuple[Dict[str, List[Any]], List[RuleFinding]]:
+    """
+    Statically simplify a condition tree.
+    - Drops duplicate children and bounds implied by a sibling (e.g. x > 3 next to x > 5 in 'all').
+    - Folds groups that can never pass to ALWAYS_FALSE and groups that always pass to ALWAYS_TRUE
+      (e.g. x <= 5 and x > 10 in 'all'; x == 1 or x != 1 in 'any').
+    Returns the folded tree (same semantics as the input) and the findings.
+    """
+    mode = next((m for m in ('all', 'any', 'not') if m in conditions), None)
+    if mode is None:
+        return conditions, []
+    prefix = f"{path}.{mode}" if path else mode
+    findings: List[RuleFinding] = []
+    children: List[Any] = []
+    seen = set()
+    for index, child in enumerate(conditions[mode]):
+        child_path = f"{prefix}[{index}]"
+        if not isinstance(child, RuleCondition):
+            child, nested = fold_conditions(child, child_path)
+            findings.extend(nested)
+        signature = _signature(child)
+        if signature in seen:
+            findings.append(RuleFinding(kind='duplicate', path=child_path, message="Condition is listed twice in the same group."))
+            continue
+        seen.add(signature)
+        children.append(child)
+
+    # Constant children decide or drop out: 'all' fails on False, 'any' passes on True, 'not' (nand) passes on False
+    deciding = mode != 'any'
+    if any(_is_constant(c, not deciding) for c in children):
+        return (ALWAYS_FALSE if mode == 'all' else ALWAYS_TRUE), findings
+    children = [c for c in children if not _is_constant(c, deciding)]
+
+    by_subject: Dict[Tuple, List[RuleCondition]] = {}
+    for child in children:
+        if isinstance(child, RuleCondition):
+            subject = _subject(child)
+            if subject is not None:
+                by_subject.setdefault(subject, []).append(child)
+    for conds in by_subject.values():
+        if mode in ('all', 'not') and not _satisfiable(conds):
+            kind = 'contradiction' if mode == 'all' else 'tautology'
+            findings.append(RuleFinding(kind=kind, path=prefix, message=f"Conditions {', '.join(_describe(c) for c in conds)} can never all pass."))
+            return (ALWAYS_FALSE if mode == 'all' else ALWAYS_TRUE), findings
+        if mode == 'any' and _covers_everything(conds):
+            findings.append(RuleFinding(kind='tautology', path=prefix, message=f"One of {', '.join(_describe(c) for c in conds)} always passes."))
+            return ALWAYS_TRUE, findings
+        if mode in ('all', 'any'):
+            for cond in _redundant_bounds(conds, mode):
+                findings.append(RuleFinding(kind='redundant', path=prefix, message=f"Condition {_describe(cond)} is implied by a sibling bound."))
+                children = [c for c in children if c is not cond]
+    return {mode: children}, findings
+
+def analyze_rule(rule: ComplianceRule, overrides: Optional[Dict[str, Any]] = None) -> List[RuleFinding]:
+    """
+    Static analysis findings for a rule (empty when the conditions are clean), with parameter
+    references expanded using its default parameters updated with `overrides`.
+    Raises ValueError for references to undefined parameters.
+    """
+    return fold_conditions(expand_rule(rule, overrides))[1]
@@ -0,0 +1 @@
+# Compliance engine benchmark suite (synthetic tenants, offline)
@@ -0,0 +1,29 @@
+import argparse
+import logging
+from .runner import MAX_EVALUATIONS, run_benchmarks, write_results
+from .synthetic import CATALOG_SIZES, TENANT_SIZES
+
+def _sizes(value: str):
+    return [int(v) for v in value.split(',') if v]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compliance engine benchmarks over synthetic tenants.")
+    parser.add_argument('--sizes', type=_sizes, default=list(TENANT_SIZES), help="Comma-separated tenant sizes.")
+    parser.add_argument('--catalogs', type=_sizes, default=list(CATALOG_SIZES), help="Comma-separated generated catalog sizes.")
+    parser.add_argument('--memory', action='store_true', help="Also record peak memory (slower).")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-evaluations', type=int, default=MAX_EVALUATIONS, help="Skip per-entity runs above entities x rules.")
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the JSON report.")
+    args = parser.parse_args()
+    # Ingestion logs every call at INFO; keep benchmark output readable
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run_benchmarks(args.sizes, args.catalogs, args.memory, args.seed, args.max_evaluations)
+    for result in report['results']:
+        if 'skipped' in result:
+            print(f"{result['benchmark']:<28} {result.get('catalog', ''):<16} n={result['entities']:<8} skipped ({result['skipped']})")
+        else:
+            print(f"{result['benchmark']:<28} {result.get('catalog', ''):<16} n={result['entities']:<8} {result['seconds']:.3f}s")
+    print(f"Wrote {write_results(report, args.output)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from ..engine import RuleEngine
+from ..ingestion import DataIngestionPipeline
+from ..scan_executor import ScanExecutor
+from .synthetic import (
+    CATALOG_SIZES, TENANT_SIZES, generate_columns, generate_rules,
+    generate_tenant, write_rules,
+)
+
+SHIPPED_RULES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'rules')
+
+# Per-entity benchmarks are skipped above this many rule evaluations (entities x rules).
+MAX_EVALUATIONS = 10_000_000
+
+def _measure(name: str, entities: int, rules: int, fn: Callable[[], Any], memory: bool) -> Dict[str, Any]:
+    """Time fn() and, if memory is set, record its peak traced allocation."""
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        fn()
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return {
+        'benchmark': name,
+        'entities': entities,
+        'rules': rules,
+        'seconds': seconds,
+        'entities_per_second': entities / seconds if seconds else None,
+        'peak_memory_bytes': peak,
+    }
+
+def _skipped(name: str, entities: int, rules: int, reason: str) -> Dict[str, Any]:
+    return {'benchmark': name, 'entities': entities, 'rules': rules, 'skipped': reason}
+
+def _engine_run(engine: RuleEngine, size: int, seed: int):
+    async def run():
+        for facts in generate_tenant(size, seed):
+            await engine.run(facts)
+    asyncio.run(run())
+
+def _execute_scan(executor: ScanExecutor, size: int, seed: int):
+    async def run():
+        for facts in generate_tenant(size, seed):
+            await executor.execute_scan(facts)
+    asyncio.run(run())
+
+def _ingestion(size: int, seed: int):
+    pipeline = DataIngestionPipeline()
+    tenant = generate_tenant(size, seed)
+    pipeline.register_source('synthetic', lambda: next(tenant))
+    pipeline.register_validator(lambda data: 'user' in data)
+    for _ in range(size):
+        pipeline.ingest('synthetic')
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+def run_benchmarks(sizes: Sequence[int] = TENANT_SIZES, catalog_sizes: Sequence[int] = CATALOG_SIZES,
+                   memory: bool = False, seed: int = 0, max_evaluations: int = MAX_EVALUATIONS) -> Dict[str, Any]:
+    """
+    Run the benchmark matrix: each tenant size against the shipped rules and each generated catalog.
+    Measures RuleEngine.run, RuleEngine.run_batch (when numpy is installed),
+    ScanExecutor.execute_scan and ingestion throughput. Runs fully offline.
+    """
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        catalogs = [('shipped', SHIPPED_RULES_DIR)]
+        for count in catalog_sizes:
+            catalogs.append((f"generated-{count}", write_rules(generate_rules(count, seed), os.path.join(tmp, str(count)))))
+        for catalog_name, rules_dir in catalogs:
+            holder: Dict[str, ScanExecutor] = {}
+            load = _measure('scan_executor.init', 0, 0, lambda: holder.setdefault('executor', ScanExecutor(rules_dir)), memory)
+            executor = holder['executor']
+            rule_count = len(executor.engine.rules)
+            load['rules'] = rule_count
+            load['catalog'] = catalog_name
+            results.append(load)
+            for size in sizes:
+                runs = []
+                if size * rule_count > max_evaluations:
+                    runs.append(_skipped('engine.run', size, rule_count, 'max_evaluations'))
+                    runs.append(_skipped('scan_executor.execute_scan', size, rule_count, 'max_evaluations'))
+                else:
+                    runs.append(_measure('engine.run', size, rule_count, lambda: _engine_run(executor.engine, size, seed), memory))
+                    runs.append(_measure('scan_executor.execute_scan', size, rule_count, lambda: _execute_scan(executor, size, seed), memory))
+                try:
+                    columns = generate_columns(size, seed)
+                except ImportError:
+                    runs.append(_skipped('engine.run_batch', size, rule_count, 'numpy not installed'))
+                else:
+                    runs.append(_measure('engine.run_batch', size, rule_count, lambda: executor.engine.run_batch(columns), memory))
+                for run in runs:
+                    run['catalog'] = catalog_name
+                results.extend(runs)
+    for size in sizes:
+        results.append(_measure('ingestion.ingest', size, 0, lambda: _ingestion(size, seed), memory))
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'results': results,
+    }
+
+def write_results(report: Dict[str, Any], path: str) -> str:
+    """Write a benchmark report as JSON for comparison across commits."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    return path
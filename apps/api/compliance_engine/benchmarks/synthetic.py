@@ -0,0 +1,94 @@
+import json
+import os
+import random
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Tenant sizes (users/devices) covered by the full benchmark run.
+TENANT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+# Generated rule catalog sizes, in addition to the shipped rules.
+CATALOG_SIZES = (10, 100, 1_000)
+
+# Synthetic fact name -> (kind, generator args). Covers every fact used by the shipped rules.
+FACT_SPECS: Dict[str, Tuple[str, Any]] = {
+    'user.mfa_enabled': ('bool', 0.9),
+    'user.last_login_days': ('int', (0, 365)),
+    'user.password_length': ('int', (6, 24)),
+    'user.password_has_special_char': ('bool', 0.8),
+    'user.is_authorized_financial': ('bool', 0.95),
+    'user.last_access_review_months': ('int', (0, 24)),
+    'user.data_retention_days': ('int', (30, 3650)),
+    'endpoint.firewall_enabled': ('bool', 0.97),
+    'service.last_patch_days': ('int', (0, 120)),
+    'system.audit_log_enabled': ('bool', 0.99),
+    'tenant.encryption_enabled': ('bool', 0.99),
+    'incident.breach_notification_hours': ('int', (1, 168)),
+}
+
+def _value(rng: random.Random, kind: str, spec: Any) -> Any:
+    if kind == 'bool':
+        return rng.random() < spec
+    low, high = spec
+    return rng.randint(low, high)
+
+def generate_tenant(size: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Yield `size` synthetic entity facts dicts, e.g. {'user': {...}, 'endpoint': {...}, ...}.
+    Deterministic for a given seed; generated lazily so large tenants need not sit in memory.
+    """
+    rng = random.Random(seed)
+    for i in range(size):
+        facts: Dict[str, Dict[str, Any]] = {}
+        for name, (kind, spec) in FACT_SPECS.items():
+            namespace, key = name.split('.', 1)
+            facts.setdefault(namespace, {'id': f"{namespace}-{i}"})[key] = _value(rng, kind, spec)
+        yield facts
+
+def generate_columns(size: int, seed: int = 0) -> Dict[str, Any]:
+    """Columnar form of a synthetic tenant (one NumPy array per fact) for RuleEngine.run_batch."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name, (kind, spec) in FACT_SPECS.items():
+        if kind == 'bool':
+            columns[name] = rng.random(size) < spec
+        else:
+            columns[name] = rng.integers(spec[0], spec[1] + 1, size)
+    return columns
+
+def _condition(rng: random.Random, name: str) -> Dict[str, Any]:
+    kind, spec = FACT_SPECS[name]
+    if kind == 'bool':
+        return {'fact': name, 'operator': rng.choice(['equal', 'notEqual']), 'value': rng.random() < 0.5}
+    low, high = spec
+    return {'fact': name, 'operator': rng.choice(['lessThanEqual', 'greaterThan', 'greaterThanEqual']), 'value': rng.randint(low, high)}
+
+def generate_rules(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate `count` rule definitions of 1-4 conditions over the synthetic facts, some nested."""
+    rng = random.Random(seed)
+    names = list(FACT_SPECS)
+    rules = []
+    for i in range(count):
+        conditions = [_condition(rng, name) for name in rng.sample(names, rng.randint(1, 3))]
+        if rng.random() < 0.3:
+            conditions.append({'any': [_condition(rng, name) for name in rng.sample(names, 2)]})
+        rules.append({
+            'id': f"synthetic-{i:05d}",
+            'name': f"Synthetic Rule {i}",
+            'description': "Generated benchmark rule.",
+            'framework': rng.choice(['NIST', 'ISO27001', 'CIS', 'Essential8']),
+            'severity': rng.choice(['low', 'medium', 'high', 'critical']),
+            'conditions': {rng.choice(['all', 'any']): conditions},
+            'event': {'type': 'non_compliance', 'params': {'message': f"Synthetic rule {i} failed."}},
+            'is_active': True,
+            'version': '1.0.0',
+        })
+    return rules
+
+def write_rules(rules: List[Dict[str, Any]], rules_dir: str) -> str:
+    """Write rule definitions as one JSON file per rule. Returns rules_dir."""
+    os.makedirs(rules_dir, exist_ok=True)
+    for rule in rules:
+        with open(os.path.join(rules_dir, f"{rule['id']}.json"), 'w') as f:
+            json.dump(rule, f)
+    return rules_dir
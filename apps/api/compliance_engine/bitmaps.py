@@ -0,0 +1,133 @@
+import base64
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from .results import INDETERMINATE, ResultSet
+
+def _ordinals(bits: int) -> Iterator[int]:
+    """Yield the positions of the set bits in ascending order."""
+    for byte_index, byte in enumerate(bits.to_bytes((bits.bit_length() + 7) // 8, 'little')):
+        while byte:
+            low = byte & -byte
+            yield (byte_index << 3) + low.bit_length() - 1
+            byte ^= low
+
+class FailureBitmaps:
+    """
+    Per-rule bitmaps of failing entity ordinals for one scan.
+    - Bit i of a rule's bitmap is set when entity i failed the rule.
+    - indeterminate: Bitmaps of the same form for entities whose outcome is unknown (timed out).
+    - Bitmaps are Python ints, so & / | / ~ run word-at-a-time and sizes are unbounded.
+    - to_dict()/from_dict(): JSON-safe form (little-endian bytes, base64) for scan metadata;
+      indeterminate bitmaps are encoded separately (encode()/decode()).
+    Entity ordinals are only comparable across scans that enumerate entities in the same order
+    (e.g. sorted by object id).
+    """
+    def __init__(self, bitmaps: Optional[Dict[str, int]] = None, indeterminate: Optional[Dict[str, int]] = None):
+        self.bitmaps: Dict[str, int] = dict(bitmaps or {})
+        self.indeterminate: Dict[str, int] = dict(indeterminate or {})
+
+    @classmethod
+    def from_result_set(cls, result_set: ResultSet) -> 'FailureBitmaps':
+        def outcomes(outcome: int) -> Iterator[Tuple[int, int]]:
+            return ((rule_index, entity_index) for rule_index, entity_index, passed
+                    in zip(result_set.rule_indexes, result_set.entity_indexes, result_set.passed) if passed == outcome)
+        return cls({result_set.rule(rule_index).id: bits for rule_index, bits in _build(outcomes(0)).items()},
+                   {result_set.rule(rule_index).id: bits for rule_index, bits in _build(outcomes(INDETERMINATE)).items()})
+
+    @classmethod
+    def from_results(cls, results: Iterable[List[Dict]]) -> 'FailureBitmaps':
+        """Build from per-entity result lists (as returned by RuleEngine.run), in entity order."""
+        results = list(results)
+
+        def outcomes(passed: Optional[bool]) -> Iterator[Tuple[str, int]]:
+            return ((result['rule_id'], entity_index) for entity_index, entity_results in enumerate(results)
+                    for result in entity_results if result['passed'] is passed)
+        return cls(_build(outcomes(False)), _build(outcomes(None)))
+
+    def add(self, rule_id: str, entity_index: int):
+        self.bitmaps[rule_id] = self.bitmaps.get(rule_id, 0) | (1 << entity_index)
+
+    def entities(self, rule_id: str) -> List[int]:
+        """Failing entity ordinals for a rule, ascending."""
+        return list(_ordinals(self.bitmaps.get(rule_id, 0)))
+
+    def count(self, rule_id: str) -> int:
+        return bin(self.bitmaps.get(rule_id, 0)).count('1')
+
+    def __contains__(self, item) -> bool:
+        rule_id, entity_index = item
+        return bool(self.bitmaps.get(rule_id, 0) >> entity_index & 1)
+
+    def __bool__(self) -> bool:
+        return any(self.bitmaps.values())
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, FailureBitmaps):
+            return NotImplemented
+        return (_nonzero(self.bitmaps) == _nonzero(other.bitmaps)
+                and _nonzero(self.indeterminate) == _nonzero(other.indeterminate))
+
+    def difference(self, other: 'FailureBitmaps') -> 'FailureBitmaps':
+        """
+        Failures in this scan that are neither failing nor indeterminate in `other`
+        (self & ~(other | other.indeterminate), per rule).
+        """
+        result = {}
+        for rule_id, bits in self.bitmaps.items():
+            remaining = bits & ~(other.bitmaps.get(rule_id, 0) | other.indeterminate.get(rule_id, 0))
+            if remaining:
+                result[rule_id] = remaining
+        return FailureBitmaps(result)
+
+    def to_dict(self) -> Dict[str, str]:
+        return encode(self.bitmaps)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, str], indeterminate: Optional[Dict[str, str]] = None) -> 'FailureBitmaps':
+        return cls(decode(data), decode(indeterminate or {}))
+
+def _build(records: Iterable[Tuple[Any, int]]) -> Dict[Any, int]:
+    """Bitmaps keyed by the first item of each (key, entity ordinal) pair."""
+    # Set bits in byte buffers and convert once; OR-ing into an int per record is quadratic
+    buffers: Dict[Any, bytearray] = {}
+    for key, entity_index in records:
+        buffer = buffers.get(key)
+        if buffer is None:
+            buffer = buffers[key] = bytearray()
+        byte = entity_index >> 3
+        if byte >= len(buffer):
+            buffer.extend(bytes(byte + 1 - len(buffer)))
+        buffer[byte] |= 1 << (entity_index & 7)
+    return {key: int.from_bytes(buffer, 'little') for key, buffer in buffers.items()}
+
+def _nonzero(bitmaps: Dict[str, int]) -> Dict[str, int]:
+    return {k: v for k, v in bitmaps.items() if v}
+
+def encode(bitmaps: Dict[str, int]) -> Dict[str, str]:
+    """JSON-safe form of per-rule bitmaps (little-endian bytes, base64); empty bitmaps are dropped."""
+    return {
+        rule_id: base64.b64encode(bits.to_bytes((bits.bit_length() + 7) // 8, 'little')).decode()
+        for rule_id, bits in bitmaps.items() if bits
+    }
+
+def decode(data: Dict[str, str]) -> Dict[str, int]:
+    return {rule_id: int.from_bytes(base64.b64decode(encoded), 'little') for rule_id, encoded in data.items()}
+
+class ScanDiff:
+    """
+    Change in failures between two scans of the same tenant.
+    - newly_failing: Failing now but not before (current & ~previous).
+    - fixed: Failing before but not now (previous & ~current).
+    Entities whose outcome was indeterminate in either scan are in neither set.
+    """
+    def __init__(self, previous: FailureBitmaps, current: FailureBitmaps):
+        self.newly_failing = current.difference(previous)
+        self.fixed = previous.difference(current)
+
+    def __bool__(self) -> bool:
+        return bool(self.newly_failing) or bool(self.fixed)
+
+    def to_dict(self) -> Dict[str, Dict[str, List[int]]]:
+        return {
+            'newly_failing': {rule_id: self.newly_failing.entities(rule_id) for rule_id in self.newly_failing.bitmaps},
+            'fixed': {rule_id: self.fixed.entities(rule_id) for rule_id in self.fixed.bitmaps},
+        }
@@ -0,0 +1,91 @@
+"""
+Precompiled rule bundle cache.
+- build_bundle(rules_dir, path): Validate and compile the rules in a directory and write them
+  to a single pickle file, tagged with a schema version and the content hash of the rule files.
+- load_bundle(path, rules_dir): Return the compiled catalog if the bundle matches the current
+  rule files, or None so the caller falls back to JSON parsing.
+Bundles are pickles: only load bundles produced by your own build step.
+
+Build step:
+    python -m apps.api.compliance_engine.bundle apps/api/compliance_engine/rules rules.bundle
+"""
+import hashlib
+import logging
+import os
+import pickle
+import sys
+from typing import Dict, Iterable, Optional, Tuple
+from .catalog import RuleCatalog, RuleFileLoader
+from .compiler import MAX_CONCURRENT_FACTS
+
+# Bump whenever the compiled classes or the bundle layout change.
+BUNDLE_SCHEMA_VERSION = 7
+
+def _combine(digests: Iterable[Tuple[str, str]]) -> str:
+    combined = hashlib.sha256()
+    for filename, digest in digests:
+        combined.update(filename.encode())
+        combined.update(b'\0')
+        combined.update(digest.encode())
+    return combined.hexdigest()
+
+def rules_digest(rules_dir: str) -> str:
+    """Content hash of all rule files in a directory (reads, but does not parse, each file)."""
+    digests = []
+    for filename in sorted(os.listdir(rules_dir)):
+        if filename.endswith('.json'):
+            with open(os.path.join(rules_dir, filename), 'rb') as f:
+                digests.append((filename, hashlib.sha256(f.read()).hexdigest()))
+    return _combine(digests)
+
+def loader_digest(loader: RuleFileLoader) -> str:
+    """Content hash of the files a loader has parsed, comparable to rules_digest()."""
+    return _combine((filename, entry[2]) for filename, entry in loader.state().items())
+
+def write_bundle(path: str, catalog: RuleCatalog, loader: RuleFileLoader, concurrency: int):
+    """Write a catalog and its loader state to `path` atomically."""
+    payload = {
+        'schema_version': BUNDLE_SCHEMA_VERSION,
+        'content_hash': loader_digest(loader),
+        'concurrency': concurrency,
+        'catalog': catalog,
+        'files': loader.state(),
+    }
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def build_bundle(rules_dir: str, path: str, concurrency: int = MAX_CONCURRENT_FACTS) -> str:
+    """Parse, validate and compile all rules in `rules_dir` and write a bundle. Returns the content hash."""
+    loader = RuleFileLoader(rules_dir)
+    _, rules = loader.scan()
+    write_bundle(path, RuleCatalog(rules, concurrency), loader, concurrency)
+    return loader_digest(loader)
+
+def load_bundle(path: str, rules_dir: str, concurrency: int = MAX_CONCURRENT_FACTS) -> Optional[Tuple[RuleCatalog, Dict]]:
+    """
+    Load a bundle if it matches the schema version, concurrency and current rule files.
+    Returns (catalog, loader state) or None when the bundle is missing, stale or unreadable.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except Exception as e:
+        logging.error(f"Error reading rule bundle '{path}': {e}")
+        return None
+    if (not isinstance(payload, dict)
+            or payload.get('schema_version') != BUNDLE_SCHEMA_VERSION
+            or payload.get('concurrency') != concurrency
+            or payload.get('content_hash') != rules_digest(rules_dir)):
+        logging.info(f"Rule bundle '{path}' is stale; falling back to JSON rules.")
+        return None
+    return payload['catalog'], payload['files']
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("usage: python -m apps.api.compliance_engine.bundle <rules_dir> <bundle_path>")
+        sys.exit(2)
+    print(build_bundle(sys.argv[1], sys.argv[2]))
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from .rule_schema import ComplianceRule
+from .compiler import CompiledRule, ConditionInterner, MAX_CONCURRENT_FACTS, compile_rules
+from .tuning import ConditionStats
+from .analysis import RuleFinding, fold_conditions
+from .templates import expand_rule
+
+class RuleCatalog:
+    """
+    Immutable compiled rule set.
+    - compiled: Compiled rules, in load order.
+    - fact_index: Fact name -> compiled rules that depend on it.
+    - generation: Incremented on every swap, for diagnostics.
+    - condition_stats: Observed pass rates and costs of condition nodes (see tuning.py).
+    - findings: Rule id -> static analysis findings; conditions are compiled in folded form,
+      so contradictory, tautological, duplicate and redundant conditions are never evaluated.
+    - parameters: Per-org parameter overrides (rule id -> values) the templates were expanded with.
+      Parameter references are replaced with constants before folding and compilation.
+    RuleEngine swaps whole catalogs in a single assignment, so a scan that captured
+    a catalog keeps evaluating against it even if a reload happens meanwhile.
+    Only the order of group children changes in place, when a ConditionTuner retunes it.
+    """
+    __slots__ = ('compiled', 'fact_index', 'generation', 'condition_stats', 'findings', 'parameters')
+
+    def __init__(self, rules: List[ComplianceRule], concurrency: int = MAX_CONCURRENT_FACTS, generation: int = 0, parameters: Optional[Dict[str, Dict[str, Any]]] = None, interner: Optional[ConditionInterner] = None):
+        """
+        Expand, fold and compile rules.
+        - interner: Optional ConditionInterner shared with other catalogs of the same rules, so
+          per-org catalogs reuse every node their parameter overrides do not change.
+        Raises ValueError for references to undefined parameters.
+        """
+        self.parameters: Dict[str, Dict[str, Any]] = dict(parameters or {})
+        analyzed = [fold_conditions(expand_rule(rule, self.parameters.get(rule.id))) for rule in rules]
+        self.compiled: List[CompiledRule] = compile_rules(rules, concurrency, [folded for folded, _ in analyzed], interner)
+        self.findings: Dict[str, List[RuleFinding]] = {}
+        for rule, (_, findings) in zip(rules, analyzed):
+            if findings:
+                self.findings[rule.id] = findings
+                for finding in findings:
+                    logging.warning(f"Rule '{rule.id}' {finding.kind} at {finding.path}: {finding.message}")
+        self.fact_index: Dict[str, List[CompiledRule]] = {}
+        for compiled in self.compiled:
+            for fact in compiled.facts:
+                self.fact_index.setdefault(fact, []).append(compiled)
+        self.generation = generation
+        self.condition_stats = ConditionStats()
+
+    @property
+    def rules(self) -> List[ComplianceRule]:
+        return [compiled.rule for compiled in self.compiled]
+
+class RuleFileLoader:
+    """
+    Tracks the rule files in a directory and re-parses only files that changed.
+    - A file is re-read when its mtime or size changes, and re-validated only when
+      its content hash differs from the last parse.
+    - scan() returns whether anything changed and the current rules, ordered by filename.
+    """
+    def __init__(self, rules_dir: str):
+        self.rules_dir = rules_dir
+        # filename -> (mtime_ns, size, sha256, parsed rule)
+        self._files: Dict[str, Tuple[int, int, str, ComplianceRule]] = {}
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Forget all tracked files so the next scan re-parses everything."""
+        with self._lock:
+            self._files = {}
+
+    def state(self) -> Dict[str, Tuple[int, int, str, ComplianceRule]]:
+        """Snapshot of tracked files: filename -> (mtime_ns, size, sha256, rule)."""
+        with self._lock:
+            return dict(self._files)
+
+    def restore(self, files: Dict[str, Tuple[int, int, str, ComplianceRule]]):
+        """Adopt tracked files from a snapshot (e.g. a precompiled bundle)."""
+        with self._lock:
+            self._files = dict(files)
+
+    def scan(self) -> Tuple[bool, List[ComplianceRule]]:
+        """
+        Re-check the rules directory.
+        Raises on unreadable or invalid files; tracked state is left untouched in that case.
+        """
+        with self._lock:
+            files: Dict[str, Tuple[int, int, str, ComplianceRule]] = {}
+            changed = False
+            for filename in sorted(os.listdir(self.rules_dir)):
+                if not filename.endswith('.json'):
+                    continue
+                path = os.path.join(self.rules_dir, filename)
+                stat = os.stat(path)
+                previous = self._files.get(filename)
+                if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                    files[filename] = previous
+                    continue
+                with open(path, 'rb') as f:
+                    content = f.read()
+                digest = hashlib.sha256(content).hexdigest()
+                if previous and previous[2] == digest:
+                    files[filename] = (stat.st_mtime_ns, stat.st_size, digest, previous[3])
+                    continue
+                rule = ComplianceRule(**json.loads(content))
+                files[filename] = (stat.st_mtime_ns, stat.st_size, digest, rule)
+                changed = True
+            if files.keys() != self._files.keys():
+                changed = True
+            self._files = files
+            return changed, [entry[3] for entry in files.values()]
@@ -0,0 +1,472 @@
+import asyncio
+import itertools
+import json
+import operator
+import time
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, Union
+from .rule_schema import ComplianceRule, RuleCondition
+from .facts import fact_registry
+from .paths import path_accessor
+from .profiling import active_profiler
+from .tuning import active_condition_stats
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _in(fact_value: Any, value: Any) -> bool:
+    try:
+        return fact_value in value
+    except TypeError:
+        # Unhashable fact value (list, dict) against a frozenset: compare member by member
+        return any(fact_value == member for member in value)
+
+def _not_in(fact_value: Any, value: Any) -> bool:
+    return not _in(fact_value, value)
+
+def _less_than(fact_value: Any, value: Any) -> bool:
+    return fact_value is not None and fact_value < value
+
+def _less_than_equal(fact_value: Any, value: Any) -> bool:
+    return fact_value is not None and fact_value <= value
+
+def _greater_than(fact_value: Any, value: Any) -> bool:
+    return fact_value is not None and fact_value > value
+
+def _greater_than_equal(fact_value: Any, value: Any) -> bool:
+    return fact_value is not None and fact_value >= value
+
+# Operator table: name -> comparison function(fact_value, value).
+# Extensible: Add new operators by adding entries here.
+OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    'equal': operator.eq,
+    'notEqual': operator.ne,
+    'in': _in,
+    'notIn': _not_in,
+    'lessThan': _less_than,
+    'lessThanEqual': _less_than_equal,
+    'greaterThan': _greater_than,
+    'greaterThanEqual': _greater_than_equal,
+}
+
+def _vector_in(column: Any, value: Any) -> Any:
+    return np.isin(column, list(value))
+
+def _vector_not_in(column: Any, value: Any) -> Any:
+    return ~np.isin(column, list(value))
+
+# Vectorized operator table for run_batch: name -> function(column, value) -> bool mask.
+# Only available when numpy is installed.
+VECTOR_OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    'equal': np.equal,
+    'notEqual': np.not_equal,
+    'in': _vector_in,
+    'notIn': _vector_not_in,
+    'lessThan': np.less,
+    'lessThanEqual': np.less_equal,
+    'greaterThan': np.greater,
+    'greaterThanEqual': np.greater_equal,
+} if np is not None else {}
+
+# Default upper bound on concurrently resolved async facts within one condition group.
+MAX_CONCURRENT_FACTS = 8
+
+def convert_value(op: str, value: Any) -> Any:
+    """
+    Pre-convert a constant condition value for its operator.
+    Membership operators get a frozenset when all members are hashable, else a tuple.
+    """
+    if op in ('in', 'notIn') and isinstance(value, (list, tuple, set, frozenset)):
+        try:
+            return frozenset(value)
+        except TypeError:
+            return tuple(value)
+    return value
+
+class CompiledCondition:
+    """
+    A single condition with its operator bound and fact name pre-split.
+    - fact: Full fact name, used to look up the fact handler.
+    - entity_key: Top-level facts key passed to the handler (e.g. 'user').
+    - accessor: Compiled path applied to the fact value (None without a path).
+    - op: Bound operator function.
+    - value: Pre-converted constant value.
+    """
+    __slots__ = ('source', 'fact', 'entity_key', 'accessor', 'operator', 'op', 'value', '_is_async', '_generation')
+
+    def __init__(self, cond: RuleCondition):
+        if cond.operator not in OPERATORS:
+            raise NotImplementedError(f"Operator {cond.operator} not implemented.")
+        self.source = cond
+        self.fact = cond.fact
+        self.entity_key = cond.fact.split(".")[0]
+        self.accessor = path_accessor(cond.path)
+        self.operator = cond.operator
+        self.op = OPERATORS[cond.operator]
+        self.value = convert_value(cond.operator, cond.value)
+        self._generation = None
+        self.is_async()
+
+    @property
+    def facts(self) -> FrozenSet[str]:
+        return frozenset((self.fact,))
+
+    def is_async(self) -> bool:
+        if self._generation is not fact_registry.generation:
+            # Entries of request-supplied rules must not be kept, so look up without caching
+            self._is_async = fact_registry.entry(self.fact, cache=False).is_async
+            self._generation = fact_registry.generation
+        return self._is_async
+
+    async def evaluate(self, facts: Dict[str, Any], memo: Optional[Dict[Any, bool]] = None) -> bool:
+        if memo is not None and self in memo:
+            return memo[self]
+        profiler = active_profiler()
+        start = time.perf_counter() if profiler is not None else 0.0
+        entity = facts.get(self.entity_key, {})
+        if entity.__class__ is not dict and hasattr(entity, 'batch_columns'):
+            raise TypeError(f"Condition on '{self.fact}' reads one entity, but facts['{self.entity_key}'] is a FactTable; "
+                            "use an aggregate condition, RuleEngine.run_batch or FactTable.entities().")
+        entry = fact_registry.entry(self.fact)
+        if entry.direct:
+            # Plain attribute fact: read inline, no coroutine or cache round trip
+            fact_value = entry.handler(entity)
+        else:
+            fact_value = await fact_registry.resolve(self.fact, entity)
+        if self.accessor is not None:
+            fact_value = self.accessor(fact_value)
+        passed = self.op(fact_value, self.value)
+        if profiler is not None:
+            profiler.record_fact(self.fact, time.perf_counter() - start, fact_value, passed)
+        if memo is not None:
+            memo[self] = passed
+        return passed
+
+    def evaluate_batch(self, columns: Dict[str, Any], size: int, memo: Optional[Dict[Any, Any]] = None) -> Any:
+        """Evaluate against a column of fact values (array or FactStore column). Returns a boolean mask."""
+        if memo is not None and self in memo:
+            return memo[self]
+        if self.fact not in columns:
+            raise KeyError(f"No column for fact '{self.fact}'.")
+        if self.accessor is not None:
+            raise NotImplementedError(f"Path {self.accessor.path} has no vectorized form.")
+        column = columns[self.fact]
+        compare = getattr(column, 'compare', None)
+        if compare is not None:
+            # Typed or dictionary-encoded FactStore column; handles missing values itself
+            mask = compare(self.operator, self.value)
+        elif self.operator not in VECTOR_OPERATORS:
+            raise NotImplementedError(f"Operator {self.operator} has no vectorized form.")
+        else:
+            mask = VECTOR_OPERATORS[self.operator](column, self.value)
+        if memo is not None:
+            memo[self] = mask
+        return mask
+
+# Collection operators for RuleCondition.aggregate.
+AGGREGATES = ('count', 'ratio', 'exists', 'forAll', 'min', 'max')
+
+_NOT_VECTORIZED = object()
+
+class CompiledAggregate:
+    """
+    A collection-level condition, e.g. "ratio of users with MFA >= 0.98".
+    - Iterates the list at facts[entity_key] once, binding each item as the entity.
+    - count/ratio/exists/forAll count items matching `where` (or with a truthy fact value);
+      exists/forAll stop at the first decisive item.
+    - min/max aggregate the non-None fact values of items matching `where`.
+    - A path is applied to each item's fact value.
+    - The aggregate value (None for ratio/min/max of no items) is compared with op/value.
+    - When facts[entity_key] is a FactTable, plain attribute facts are aggregated on its columns.
+    """
+    __slots__ = ('source', 'fact', 'entity_key', 'accessor', 'aggregate', 'where', 'operator', 'op', 'value', 'facts', '_is_async', '_generation')
+
+    def __init__(self, cond: RuleCondition, concurrency: int = MAX_CONCURRENT_FACTS, interner: Optional['ConditionInterner'] = None):
+        if cond.aggregate not in AGGREGATES:
+            raise NotImplementedError(f"Aggregate {cond.aggregate} not implemented.")
+        if cond.operator not in OPERATORS:
+            raise NotImplementedError(f"Operator {cond.operator} not implemented.")
+        self.source = cond
+        self.fact = cond.fact
+        self.entity_key = cond.fact.split(".")[0]
+        self.accessor = path_accessor(cond.path)
+        self.aggregate = cond.aggregate
+        self.where = compile_node(cond.where, concurrency, interner) if cond.where else None
+        self.operator = cond.operator
+        self.op = OPERATORS[cond.operator]
+        self.value = convert_value(cond.operator, cond.value)
+        self.facts: FrozenSet[str] = frozenset((self.fact,)) | (self.where.facts if self.where is not None else frozenset())
+        self._generation = None
+        self.is_async()
+
+    def is_async(self) -> bool:
+        if self._generation is not fact_registry.generation:
+            self._is_async = fact_registry.entry(self.fact, cache=False).is_async or (self.where is not None and self.where.is_async())
+            self._generation = fact_registry.generation
+        return self._is_async
+
+    async def evaluate(self, facts: Dict[str, Any], memo: Optional[Dict[Any, bool]] = None) -> bool:
+        if memo is not None and self in memo:
+            return memo[self]
+        profiler = active_profiler()
+        start = time.perf_counter() if profiler is not None else 0.0
+        aggregated = await self._aggregate(facts)
+        passed = self.op(aggregated, self.value)
+        if profiler is not None:
+            profiler.record_fact(f"{self.aggregate}({self.fact})", time.perf_counter() - start, aggregated, passed)
+        if memo is not None:
+            memo[self] = passed
+        return passed
+
+    async def _aggregate(self, facts: Dict[str, Any]) -> Any:
+        items = facts.get(self.entity_key) or ()
+        if hasattr(items, 'batch_columns'):
+            aggregated = self._aggregate_columns(items)
+            if aggregated is not _NOT_VECTORIZED:
+                return aggregated
+            items = list(items.rows())
+        selecting = self.aggregate in ('min', 'max')
+        prefetched = None
+        if self.where is None and fact_registry.entry(self.fact).batch_size is not None:
+            # Batched fact: resolve all items together so they share handler calls
+            prefetched = iter(await asyncio.gather(*(self._item_value(item) for item in items)))
+        total = matched = 0
+        best = None
+        for item in items:
+            total += 1
+            # Item-scoped facts: the item replaces the collection under its entity key.
+            # The per-entity memo is not used here; item predicates differ per item.
+            if self.where is not None:
+                scope = dict(facts)
+                scope[self.entity_key] = item
+                hit = bool(await self.where.evaluate(scope))
+            else:
+                hit = True
+            if selecting:
+                if not hit:
+                    continue
+                item_value = next(prefetched) if prefetched is not None else await self._item_value(item)
+                if item_value is not None and (best is None or (item_value < best if self.aggregate == 'min' else item_value > best)):
+                    best = item_value
+                continue
+            if self.where is None:
+                hit = bool(next(prefetched) if prefetched is not None else await self._item_value(item))
+            if hit:
+                matched += 1
+                if self.aggregate == 'exists':
+                    return True
+            elif self.aggregate == 'forAll':
+                return False
+        if self.aggregate == 'exists':
+            return False
+        if self.aggregate == 'forAll':
+            return True
+        if self.aggregate == 'count':
+            return matched
+        if self.aggregate == 'ratio':
+            return matched / total if total else None
+        return best
+
+    def _aggregate_columns(self, table: Any) -> Any:
+        """Aggregate over a FactTable's columns, or _NOT_VECTORIZED when handlers or paths need per-item evaluation."""
+        if self.accessor is not None or not all(fact_registry.entry(fact).direct for fact in self.facts):
+            return _NOT_VECTORIZED
+        try:
+            where = self.where.evaluate_batch(table.batch_columns(), table.size) if self.where is not None else None
+            return table.aggregate(self.aggregate, self.fact, where)
+        except KeyError:
+            # Attribute absent from every entity: per-item evaluation sees None values
+            return _NOT_VECTORIZED
+        except NotImplementedError:
+            return _NOT_VECTORIZED
+
+    async def _item_value(self, item: Any) -> Any:
+        entry = fact_registry.entry(self.fact)
+        item_value = entry.handler(item) if entry.direct else await fact_registry.resolve(self.fact, item)
+        return self.accessor(item_value) if self.accessor is not None else item_value
+
+    def evaluate_batch(self, columns: Dict[str, Any], size: int, memo: Optional[Dict[Any, Any]] = None) -> Any:
+        raise NotImplementedError(f"Aggregate {self.aggregate} has no vectorized form.")
+
+class CompiledConditions:
+    """
+    Compiled all/any/not condition group. Children are conditions or nested groups.
+    Uses the first of 'all', 'any', 'not' present; an empty mapping evaluates to False.
+    - Short-circuits: 'all'/'not' stop at the first failing child, 'any' at the first passing one.
+    - Children with sync fact handlers run first, in order; children with async handlers
+      are then resolved concurrently, at most `concurrency` at a time.
+    - Pass a ConditionInterner to share identical sub-conditions with other groups.
+    - Children may be reordered by a ConditionTuner; the list is replaced, never mutated.
+    - is_async() is computed at compile time and kept on each node; it is recomputed only after
+      a fact is (re-)registered (fact_registry.generation changes).
+    """
+    __slots__ = ('mode', 'children', 'concurrency', 'facts', '_is_async', '_generation')
+
+    def __init__(self, conditions: Dict[str, List[Any]], concurrency: int = MAX_CONCURRENT_FACTS, interner: Optional['ConditionInterner'] = None):
+        self.mode: Optional[str] = None
+        self.children: List[CompiledNode] = []
+        self.concurrency = concurrency
+        for mode in ('all', 'any', 'not'):
+            if mode in conditions:
+                self.mode = mode
+                self.children = [compile_node(c, concurrency, interner) for c in conditions[mode]]
+                break
+        self.facts: FrozenSet[str] = frozenset().union(*(c.facts for c in self.children))
+        self._generation = None
+        self.is_async()
+
+    def is_async(self) -> bool:
+        if self._generation is not fact_registry.generation:
+            self._is_async = any(c.is_async() for c in self.children)
+            self._generation = fact_registry.generation
+        return self._is_async
+
+    async def evaluate(self, facts: Dict[str, Any], memo: Optional[Dict[Any, bool]] = None) -> bool:
+        if memo is not None and self in memo:
+            return memo[self]
+        if self.mode is None:
+            passed = False
+        else:
+            # 'any' is decided by the first True child; 'all' and 'not' by the first False one
+            decisive = self.mode == 'any'
+            found = await self._find_decisive(facts, memo, decisive)
+            passed = not found if self.mode == 'all' else found
+            profiler = active_profiler()
+            if profiler is not None:
+                profiler.record_group(found and len(self.children) > 1)
+        if memo is not None:
+            memo[self] = passed
+        return passed
+
+    async def _find_decisive(self, facts: Dict[str, Any], memo: Optional[Dict[Any, bool]], decisive: bool) -> bool:
+        """Return True as soon as any child evaluates to `decisive`."""
+        stats = active_condition_stats()
+
+        def evaluate(child: CompiledNode):
+            return child.evaluate(facts, memo) if stats is None else _recorded(stats, child, facts, memo)
+
+        pending = []
+        for child in self.children:
+            if child.is_async():
+                pending.append(child)
+            elif bool(await evaluate(child)) is decisive:
+                return True
+        if len(pending) <= 1 or self.concurrency <= 1:
+            for child in pending:
+                if bool(await evaluate(child)) is decisive:
+                    return True
+            return False
+        remaining = iter(pending)
+        running = {asyncio.ensure_future(evaluate(c)) for c in itertools.islice(remaining, self.concurrency)}
+        try:
+            while running:
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if bool(task.result()) is decisive:
+                        return True
+                running |= {asyncio.ensure_future(evaluate(c)) for c in itertools.islice(remaining, len(done))}
+            return False
+        finally:
+            for task in running:
+                task.cancel()
+
+    def evaluate_batch(self, columns: Dict[str, Any], size: int, memo: Optional[Dict[Any, Any]] = None) -> Any:
+        """Evaluate against columnar facts of `size` entities. Returns a boolean mask."""
+        if memo is not None and self in memo:
+            return memo[self]
+        if self.mode is None:
+            mask = np.zeros(size, dtype=bool)
+        else:
+            masks = [c.evaluate_batch(columns, size, memo) for c in self.children]
+            if self.mode == 'any':
+                mask = np.logical_or.reduce(masks) if masks else np.zeros(size, dtype=bool)
+            else:
+                mask = np.logical_and.reduce(masks) if masks else np.ones(size, dtype=bool)
+                if self.mode == 'not':
+                    mask = ~mask
+        if memo is not None:
+            memo[self] = mask
+        return mask
+
+async def _recorded(stats: Any, child: Any, facts: Dict[str, Any], memo: Optional[Dict[Any, bool]]) -> bool:
+    """Evaluate a group child and record its outcome and cost for adaptive ordering."""
+    start = time.perf_counter()
+    passed = await child.evaluate(facts, memo)
+    stats.record(child, bool(passed), time.perf_counter() - start)
+    return passed
+
+CompiledNode = Union[CompiledCondition, CompiledAggregate, CompiledConditions]
+
+def _value_key(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=repr)
+
+class ConditionInterner:
+    """
+    Catalog-wide table of compiled condition nodes (common-subexpression elimination).
+    Identical conditions (same fact, operator, value, path and params) and identical
+    groups (same mode and children) compile to one shared node, so a per-entity memo
+    evaluates each of them once across all rules.
+    """
+    def __init__(self):
+        self._nodes: Dict[Tuple, CompiledNode] = {}
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def condition(self, cond: RuleCondition) -> CompiledCondition:
+        key = ('condition', cond.fact, cond.operator, _value_key(cond.value), cond.path, _value_key(cond.params))
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = CompiledCondition(cond)
+        return node
+
+    def aggregate(self, cond: RuleCondition, concurrency: int) -> CompiledAggregate:
+        compiled = CompiledAggregate(cond, concurrency, self)
+        key = ('aggregate', cond.fact, cond.aggregate, cond.operator, _value_key(cond.value), cond.path, id(compiled.where))
+        return self._nodes.setdefault(key, compiled)
+
+    def group(self, conditions: Dict[str, List[Any]], concurrency: int) -> CompiledConditions:
+        compiled = CompiledConditions(conditions, concurrency, self)
+        key = ('group', compiled.mode, concurrency, tuple(id(c) for c in compiled.children))
+        return self._nodes.setdefault(key, compiled)
+
+def compile_node(node: Any, concurrency: int = MAX_CONCURRENT_FACTS, interner: Optional[ConditionInterner] = None) -> CompiledNode:
+    """Compile a condition list entry: a RuleCondition (scalar or aggregate) or a nested {'all'|'any'|'not': [...]} group."""
+    if isinstance(node, RuleCondition):
+        if node.aggregate is not None:
+            return interner.aggregate(node, concurrency) if interner is not None else CompiledAggregate(node, concurrency)
+        return interner.condition(node) if interner is not None else CompiledCondition(node)
+    return interner.group(node, concurrency) if interner is not None else CompiledConditions(node, concurrency)
+
+class CompiledRule:
+    """
+    A ComplianceRule paired with its compiled predicate.
+    - rule: Source rule (metadata, event).
+    - predicate: Compiled condition tree (possibly shared with other rules).
+    - facts: Names of the facts the rule depends on.
+    - conditions: Optional replacement for rule.conditions (e.g. the statically folded tree).
+    """
+    __slots__ = ('rule', 'predicate', 'facts')
+
+    def __init__(self, rule: ComplianceRule, concurrency: int = MAX_CONCURRENT_FACTS, interner: Optional[ConditionInterner] = None, conditions: Optional[Dict[str, List[Any]]] = None):
+        self.rule = rule
+        self.predicate = compile_node(rule.conditions if conditions is None else conditions, concurrency, interner)
+        self.facts = self.predicate.facts
+
+    async def evaluate(self, facts: Dict[str, Any], memo: Optional[Dict[Any, bool]] = None) -> bool:
+        return await self.predicate.evaluate(facts, memo)
+
+    def evaluate_batch(self, columns: Dict[str, Any], size: int, memo: Optional[Dict[Any, Any]] = None) -> Any:
+        return self.predicate.evaluate_batch(columns, size, memo)
+
+def compile_rules(rules: List[ComplianceRule], concurrency: int = MAX_CONCURRENT_FACTS, conditions: Optional[List[Dict[str, List[Any]]]] = None, interner: Optional[ConditionInterner] = None) -> List[CompiledRule]:
+    """
+    Compile a list of rules into a shared condition DAG.
+    - conditions: Optional per-rule condition trees to compile instead of rule.conditions.
+    - interner: Optional interner to share nodes with previously compiled catalogs.
+    Raises NotImplementedError for unknown operators.
+    """
+    interner = interner if interner is not None else ConditionInterner()
+    if conditions is None:
+        return [CompiledRule(rule, concurrency, interner) for rule in rules]
+    return [CompiledRule(rule, concurrency, interner, tree) for rule, tree in zip(rules, conditions)]
@@ -0,0 +1,49 @@
+import time
+from typing import Any, Dict, Optional
+
+class ScanBudget:
+    """
+    Time budget for one scan.
+    - timeout: Scan-wide budget in seconds (None for no deadline); the clock starts at creation.
+    - rule_timeout: Budget per rule evaluation in seconds (None for no per-rule limit).
+    - Records rule-seconds and indeterminate (timed out) rules per framework.
+    Rules still running at a deadline are cancelled and reported as indeterminate (passed=None).
+    Rule-seconds of concurrently evaluated entities overlap, so per-framework usage can exceed
+    the wall-clock elapsed time.
+    """
+    def __init__(self, timeout: Optional[float] = None, rule_timeout: Optional[float] = None):
+        self.timeout = timeout
+        self.rule_timeout = rule_timeout
+        self.started = time.monotonic()
+        self.deadline = self.started + timeout if timeout is not None else None
+        self.frameworks: Dict[str, Dict[str, float]] = {}
+
+    def limit(self) -> Optional[float]:
+        """Seconds the next rule may run: the per-rule budget capped by the time left in the scan."""
+        if self.deadline is None:
+            return self.rule_timeout
+        remaining = self.deadline - time.monotonic()
+        return remaining if self.rule_timeout is None else min(remaining, self.rule_timeout)
+
+    def record(self, framework: str, seconds: float, indeterminate: bool):
+        usage = self.frameworks.get(framework)
+        if usage is None:
+            usage = self.frameworks[framework] = {'seconds': 0.0, 'rules': 0, 'indeterminate': 0}
+        usage['seconds'] += seconds
+        usage['rules'] += 1
+        if indeterminate:
+            usage['indeterminate'] += 1
+
+    def report(self) -> Dict[str, Any]:
+        """Elapsed time and per-framework rule-seconds, evaluated rules, timeouts and share of the budget."""
+        frameworks = {}
+        for framework, usage in self.frameworks.items():
+            frameworks[framework] = dict(usage)
+            if self.timeout:
+                frameworks[framework]['budget_share'] = usage['seconds'] / self.timeout
+        return {
+            'timeout': self.timeout,
+            'rule_timeout': self.rule_timeout,
+            'elapsed': time.monotonic() - self.started,
+            'frameworks': frameworks,
+        }
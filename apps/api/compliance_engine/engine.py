@@ -1,84 +1,454 @@
-import json
-import os
 import asyncio
-from typing import Any, Dict, List, Optional
+import copy
+import logging
+import time
+from contextlib import nullcontext
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 from .rule_schema import ComplianceRule, RuleCondition
-from .facts import fact_registry
+from .facts import fact_registry, FactCache
+from .compiler import CompiledConditions, CompiledRule, ConditionInterner, MAX_CONCURRENT_FACTS, compile_node, np
+from .catalog import RuleCatalog, RuleFileLoader
+from .bundle import load_bundle, write_bundle
+from .profiling import EvaluationProfiler
+from .results import ResultSet
+from .result_cache import ResultCache
+from .tuning import ConditionTuner
+from .deadlines import ScanBudget
+from .templates import expand_conditions, parameters_key
+from .factstore import FactTable
+
+# Default number of entities evaluated concurrently (and buffered) by RuleEngine.stream.
+DEFAULT_STREAM_WINDOW = 64
 
 class RuleEngine:
     """
     Core compliance rule engine.
-    - Loads rules from JSON/YAML.
+    - Loads rules from JSON/YAML and compiles them into predicates at load time.
     - Registers fact handlers.
-    - Evaluates rules using all/any/not logic, supports async facts.
+    - Evaluates nested all/any/not condition trees with short-circuiting; resolves async facts concurrently.
+    - Shares identical sub-conditions across rules and evaluates each once per run.
+    - Evaluates rules over columnar facts (NumPy arrays or a FactStore table) with run_batch.
+    - Streams results for an async stream of entities with bounded memory (stream).
+    - Collects many-entity results in a compact array-backed ResultSet (run_compact).
+    - Indexes rules by the facts they depend on for incremental re-evaluation (evaluate_delta).
+    - Hot-reloads changed rule files and swaps the compiled catalog atomically (reload_rules, watch_rules).
+    - Starts from a precompiled rule bundle when it matches the rule files (load_rules(bundle_path=...)).
     - Supports extensibility: new operators, decorators, named conditions, event listeners.
-    - Logs evaluation trace for auditability.
+    - Optional profiler: per-rule/per-fact timings and sampled evaluation traces for auditability.
+    - Optional result cache: skips rules whose input facts are unchanged since the last scan.
+    - Optional tuner: reorders all/any children so cheap, decisive conditions run first.
+    - Per-rule and per-scan deadlines (rule_timeout, ScanBudget): rules that run out of time are
+      cancelled and reported as indeterminate (passed=None).
+    - Expands parameterized rule templates at compile time, with per-org overrides (parameters, for_org).
     """
-    def __init__(self, rules_dir: str):
-        """Initialize engine with rules directory."""
+    def __init__(self, rules_dir: str, max_concurrency: int = MAX_CONCURRENT_FACTS, profiler: Optional[EvaluationProfiler] = None, result_cache: Optional[ResultCache] = None, tuner: Optional[ConditionTuner] = None, rule_timeout: Optional[float] = None, parameters: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        Initialize engine with rules directory.
+        - max_concurrency: Max async facts resolved concurrently within one condition group.
+        - profiler: Optional EvaluationProfiler; instrumentation is off when None.
+        - result_cache: Optional persistent ResultCache; rules whose inputs are unchanged since a
+          previous evaluation reuse the cached outcome instead of being evaluated.
+        - tuner: Optional ConditionTuner; reorders group children from sampled pass rates and costs.
+        - rule_timeout: Optional seconds one rule may spend resolving async facts for one entity;
+          slower rules are cancelled and reported as indeterminate. Overridden by a ScanBudget.
+        - parameters: Optional per-org parameter overrides (rule id -> {name: value}) for rule templates.
+        """
         self.rules_dir = rules_dir
-        self.rules: List[ComplianceRule] = []
+        self.max_concurrency = max_concurrency
+        self.profiler = profiler
+        self.result_cache = result_cache
+        self.tuner = tuner
+        self.rule_timeout = rule_timeout
+        self.parameters: Dict[str, Dict[str, Any]] = dict(parameters or {})
+        self.loader = RuleFileLoader(rules_dir)
+        self.catalog = RuleCatalog([], max_concurrency)
+        # (base catalog, interner shared by its per-org catalogs, overrides key -> catalog)
+        self._org_catalogs: Optional[Tuple[RuleCatalog, ConditionInterner, Dict[str, RuleCatalog]]] = None
+
+    @property
+    def compiled(self) -> List[CompiledRule]:
+        """Compiled rules of the current catalog, in load order."""
+        return self.catalog.compiled
+
+    @property
+    def fact_index(self) -> Dict[str, List[CompiledRule]]:
+        """Fact name -> compiled rules of the current catalog that depend on it."""
+        return self.catalog.fact_index
+
+    @property
+    def rules(self) -> List[ComplianceRule]:
+        """Loaded rules, in load order."""
+        return self.catalog.rules
+
+    @rules.setter
+    def rules(self, rules: List[ComplianceRule]):
+        """Replace the loaded rules: compile them into a new catalog and swap it in."""
+        catalog = RuleCatalog(rules, self.max_concurrency, self.catalog.generation + 1, self.parameters)
+        if self.tuner is not None:
+            # Keep the learned condition order for rules that did not change
+            self.tuner.adopt(self.catalog, catalog)
+        self.catalog = catalog
+
+    def load_rules(self, bundle_path: Optional[str] = None):
+        """
+        Load all rules from the rules directory and compile them.
+        - bundle_path: Optional precompiled bundle (see bundle.py). Used when its content hash
+          matches the rule files; otherwise rules are parsed from JSON.
+        """
+        bundle = load_bundle(bundle_path, self.rules_dir, self.max_concurrency) if bundle_path else None
+        if bundle is not None:
+            catalog, files = bundle
+            self.loader.restore(files)
+            if catalog.parameters != self.parameters:
+                # Bundled rules are reused but re-expanded with this engine's parameter overrides
+                self.rules = catalog.rules
+                return
+            catalog.generation = self.catalog.generation + 1
+            self.catalog = catalog
+            return
+        self.loader.reset()
+        _, rules = self.loader.scan()
+        self.rules = rules
+
+    def save_bundle(self, path: str):
+        """Write the current compiled catalog to a precompiled bundle at `path`."""
+        write_bundle(path, self.catalog, self.loader, self.max_concurrency)
+
+    def reload_rules(self) -> bool:
+        """
+        Re-parse only the rule files that changed since the last load and, if any did,
+        compile a new catalog and swap it in. In-flight scans finish on the old catalog.
+        Returns True if a new catalog was swapped in.
+        """
+        changed, rules = self.loader.scan()
+        if changed:
+            self.rules = rules
+        return changed
 
-    def load_rules(self):
-        """Load all rules from the rules directory."""
-        self.rules = []
-        for filename in os.listdir(self.rules_dir):
-            if filename.endswith('.json'):
-                with open(os.path.join(self.rules_dir, filename), 'r') as f:
-                    rule_data = json.load(f)
-                    self.rules.append(ComplianceRule(**rule_data))
+    def org_catalog(self, parameters: Optional[Dict[str, Dict[str, Any]]]) -> RuleCatalog:
+        """
+        Catalog of the current rules expanded with per-org parameter overrides (rule id -> {name: value}).
+        Orgs with equal overrides share one catalog, and all per-org catalogs of the current rules
+        share every compiled node their overrides do not change.
+        """
+        catalog = self.catalog
+        key = parameters_key(parameters)
+        if key == parameters_key(catalog.parameters):
+            return catalog
+        org_catalogs = self._org_catalogs
+        if org_catalogs is None or org_catalogs[0] is not catalog:
+            org_catalogs = self._org_catalogs = (catalog, ConditionInterner(), {})
+        _, interner, catalogs = org_catalogs
+        org = catalogs.get(key)
+        if org is None:
+            org = catalogs.setdefault(key, RuleCatalog(catalog.rules, self.max_concurrency, catalog.generation, parameters, interner))
+        return org
+
+    def for_org(self, parameters: Optional[Dict[str, Dict[str, Any]]]) -> 'RuleEngine':
+        """
+        An engine evaluating the current rules with per-org parameter overrides (see org_catalog).
+        Shares the loader, profiler, caches and tuner with this engine.
+        """
+        engine = copy.copy(self)
+        engine.parameters = dict(parameters or {})
+        engine.catalog = self.org_catalog(parameters)
+        engine._org_catalogs = None
+        return engine
+
+    async def watch_rules(self, interval: float = 5.0):
+        """
+        Poll the rules directory every `interval` seconds and hot-reload changes.
+        Parsing and compilation run in a worker thread, off the event loop.
+        Invalid rule files are logged and the current catalog is kept. Runs until cancelled.
+        """
+        while True:
+            try:
+                if await asyncio.to_thread(self.reload_rules):
+                    logging.info(f"Reloaded compliance rules from '{self.rules_dir}' (generation {self.catalog.generation}).")
+            except Exception as e:
+                logging.error(f"Error reloading compliance rules from '{self.rules_dir}': {e}")
+            await asyncio.sleep(interval)
 
-    async def evaluate_condition(self, cond: RuleCondition, facts: Dict[str, Any]) -> bool:
+    async def evaluate_condition(self, cond: RuleCondition, facts: Dict[str, Any], parameters: Optional[Dict[str, Any]] = None) -> bool:
         """
         Evaluate a single condition using the registered fact handler and operator.
-        Supports async fact handlers. Extendable for new operators.
-        """
-        fact_value = await fact_registry.resolve(cond.fact, facts.get(cond.fact.split(".")[0], {}))
-        op = cond.operator
-        val = cond.value
-        # Basic operator support (expand as needed)
-        if op == 'equal':
-            return fact_value == val
-        elif op == 'notEqual':
-            return fact_value != val
-        elif op == 'in':
-            return fact_value in val
-        elif op == 'notIn':
-            return fact_value not in val
-        # Add more operators as needed
-        raise NotImplementedError(f"Operator {op} not implemented.")
-
-    async def evaluate_conditions(self, conditions: Dict[str, List[RuleCondition]], facts: Dict[str, Any]) -> bool:
+        Supports async fact handlers and aggregate conditions. Operators live in compiler.OPERATORS.
+        - parameters: Values for {"$param": name} references (e.g. the rule's parameters).
+        Raises ValueError for references to parameters that have no value.
+        """
+        cond = expand_conditions({'all': [cond]}, parameters or {})['all'][0]
+        return await compile_node(cond, self.max_concurrency).evaluate(facts)
+
+    async def evaluate_conditions(self, conditions: Dict[str, List[Any]], facts: Dict[str, Any], parameters: Optional[Dict[str, Any]] = None) -> bool:
         """
         Evaluate a set of conditions using all/any/not logic.
-        Supports nesting and composability. Extendable for named conditions.
+        Compiles the conditions on the fly; run() uses the predicates compiled at load time.
+        - parameters: Values for {"$param": name} references (e.g. the rule's parameters).
+        Raises ValueError for references to parameters that have no value.
         """
-        if 'all' in conditions:
-            return all([await self.evaluate_condition(c, facts) for c in conditions['all']])
-        if 'any' in conditions:
-            return any([await self.evaluate_condition(c, facts) for c in conditions['any']])
-        if 'not' in conditions:
-            return not all([await self.evaluate_condition(c, facts) for c in conditions['not']])
-        return False
+        conditions = expand_conditions(conditions, parameters or {})
+        return await CompiledConditions(conditions, self.max_concurrency).evaluate(facts)
 
-    async def run(self, facts: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def run(self, facts: Dict[str, Any], budget: Optional[ScanBudget] = None) -> List[Dict[str, Any]]:
         """
         Run all active rules against the provided facts.
         Returns a list of result objects (rule id, name, passed, event, framework, severity).
+        - budget: Optional ScanBudget with the scan deadline and per-rule timeout; records per-framework time.
+        Rules that exceed the deadline or timeout have passed=None (indeterminate).
         Logs evaluation trace for auditability.
         """
-        results = []
-        for rule in self.rules:
-            if not rule.is_active:
+        return await self._run(facts, self.catalog, budget)
+
+    async def _run(self, facts: Dict[str, Any], catalog: RuleCatalog, budget: Optional[ScanBudget] = None) -> List[Dict[str, Any]]:
+        return [self._result(catalog.compiled[index].rule, passed) for index, passed in await self._outcomes(facts, catalog, budget)]
+
+    async def _outcomes(self, facts: Dict[str, Any], catalog: RuleCatalog, budget: Optional[ScanBudget] = None) -> List[Tuple[int, Optional[bool]]]:
+        """Evaluate all active rules of a catalog; returns (rule index, passed) pairs (passed None when timed out)."""
+        if budget is None and self.rule_timeout is not None:
+            budget = ScanBudget(rule_timeout=self.rule_timeout)
+        outcomes = []
+        # Shared condition nodes are evaluated once per run and reused across rules
+        memo: Dict[Any, bool] = {}
+        keys = self.result_cache.keys(catalog, facts) if self.result_cache is not None else None
+        cached = self.result_cache.get_many(keys) if keys is not None else {}
+        with self._profile_session(), self._tuning_session(catalog):
+            for index, compiled in enumerate(catalog.compiled):
+                if not compiled.rule.is_active:
+                    continue
+                key = keys[index] if keys is not None else None
+                if key in cached:
+                    outcomes.append((index, cached[key]))
+                    continue
+                if budget is None:
+                    passed = await self._evaluate(compiled, facts, memo)
+                else:
+                    passed = await self._evaluate_within(compiled, facts, memo, budget)
+                if key is not None and passed is not None:
+                    self.result_cache.put(key, passed)
+                outcomes.append((index, passed))
+        return outcomes
+
+    async def stream(self, entities: Union[AsyncIterable[Dict[str, Any]], Iterable[Dict[str, Any]]], window: int = DEFAULT_STREAM_WINDOW, fact_cache: Optional[FactCache] = None, budget: Optional[ScanBudget] = None) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+        """
+        Evaluate a stream of entity facts and yield (entity index, results) in input order.
+        - entities: Async (e.g. paged Graph users) or sync iterable of facts dicts.
+        - window: Max entities in flight; at most this many entities and result lists are held at once.
+        - fact_cache: Optional FactCache shared by the evaluations (see ScanExecutor.stream_scan).
+        - budget: Optional ScanBudget shared by all entities (see run()).
+        All entities are evaluated against the catalog current when the stream starts.
+        Closing or cancelling the stream cancels in-flight evaluations and closes the source.
+        """
+        catalog = self.catalog
+        async for index, outcomes in self._stream_outcomes(entities, window, fact_cache, catalog, budget):
+            yield index, [self._result(catalog.compiled[rule_index].rule, passed) for rule_index, passed in outcomes]
+
+    async def run_compact(self, entities: Union[AsyncIterable[Dict[str, Any]], Iterable[Dict[str, Any]]], window: int = DEFAULT_STREAM_WINDOW, fact_cache: Optional[FactCache] = None, budget: Optional[ScanBudget] = None) -> ResultSet:
+        """
+        Evaluate a stream of entity facts into a compact ResultSet (rule index, entity index, pass bit).
+        Same streaming semantics as stream(); no per-result dicts or event serialization
+        happen until ResultSet.to_dicts() is called.
+        """
+        catalog = self.catalog
+        result_set = ResultSet(catalog)
+        async for entity_index, outcomes in self._stream_outcomes(entities, window, fact_cache, catalog, budget):
+            for rule_index, passed in outcomes:
+                result_set.append(rule_index, entity_index, passed)
+        return result_set
+
+    async def _stream_outcomes(self, entities: Union[AsyncIterable[Dict[str, Any]], Iterable[Dict[str, Any]]], window: int, fact_cache: Optional[FactCache], catalog: RuleCatalog, budget: Optional[ScanBudget] = None) -> AsyncIterator[Tuple[int, List[Tuple[int, Optional[bool]]]]]:
+        if window < 1:
+            raise ValueError("window must be at least 1.")
+        source = entities.__aiter__() if hasattr(entities, '__aiter__') else _aiter(entities)
+        in_flight: deque = deque()
+
+        async def evaluate(facts: Dict[str, Any]) -> List[Tuple[int, Optional[bool]]]:
+            if fact_cache is None:
+                return await self._outcomes(facts, catalog, budget)
+            with fact_registry.use_cache(fact_cache):
+                return await self._outcomes(facts, catalog, budget)
+
+        index = 0
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(in_flight) < window:
+                    try:
+                        facts = await source.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    in_flight.append((index, asyncio.ensure_future(evaluate(facts))))
+                    index += 1
+                if not in_flight:
+                    return
+                position, task = in_flight.popleft()
+                yield position, await task
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+            if in_flight:
+                await asyncio.gather(*(task for _, task in in_flight), return_exceptions=True)
+            if hasattr(source, 'aclose'):
+                await source.aclose()
+
+    def _profile_session(self):
+        return self.profiler.session() if self.profiler is not None else nullcontext()
+
+    def _tuning_session(self, catalog: RuleCatalog):
+        return self.tuner.session(catalog) if self.tuner is not None else nullcontext()
+
+    async def _evaluate(self, compiled: CompiledRule, facts: Dict[str, Any], memo: Dict[Any, Any]) -> bool:
+        if self.profiler is None:
+            return await compiled.evaluate(facts, memo)
+        with self.profiler.rule(compiled.rule.id):
+            return await compiled.evaluate(facts, memo)
+
+    async def _evaluate_within(self, compiled: CompiledRule, facts: Dict[str, Any], memo: Dict[Any, Any], budget: ScanBudget) -> Optional[bool]:
+        """Evaluate one rule within the budget's time limit; None (indeterminate) if it runs out of time."""
+        limit = budget.limit()
+        started = time.monotonic()
+        passed: Optional[bool] = None
+        if limit is None or not compiled.predicate.is_async():
+            # Synchronous predicates cannot be interrupted and finish without yielding
+            if limit is None or limit > 0:
+                passed = await self._evaluate(compiled, facts, memo)
+        elif limit > 0:
+            try:
+                passed = await asyncio.wait_for(self._evaluate(compiled, facts, memo), limit)
+            except asyncio.TimeoutError:
+                logging.warning(f"Rule {compiled.rule.id} timed out after {limit:.3f}s; outcome is indeterminate.")
+        budget.record(compiled.rule.framework, time.monotonic() - started, passed is None)
+        return passed
+
+    def _result(self, rule: ComplianceRule, passed: Optional[bool]) -> Dict[str, Any]:
+        return {
+            'rule_id': rule.id,
+            'name': rule.name,
+            'passed': passed,
+            'event': rule.event.dict() if passed is False else None,
+            'framework': rule.framework,
+            'severity': rule.severity
+        }
+
+    def entity_keys(self, catalog: Optional[RuleCatalog] = None) -> Set[str]:
+        """Top-level facts keys the catalog's rules read (e.g. {'user', 'device'})."""
+        catalog = catalog or self.catalog
+        return {fact.split('.')[0] for fact in catalog.fact_index}
+
+    def affected_rules(self, changed_facts: Dict[str, Any], catalog: Optional[RuleCatalog] = None) -> List[CompiledRule]:
+        """
+        Return the compiled rules (in load order) that depend on any changed fact.
+        - changed_facts: Facts dict holding only the changed values, e.g. {'user': {'mfa_enabled': True}}.
+        A fact 'user.mfa_enabled' counts as changed when changed_facts['user'] has key 'mfa_enabled'.
+        Nested dicts are changed paths too: {'device': {'os': {'version': '11'}}} changes
+        'device.os.version', the facts it contains (e.g. 'device.os.version.major') and the facts
+        containing it ('device.os').
+        """
+        catalog = catalog or self.catalog
+        paths = [path for namespace, values in changed_facts.items() if isinstance(values, dict)
+                 for path in _changed_paths(namespace, values)]
+        affected = set()
+        for path in paths:
+            # The changed path and every dotted fact containing it
+            parts = path.split('.')
+            for end in range(2, len(parts) + 1):
+                for compiled in catalog.fact_index.get('.'.join(parts[:end]), ()):
+                    affected.add(id(compiled))
+        if paths:
+            # Facts inside a changed value
+            prefixes = tuple(f"{path}." for path in paths)
+            for fact, rules in catalog.fact_index.items():
+                if fact.startswith(prefixes):
+                    affected.update(id(compiled) for compiled in rules)
+        return [compiled for compiled in catalog.compiled if id(compiled) in affected]
+
+    async def evaluate_delta(self, changed_facts: Dict[str, Any], previous_results: List[Dict[str, Any]], facts: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Re-evaluate only the active rules affected by changed facts and merge with previous results.
+        - changed_facts: Facts dict holding the changed values; nested dicts are merged key by key.
+        - previous_results: Result list from an earlier run() over the same entity.
+        - facts: Optional full facts snapshot the changes are applied on top of. Without it, every
+          fact an affected rule reads must be in changed_facts.
+        Returns the merged result list, keeping the order of previous_results.
+        Raises ValueError when facts is omitted and an affected rule reads a fact not in changed_facts.
+        """
+        affected = [compiled for compiled in self.affected_rules(changed_facts, self.catalog) if compiled.rule.is_active]
+        if facts is None:
+            for compiled in affected:
+                missing = sorted(fact for fact in compiled.facts if not _has_path(changed_facts, fact))
+                if missing:
+                    raise ValueError(f"Rule '{compiled.rule.id}' also reads {', '.join(missing)}, which changed_facts does not hold; pass the full facts snapshot.")
+        merged = _merge(facts or {}, changed_facts)
+        updated: Dict[str, Dict[str, Any]] = {}
+        memo: Dict[Any, bool] = {}
+        with self._profile_session():
+            for compiled in affected:
+                updated[compiled.rule.id] = self._result(compiled.rule, await self._evaluate(compiled, merged, memo))
+        results = [updated.pop(result['rule_id'], result) for result in previous_results]
+        results.extend(updated.values())
+        return results
+
+    def run_batch(self, columns: Union[Dict[str, Any], FactTable]) -> Dict[str, Any]:
+        """
+        Run all active rules against columnar facts for many entities at once.
+        - columns: Mapping of fact name (e.g. 'user.mfa_enabled') to a NumPy array, one element per entity,
+          or a FactTable (typed and dictionary-encoded columns, evaluated without decoding).
+        Returns a mapping of rule id to a boolean pass mask.
+        Only plain column facts are supported; fact handlers are not called. Rules reading a fact
+        without a column (e.g. endpoint rules in a batch of users) are skipped and have no mask, as are
+        rules without a vectorized form (aggregates, paths, operators such as contains on arrays);
+        evaluate those with run/stream.
+        """
+        if np is None:
+            raise RuntimeError("run_batch requires numpy to be installed.")
+        if isinstance(columns, FactTable):
+            size = columns.size
+            columns = columns.batch_columns()
+        else:
+            sizes = {len(column) for column in columns.values()}
+            if len(sizes) > 1:
+                raise ValueError("All fact columns must have the same length.")
+            size = sizes.pop() if sizes else 0
+            columns = {name: np.asarray(column) for name, column in columns.items()}
+        masks = {}
+        memo: Dict[Any, Any] = {}
+        for compiled in self.catalog.compiled:
+            if not compiled.rule.is_active or not compiled.facts <= columns.keys():
+                continue
+            try:
+                masks[compiled.rule.id] = compiled.evaluate_batch(columns, size, memo)
+            except NotImplementedError:
                 continue
-            passed = await self.evaluate_conditions(rule.conditions, facts)
-            result = {
-                'rule_id': rule.id,
-                'name': rule.name,
-                'passed': passed,
-                'event': rule.event.dict() if not passed else None,
-                'framework': rule.framework,
-                'severity': rule.severity
-            }
-            results.append(result)
-        return results 
\ No newline at end of file
+        return masks
+
+
+def _changed_paths(prefix: str, values: Dict[str, Any]) -> Iterator[str]:
+    """Dotted paths of the leaf values (non-dicts and empty dicts) of a changed facts dict."""
+    for key, value in values.items():
+        path = f"{prefix}.{key}"
+        if isinstance(value, dict) and value:
+            yield from _changed_paths(path, value)
+        else:
+            yield path
+
+def _merge(base: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of `base` with `changes` applied; nested dicts are merged recursively."""
+    merged = dict(base)
+    for key, value in changes.items():
+        current = merged.get(key)
+        merged[key] = _merge(current, value) if isinstance(current, dict) and isinstance(value, dict) else value
+    return merged
+
+def _has_path(facts: Dict[str, Any], fact: str) -> bool:
+    """Whether a dotted fact name ('device.os.version') is a path of nested dicts in facts."""
+    value: Any = facts
+    for key in fact.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return False
+        value = value[key]
+    return True
+
+async def _aiter(items: Iterable[Any]) -> AsyncIterator[Any]:
+    for item in items:
+        yield item
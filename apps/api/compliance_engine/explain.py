@@ -0,0 +1,135 @@
+import threading
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel
+from .analysis import RuleFinding
+from .catalog import RuleCatalog
+from .facts import fact_registry
+from .rule_schema import ComplianceRule
+
+# Assumed mean resolution time per fact kind until statistics have been recorded for a fact.
+UNMEASURED_FACT_SECONDS = {
+    'attribute': 0.000002,
+    'handler': 0.00002,
+    'remote': 0.05,
+    'unregistered': 0.0,
+}
+
+class FactCostModel:
+    """
+    Mean resolution time per fact, from recorded EvaluationProfiler statistics.
+    - update(fact_stats): Adopt a profiler's fact_stats() snapshot (replaces earlier snapshots per fact).
+    - cost(fact, kind): (mean seconds, sample count); falls back to UNMEASURED_FACT_SECONDS.
+    """
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, fact_stats: Dict[str, Dict[str, float]]):
+        with self._lock:
+            for fact, stats in fact_stats.items():
+                if stats.get('count'):
+                    self._stats[fact] = {'mean': stats['mean'], 'count': stats['count']}
+
+    def cost(self, fact: str, kind: str) -> Dict[str, float]:
+        with self._lock:
+            stats = self._stats.get(fact)
+        if stats is None:
+            return {'mean': UNMEASURED_FACT_SECONDS[kind], 'count': 0}
+        return dict(stats)
+
+# Process-wide model; ScanExecutor feeds it after profiled scans.
+fact_costs = FactCostModel()
+
+class FactExplanation(BaseModel):
+    """
+    A fact a rule needs.
+    - kind: 'attribute' (read from the entity), 'handler' (sync handler), 'remote' (async or
+      batched handler, e.g. a Graph call) or 'unregistered' (undotted fact without a handler).
+    - mean_seconds: Recorded (or assumed, when samples is 0) resolution time per entity.
+    """
+    fact: str
+    kind: str
+    remote: bool
+    batch_size: Optional[int] = None
+    mean_seconds: float
+    samples: int
+
+class RuleExplanation(BaseModel):
+    """
+    Explain plan and cost estimate for a rule.
+    - plan: Compiled condition tree (after parameter expansion and static folding).
+    - facts: Facts the rule needs, remote ones included.
+    - findings: Static analysis findings.
+    - entity_seconds: Estimated cost per entity: every fact resolved once, no short-circuiting.
+    - scan_seconds: entity_seconds times org_size (when an org size is given).
+    """
+    rule_id: str
+    plan: Dict[str, Any]
+    facts: List[FactExplanation]
+    findings: List[RuleFinding]
+    entity_seconds: float
+    org_size: Optional[int] = None
+    scan_seconds: Optional[float] = None
+
+def _entry(fact: str):
+    # Fact names come from request input: look them up without caching registry entries
+    try:
+        return fact_registry.entry(fact, cache=False)
+    except KeyError:
+        return None
+
+def fact_kind(fact: str) -> str:
+    entry = _entry(fact)
+    if entry is None:
+        return 'unregistered'
+    if entry.direct:
+        return 'attribute'
+    if entry.is_async or entry.batch_size is not None:
+        return 'remote'
+    return 'handler'
+
+def _plan(node: Any) -> Dict[str, Any]:
+    children = getattr(node, 'children', None)
+    if children is not None:
+        return {'mode': node.mode, 'children': [_plan(child) for child in children]}
+    source = node.source
+    plan: Dict[str, Any] = {'fact': source.fact, 'operator': source.operator, 'value': source.value}
+    if source.path:
+        plan['path'] = source.path
+    if source.params:
+        plan['params'] = source.params
+    if getattr(node, 'aggregate', None) is not None:
+        plan['aggregate'] = node.aggregate
+        if node.where is not None:
+            plan['where'] = _plan(node.where)
+    plan['remote'] = fact_kind(source.fact) == 'remote'
+    return plan
+
+def explain_rule(rule: ComplianceRule, org_size: Optional[int] = None, costs: Optional[FactCostModel] = None, parameters: Optional[Dict[str, Any]] = None) -> RuleExplanation:
+    """
+    Compile a rule the way the engine would and estimate its cost.
+    - org_size: Entities per scan, for the full-scan estimate.
+    - costs: Fact cost model (default: the process-wide fact_costs).
+    - parameters: Optional per-org parameter overrides for the rule.
+    Raises ValueError for undefined parameters and NotImplementedError for unknown operators.
+    """
+    costs = costs or fact_costs
+    catalog = RuleCatalog([rule], parameters={rule.id: parameters} if parameters else None)
+    compiled = catalog.compiled[0]
+    facts = []
+    for fact in sorted(compiled.facts):
+        kind = fact_kind(fact)
+        cost = costs.cost(fact, kind)
+        batch_size = _entry(fact).batch_size if kind == 'remote' else None
+        facts.append(FactExplanation(fact=fact, kind=kind, remote=kind == 'remote', batch_size=batch_size,
+                                     mean_seconds=cost['mean'], samples=cost['count']))
+    entity_seconds = sum(fact.mean_seconds for fact in facts)
+    return RuleExplanation(
+        rule_id=rule.id,
+        plan=_plan(compiled.predicate),
+        facts=facts,
+        findings=catalog.findings.get(rule.id, []),
+        entity_seconds=entity_seconds,
+        org_size=org_size,
+        scan_seconds=entity_seconds * org_size if org_size is not None else None,
+    )
@@ -1,30 +1,285 @@
-from typing import Callable, Dict, Any, Awaitable
+from typing import Callable, Dict, Any, Awaitable, List, Optional, Set, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
 import asyncio
+import contextvars
+import operator
+
+# Default upper bound on cached fact values per scan.
+DEFAULT_CACHE_SIZE = 100_000
+# Default max entities passed to one call of a batched fact handler.
+DEFAULT_BATCH_SIZE = 100
+
+def _freeze(value: Any) -> Any:
+    """Convert params (dicts, lists) into a hashable form for cache keys."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+class FactCache:
+    """
+    Scan-scoped memo of resolved fact values.
+    - Keyed by fact name, entity identity and params.
+    - Bounded: least recently used entries are dropped beyond max_entries.
+    - hits/misses: Counters for reporting.
+    Entities are held by reference while cached, so their ids cannot be reused for a stale hit.
+    """
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[tuple, Any]]" = OrderedDict()
+
+    def key(self, name: str, args: tuple, kwargs: dict) -> Optional[Tuple]:
+        """Build a cache key, or None if the params are not hashable."""
+        try:
+            key = (name, tuple(id(a) for a in args), _freeze(kwargs))
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def lookup(self, key: Tuple, args: tuple) -> Tuple[bool, Any]:
+        """Return (found, value) for a key built from the same args."""
+        entry = self._entries.get(key)
+        if entry is None or any(a is not b for a, b in zip(entry[0], args)):
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def store(self, key: Tuple, args: tuple, value: Any):
+        self._entries[key] = (args, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries, cancelling any async resolutions still in flight."""
+        for _, value in self._entries.values():
+            if isinstance(value, asyncio.Future) and not value.done():
+                value.cancel()
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+class FactEntry:
+    """
+    A fact handler with its dispatch flags, computed once at registration.
+    - is_async: The handler must be awaited.
+    - direct: Plain attribute fact; call the handler inline, without caching or coroutine wrapping.
+    - batch_size: Set for batched handlers (list of entities -> list of values); max entities per call.
+    """
+    __slots__ = ('handler', 'is_async', 'direct', 'batch_size', 'handler_is_async')
+
+    def __init__(self, handler: Callable[..., Any], is_async: bool, direct: bool = False, batch_size: Optional[int] = None):
+        self.handler = handler
+        self.is_async = is_async
+        self.direct = direct
+        self.batch_size = batch_size
+        self.handler_is_async = asyncio.iscoroutinefunction(handler)
+
+class _PendingBatch:
+    """Resolutions of one batched fact (and params) waiting for the next handler call."""
+    __slots__ = ('entities', 'futures', 'handle')
+
+    def __init__(self):
+        self.entities: List[Any] = []
+        self.futures: List[asyncio.Future] = []
+        self.handle: Optional[asyncio.Handle] = None
+
+def attribute_getter(name: str) -> Callable[[Any], Any]:
+    """
+    Handler for an unregistered dotted fact: 'user.mfa_enabled' reads entity['mfa_enabled'],
+    'device.os.version' reads entity['os']['version']. Missing keys yield None.
+    """
+    getters = [operator.itemgetter(key) for key in name.split('.')[1:]]
+    if len(getters) == 1:
+        get = getters[0]
+        def get_attribute(entity: Any) -> Any:
+            try:
+                return get(entity)
+            except (KeyError, IndexError, TypeError):
+                return None
+        return get_attribute
+
+    def get_nested(entity: Any) -> Any:
+        try:
+            for get in getters:
+                entity = get(entity)
+            return entity
+        except (KeyError, IndexError, TypeError):
+            return None
+    return get_nested
 
 class FactRegistry:
     """
     Registry for fact handler functions.
     - register(name, handler): Register a fact handler (sync or async).
-    - get(name): Retrieve a handler by name.
+    - register_batch(name, handler, batch_size): Register a handler that resolves many entities per call.
+    - get(name): Retrieve a registered handler by name.
+    - generation: Token replaced by every registration; compiled conditions cache dispatch flags
+      (is_async) against it.
+    - entry(name): Handler and dispatch flags; unregistered dotted facts resolve as plain attributes.
+    - is_async(name): Whether the handler must be awaited.
     - resolve(name, *args, **kwargs): Call the handler (await if async).
+    - scan_cache(): Context manager that memoizes resolve() for the duration of a scan.
+    - use_cache(cache): Context manager that activates an existing FactCache (e.g. per streamed entity).
     Extensible: Add new facts by registering new handler functions.
     """
     def __init__(self):
         self._registry: Dict[str, Callable[..., Any]] = {}
+        self._entries: Dict[str, FactEntry] = {}
+        self._batches: Dict[Tuple, _PendingBatch] = {}
+        # The event loop keeps only weak references to tasks; hold batch calls until they finish
+        self._batch_tasks: Set[asyncio.Future] = set()
+        self._cache: contextvars.ContextVar[Optional[FactCache]] = contextvars.ContextVar('fact_cache', default=None)
+        self.generation = object()
 
     def register(self, name: str, handler: Callable[..., Any]):
         self._registry[name] = handler
+        self._entries[name] = FactEntry(handler, asyncio.iscoroutinefunction(handler))
+        self.generation = object()
+
+    def register_batch(self, name: str, handler: Callable[..., Any], batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Register a batched fact handler: handler(entities, **params) -> values, one value per entity
+        in order (sync or async). Resolutions of the fact that are pending in the same event loop
+        tick (e.g. across a streamed window of entities) are grouped into calls of at most
+        `batch_size` entities, turning N remote round trips into one per chunk.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        self._registry[name] = handler
+        self._entries[name] = FactEntry(handler, True, batch_size=batch_size)
+        self.generation = object()
 
     def get(self, name: str) -> Callable[..., Any]:
         if name not in self._registry:
             raise KeyError(f"Fact handler '{name}' not found.")
         return self._registry[name]
 
+    def entry(self, name: str, cache: bool = True) -> FactEntry:
+        """
+        Return the dispatch entry for a fact. Registered handlers take precedence; a dotted
+        fact without one gets an itemgetter chain over the entity, built once and kept.
+        - cache: False to build the attribute entry without keeping it (lookups of untrusted
+          names, e.g. request input, must not grow the registry).
+        Raises KeyError for undotted unregistered names.
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            if '.' not in name:
+                raise KeyError(f"Fact handler '{name}' not found.")
+            entry = FactEntry(attribute_getter(name), False, direct=True)
+            if cache:
+                self._entries[name] = entry
+        return entry
+
+    def is_async(self, name: str) -> bool:
+        """Return True if the handler for `name` is a coroutine function."""
+        return self.entry(name).is_async
+
+    @contextmanager
+    def scan_cache(self, max_entries: int = DEFAULT_CACHE_SIZE):
+        """
+        Memoize fact resolution within the enclosed scan.
+        Each fact is computed at most once per entity and params while its entry is cached.
+        The cache is dropped when the block exits. Tasks started inside the block share it.
+        """
+        cache = FactCache(max_entries)
+        try:
+            with self.use_cache(cache):
+                yield cache
+        finally:
+            cache.clear()
+
+    @contextmanager
+    def use_cache(self, cache: Optional[FactCache]):
+        """Make `cache` the active fact cache within the block (None disables caching)."""
+        token = self._cache.set(cache)
+        try:
+            yield cache
+        finally:
+            self._cache.reset(token)
+
     async def resolve(self, name: str, *args, **kwargs) -> Any:
-        handler = self.get(name)
-        if asyncio.iscoroutinefunction(handler):
-            return await handler(*args, **kwargs)
-        return handler(*args, **kwargs)
+        entry = self.entry(name)
+        handler = entry.handler
+        if entry.direct:
+            return handler(*args, **kwargs)
+        cache = self._cache.get()
+        key = cache.key(name, args, kwargs) if cache is not None else None
+        if key is None:
+            if entry.batch_size is not None:
+                return await self._enqueue(name, entry, args, kwargs)
+            if entry.is_async:
+                return await handler(*args, **kwargs)
+            return handler(*args, **kwargs)
+        found, value = cache.lookup(key, args)
+        if not found:
+            if entry.batch_size is not None:
+                value = self._enqueue(name, entry, args, kwargs)
+            elif entry.is_async:
+                # Cache the in-flight resolution so concurrent lookups share one call
+                value = asyncio.ensure_future(handler(*args, **kwargs))
+            else:
+                value = handler(*args, **kwargs)
+            cache.store(key, args, value)
+        if isinstance(value, asyncio.Future):
+            return await asyncio.shield(value)
+        return value
+
+    def _enqueue(self, name: str, entry: FactEntry, args: tuple, kwargs: dict) -> asyncio.Future:
+        """Add one entity to the fact's pending batch; returns a future for its value."""
+        if len(args) != 1:
+            raise TypeError(f"Batched fact '{name}' takes exactly one entity.")
+        loop = asyncio.get_running_loop()
+        batch_key = (name, _freeze(kwargs), loop)
+        pending = self._batches.get(batch_key)
+        if pending is None:
+            pending = self._batches[batch_key] = _PendingBatch()
+        future = loop.create_future()
+        pending.entities.append(args[0])
+        pending.futures.append(future)
+        if len(pending.entities) >= entry.batch_size:
+            self._flush(batch_key, entry, kwargs)
+        elif pending.handle is None:
+            # Let every resolution started in this tick join the batch before calling the handler
+            pending.handle = loop.call_soon(self._flush, batch_key, entry, kwargs)
+        return future
+
+    def _flush(self, batch_key: Tuple, entry: FactEntry, kwargs: dict):
+        pending = self._batches.pop(batch_key, None)
+        if pending is None or not pending.entities:
+            return
+        if pending.handle is not None:
+            # A full batch is flushed directly; its scheduled flush must not pop the next batch early
+            pending.handle.cancel()
+        task = asyncio.ensure_future(self._call_batch(entry, pending, kwargs))
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _call_batch(self, entry: FactEntry, pending: _PendingBatch, kwargs: dict):
+        try:
+            values = entry.handler(pending.entities, **kwargs)
+            if entry.handler_is_async:
+                values = await values
+            values = list(values)
+            if len(values) != len(pending.futures):
+                raise ValueError(f"Batched fact handler returned {len(values)} values for {len(pending.futures)} entities.")
+        except Exception as e:
+            for future in pending.futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, value in zip(pending.futures, values):
+            if not future.done():
+                future.set_result(value)
 
 # Example: Register a sample fact handler
 fact_registry = FactRegistry()
@@ -36,4 +291,4 @@ async def user_mfa_enabled(user: dict) -> bool:
     """
     return user.get('mfa_enabled', False)
 
-fact_registry.register('user.mfa_enabled', user_mfa_enabled) 
\ No newline at end of file
+fact_registry.register('user.mfa_enabled', user_mfa_enabled)
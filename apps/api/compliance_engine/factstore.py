@@ -0,0 +1,331 @@
+import hashlib
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from .compiler import OPERATORS, VECTOR_OPERATORS, np
+
+def _require_numpy():
+    if np is None:
+        raise RuntimeError("FactStore requires numpy to be installed.")
+
+class Column:
+    """
+    A typed column of booleans, integers or floats.
+    - values: NumPy array (bool, int64 or float64); entries under a null are undefined.
+    - nulls: Boolean mask of missing values, or None when every value is present.
+    """
+    __slots__ = ('values', 'nulls')
+
+    def __init__(self, values: Any, nulls: Any = None):
+        self.values = values
+        self.nulls = nulls
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + (self.nulls.nbytes if self.nulls is not None else 0)
+
+    def value(self, index: int) -> Any:
+        if self.nulls is not None and self.nulls[index]:
+            return None
+        return self.values[index].item()
+
+    def tolist(self) -> List[Any]:
+        return [self.value(i) for i in range(len(self))]
+
+    def compare(self, operator: str, value: Any) -> Any:
+        """Boolean mask of operator(fact value, value); missing values compare like None does."""
+        try:
+            mask = np.asarray(VECTOR_OPERATORS[operator](self.values, value), dtype=bool)
+        except (KeyError, TypeError):
+            return _compare_each(self.tolist(), operator, value)
+        if mask.shape != self.values.shape:
+            # e.g. a list constant broadcast by equal; compare element by element instead
+            return _compare_each(self.tolist(), operator, value)
+        if self.nulls is not None:
+            mask[self.nulls] = OPERATORS[operator](None, value)
+        return mask
+
+    def truthy(self) -> Any:
+        mask = self.values != 0
+        if self.nulls is not None:
+            mask &= ~self.nulls
+        return mask
+
+    def extreme(self, kind: str, selected: Any) -> Any:
+        """min/max of the present values under `selected` (None if there are none)."""
+        if self.nulls is not None:
+            selected = selected & ~self.nulls
+        values = self.values[selected]
+        if not len(values):
+            return None
+        return (values.min() if kind == 'min' else values.max()).item()
+
+    def digest_parts(self) -> List[bytes]:
+        nulls = self.nulls.tobytes() if self.nulls is not None else b''
+        return [b'column', self.values.dtype.str.encode(), self.values.tobytes(), nulls]
+
+class DictionaryColumn:
+    """
+    A dictionary-encoded string column.
+    - codes: Smallest signed NumPy integer array indexing `dictionary`; -1 marks a missing value.
+    - dictionary: Distinct values, in first-seen order.
+    Comparisons run once per distinct value and are gathered through the codes.
+    """
+    __slots__ = ('codes', 'dictionary')
+
+    def __init__(self, codes: Any, dictionary: List[Any]):
+        self.codes = codes
+        self.dictionary = dictionary
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(len(v) for v in self.dictionary)
+
+    def value(self, index: int) -> Any:
+        code = self.codes[index]
+        return self.dictionary[code] if code >= 0 else None
+
+    def tolist(self) -> List[Any]:
+        return [self.value(i) for i in range(len(self))]
+
+    def _gather(self, results: List[bool], missing: bool) -> Any:
+        # Code -1 reads the trailing slot, which holds the result for a missing value
+        return np.array(results + [missing], dtype=bool)[self.codes]
+
+    def compare(self, operator: str, value: Any) -> Any:
+        op = OPERATORS[operator]
+        return self._gather([bool(_safe(op, v, value)) for v in self.dictionary], bool(_safe(op, None, value)))
+
+    def truthy(self) -> Any:
+        return self._gather([bool(v) for v in self.dictionary], False)
+
+    def extreme(self, kind: str, selected: Any) -> Any:
+        codes = np.unique(self.codes[selected])
+        values = [self.dictionary[code] for code in codes if code >= 0]
+        if not values:
+            return None
+        return min(values) if kind == 'min' else max(values)
+
+    def digest_parts(self) -> List[bytes]:
+        return [b'dictionary', self.codes.dtype.str.encode(), self.codes.tobytes(), json.dumps(self.dictionary).encode()]
+
+class ObjectColumn:
+    """Fallback column of arbitrary Python values (lists, dicts, mixed types); None for missing."""
+    __slots__ = ('values',)
+
+    def __init__(self, values: List[Any]):
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.values) * 8
+
+    def value(self, index: int) -> Any:
+        return self.values[index]
+
+    def tolist(self) -> List[Any]:
+        return list(self.values)
+
+    def compare(self, operator: str, value: Any) -> Any:
+        return _compare_each(self.values, operator, value)
+
+    def truthy(self) -> Any:
+        return np.fromiter((bool(v) for v in self.values), dtype=bool, count=len(self.values))
+
+    def extreme(self, kind: str, selected: Any) -> Any:
+        values = [v for v, keep in zip(self.values, selected) if keep and v is not None]
+        if not values:
+            return None
+        return min(values) if kind == 'min' else max(values)
+
+    def digest_parts(self) -> List[bytes]:
+        # TypeError for values without a JSON form; callers treat the table as unhashable
+        return [b'object', json.dumps(self.values, sort_keys=True).encode()]
+
+def _safe(op: Any, fact_value: Any, value: Any) -> bool:
+    try:
+        return op(fact_value, value)
+    except TypeError:
+        return False
+
+def _compare_each(values: List[Any], operator: str, value: Any) -> Any:
+    op = OPERATORS[operator]
+    return np.fromiter((bool(_safe(op, v, value)) for v in values), dtype=bool, count=len(values))
+
+def _code_dtype(size: int) -> Any:
+    for dtype in (np.int8, np.int16, np.int32):
+        if size <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def build_column(values: List[Any]):
+    """Column for a list of Python values, typed by the non-missing values."""
+    _require_numpy()
+    present = [v for v in values if v is not None]
+    kinds = {type(v) for v in present}
+    if kinds and kinds <= {str}:
+        index: Dict[str, int] = {}
+        codes = [-1 if v is None else index.setdefault(v, len(index)) for v in values]
+        return DictionaryColumn(np.array(codes, dtype=_code_dtype(len(index))), list(index))
+    if kinds <= {bool}:
+        dtype: Any = bool
+    elif kinds <= {int}:
+        dtype = np.int64
+    elif kinds <= {int, float}:
+        dtype = np.float64
+    else:
+        return ObjectColumn(values)
+    nulls = None
+    if len(present) < len(values):
+        nulls = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+        fill = dtype(0)
+        values = [fill if v is None else v for v in values]
+    try:
+        return Column(np.array(values, dtype=dtype), nulls)
+    except OverflowError:
+        # Integers beyond int64
+        return ObjectColumn([None if nulls is not None and nulls[i] else v for i, v in enumerate(values)])
+
+class FactTable:
+    """
+    One entity kind (e.g. 'user') of a tenant's inventory, stored column by column.
+    - entity_key: Top-level facts key of the entities (facts['user']).
+    - size: Number of entities (rows).
+    - columns: Attribute name -> column; column 'mfa_enabled' holds fact 'user.mfa_enabled'.
+    Booleans take one byte per entity, numbers eight, strings a 1-4 byte dictionary code;
+    a null mask is only kept for columns with missing values.
+    """
+    __slots__ = ('entity_key', 'size', 'columns')
+
+    def __init__(self, entity_key: str, size: int, columns: Dict[str, Any]):
+        self.entity_key = entity_key
+        self.size = size
+        self.columns = columns
+
+    @classmethod
+    def from_entities(cls, entity_key: str, entities: Iterable[Dict[str, Any]]) -> 'FactTable':
+        """Build from entity dicts (e.g. Graph users after ingestion); missing attributes become nulls."""
+        rows = list(entities)
+        names: Dict[str, None] = {}
+        for row in rows:
+            names.update(dict.fromkeys(row))
+        columns = {name: build_column([row.get(name) for row in rows]) for name in names}
+        return cls(entity_key, len(rows), columns)
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    def digest(self) -> str:
+        """
+        SHA-256 of the table's contents (entity key, size, column names, types and values).
+        Equal digests mean equal contents; the same rows encoded differently may digest differently.
+        Raises TypeError when an object column holds values without a JSON form.
+        """
+        digest = hashlib.sha256(f"{self.entity_key}\0{self.size}".encode())
+        for name in sorted(self.columns):
+            digest.update(f"\0{name}".encode())
+            for part in self.columns[name].digest_parts():
+                digest.update(len(part).to_bytes(8, 'little'))
+                digest.update(part)
+        return digest.hexdigest()
+
+    def column(self, fact: str):
+        """Column for a fact name ('user.mfa_enabled') or attribute name; KeyError if absent."""
+        prefix = f"{self.entity_key}."
+        return self.columns[fact[len(prefix):] if fact.startswith(prefix) else fact]
+
+    def batch_columns(self) -> Dict[str, Any]:
+        """Fact name -> column, the form RuleEngine.run_batch evaluates."""
+        return {f"{self.entity_key}.{name}": column for name, column in self.columns.items()}
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Decoded entity dict for one row (missing attributes are omitted)."""
+        row = {}
+        for name, column in self.columns.items():
+            value = column.value(index)
+            if value is not None:
+                row[name] = value
+        return row
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        for index in range(self.size):
+            yield self.row(index)
+
+    def entities(self) -> Iterator[Dict[str, Any]]:
+        """Per-entity facts dicts ({entity_key: row}) for RuleEngine.run/stream/run_compact."""
+        for row in self.rows():
+            yield {self.entity_key: row}
+
+    def mask(self, fact: str, operator: str, value: Any) -> Any:
+        """Boolean mask of the entities whose fact satisfies operator/value."""
+        if operator not in OPERATORS:
+            raise NotImplementedError(f"Operator {operator} not implemented.")
+        return self.column(fact).compare(operator, value)
+
+    def aggregate(self, aggregate: str, fact: str, where: Any = None) -> Any:
+        """
+        Aggregate a fact over the table, with the semantics of RuleCondition.aggregate.
+        - where: Optional boolean mask of matching entities (see mask()); without it,
+          count/ratio/exists/forAll count entities whose fact value is truthy.
+        """
+        column = self.column(fact)
+        if aggregate in ('min', 'max'):
+            selected = where if where is not None else np.ones(self.size, dtype=bool)
+            return column.extreme(aggregate, selected)
+        hits = where if where is not None else column.truthy()
+        if aggregate == 'count':
+            return int(hits.sum())
+        if aggregate == 'ratio':
+            return int(hits.sum()) / self.size if self.size else None
+        if aggregate == 'exists':
+            return bool(hits.any())
+        if aggregate == 'forAll':
+            return bool(hits.all())
+        raise NotImplementedError(f"Aggregate {aggregate} not implemented.")
+
+class FactStore:
+    """
+    Columnar fact store for a tenant's entity inventory: one FactTable per entity kind.
+    - Built from ingestion output ({'user': [...], 'device': [...]}) with from_facts.
+    - facts(): Tables keyed by entity key, for RuleEngine.run of aggregate-only catalogs;
+      aggregate conditions over a table are computed on its columns. Per-entity conditions on a
+      table raise TypeError: evaluate those with run_batch or table(key).entities().
+    - table(key) feeds RuleEngine.run_batch directly, and table(key).entities() feeds
+      stream/run_compact for per-entity results.
+    """
+    def __init__(self, tables: Optional[Dict[str, FactTable]] = None):
+        _require_numpy()
+        self.tables: Dict[str, FactTable] = dict(tables or {})
+
+    @classmethod
+    def from_facts(cls, facts: Dict[str, Any]) -> 'FactStore':
+        """Build from canonical facts: each list of entity dicts (or single dict) becomes a table."""
+        tables = {}
+        for entity_key, entities in facts.items():
+            if isinstance(entities, dict):
+                entities = [entities]
+            if isinstance(entities, (list, tuple)) and all(isinstance(e, dict) for e in entities):
+                tables[entity_key] = FactTable.from_entities(entity_key, entities)
+        return cls(tables)
+
+    def table(self, entity_key: str) -> FactTable:
+        return self.tables[entity_key]
+
+    def facts(self) -> Dict[str, FactTable]:
+        return dict(self.tables)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(table.nbytes for table in self.tables.values())
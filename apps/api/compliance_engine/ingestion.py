@@ -1,5 +1,6 @@
 import logging
 from typing import Any, Dict, Optional, Callable, List
+from .factstore import FactStore
 
 class DataIngestionPipeline:
     """
@@ -65,6 +66,16 @@ class DataIngestionPipeline:
         facts = self.preprocess(data)
         return facts
 
+    def ingest_fact_store(self, source: str, **kwargs) -> Optional[FactStore]:
+        """
+        Full ingestion pipeline into a columnar FactStore (one table per entity list in the facts).
+        Returns None if validation fails. Requires numpy.
+        """
+        facts = self.ingest(source, **kwargs)
+        if facts is None:
+            return None
+        return FactStore.from_facts(facts)
+
 def ai_risk_preprocessing_transformer(data: dict) -> dict:
     # Fill missing fields with defaults
     data = dict(data)  # Defensive copy
@@ -0,0 +1,126 @@
+import asyncio
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+class HashIndex:
+    """
+    Hash index over entity dicts: key value -> entities, built in one pass.
+    - key: Function returning the key values of an entity (an entity may have several, e.g. member ids).
+    Entities without a key value are not indexed.
+    """
+    __slots__ = ('_buckets',)
+
+    def __init__(self, entities: Iterable[Dict[str, Any]], key: Callable[[Dict[str, Any]], Iterable[Any]]):
+        self._buckets: Dict[Any, List[Dict[str, Any]]] = {}
+        for entity in entities:
+            for value in key(entity):
+                if value is not None:
+                    self._buckets.setdefault(value, []).append(entity)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def get(self, value: Any) -> List[Dict[str, Any]]:
+        return self._buckets.get(value, []) if value is not None else []
+
+def _field(name: str) -> Callable[[Dict[str, Any]], Tuple[Any]]:
+    return lambda entity: (entity.get(name),)
+
+def _unique(entities: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    seen: Set[int] = set()
+    unique = []
+    for entity in entities:
+        if id(entity) not in seen:
+            seen.add(id(entity))
+            unique.append(entity)
+    return unique
+
+class JoinIndexes:
+    """
+    Hash indexes over a tenant's ingested users, groups and devices, for cross-entity rules.
+    - Users and groups are keyed by 'id'; group membership comes from groups' 'member_ids'
+      and device ownership from devices' 'user_id' (see ms_api list functions).
+    - entities(entity_key, keys): Facts dicts for each user, group or device with its related
+      entities attached as lists under their entity keys, e.g. for a user
+      {'user': user, 'group': [its groups], 'device': [its devices]}.
+    Rules reach related entities through aggregate conditions over those lists, e.g. a user rule
+    "member of group X and owns a non-compliant device":
+        {"fact": "group.id", "aggregate": "exists", "operator": "equal", "value": true,
+         "where": {"all": [{"fact": "group.id", "operator": "equal", "value": "X"}]}}
+        {"fact": "device.compliance_state", "aggregate": "exists", "operator": "equal", "value": true,
+         "where": {"all": [{"fact": "device.compliance_state", "operator": "notEqual", "value": "compliant"}]}}
+    Every lookup is a hash probe, so a scan is linear in the tenant size instead of a nested loop.
+    """
+    # (scanned entity key, related entity key) -> method returning the related entities
+    RELATIONS = {
+        ('user', 'group'): 'groups_of_user',
+        ('user', 'device'): 'devices_of_user',
+        ('group', 'user'): 'members_of_group',
+        ('group', 'device'): 'devices_of_group',
+        ('device', 'user'): 'owner_of_device',
+        ('device', 'group'): 'groups_of_device',
+    }
+
+    def __init__(self, users: List[Dict[str, Any]], groups: List[Dict[str, Any]], devices: List[Dict[str, Any]]):
+        self.users = users
+        self.groups = groups
+        self.devices = devices
+        self.users_by_id = HashIndex(users, _field('id'))
+        self.groups_by_member = HashIndex(groups, lambda group: group.get('member_ids') or ())
+        self.devices_by_user = HashIndex(devices, _field('user_id'))
+
+    @classmethod
+    async def load(cls, org_id: str) -> 'JoinIndexes':
+        """Fetch users, groups (with members) and Intune devices from Microsoft Graph and index them."""
+        from ..ms_api import list_intune_devices, list_ms_groups, list_ms_users
+        users, groups, devices = await asyncio.gather(
+            list_ms_users(org_id), list_ms_groups(org_id, include_members=True), list_intune_devices(org_id))
+        return cls(users, groups, devices)
+
+    def collection(self, entity_key: str) -> List[Dict[str, Any]]:
+        if entity_key == 'user':
+            return self.users
+        if entity_key == 'group':
+            return self.groups
+        if entity_key == 'device':
+            return self.devices
+        raise KeyError(f"No entity collection '{entity_key}'.")
+
+    def groups_of_user(self, user: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.groups_by_member.get(user.get('id'))
+
+    def devices_of_user(self, user: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.devices_by_user.get(user.get('id'))
+
+    def members_of_group(self, group: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Members that are not users (nested groups, service principals) are skipped
+        return _unique(user for member_id in group.get('member_ids') or () for user in self.users_by_id.get(member_id))
+
+    def devices_of_group(self, group: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return _unique(device for member_id in group.get('member_ids') or () for device in self.devices_by_user.get(member_id))
+
+    def owner_of_device(self, device: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.users_by_id.get(device.get('user_id'))
+
+    def groups_of_device(self, device: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return self.groups_by_member.get(device.get('user_id'))
+
+    def related(self, entity_key: str, related_key: str, entity: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Entities of kind `related_key` related to `entity` (of kind `entity_key`), via the indexes."""
+        relation = self.RELATIONS.get((entity_key, related_key))
+        if relation is None:
+            raise KeyError(f"No join from '{entity_key}' to '{related_key}'.")
+        return getattr(self, relation)(entity)
+
+    def entities(self, entity_key: str, keys: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Facts dicts for each entity of kind `entity_key`, with related entities attached.
+        - keys: Entity keys the rules reference (e.g. RuleEngine.entity_keys()); only these
+          relations are joined. Default: every relation of the entity kind.
+        """
+        related_keys = [related for scanned, related in self.RELATIONS if scanned == entity_key
+                        and (keys is None or related in keys)]
+        for entity in self.collection(entity_key):
+            facts = {entity_key: entity}
+            for related_key in related_keys:
+                facts[related_key] = self.related(entity_key, related_key, entity)
+            yield facts
@@ -0,0 +1,98 @@
+import re
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
+
+# One path step: .name, .*, [index], [*], ['name'] or ["name"].
+_STEP = re.compile(r"""\.([A-Za-z_@$][\w@$-]*)|\.(\*)|\[(-?\d+)\]|\[(\*)\]|\['([^']*)'\]|\["([^"]*)"\]""")
+
+_MISSING = object()
+
+def parse_path(path: str) -> List[Tuple[str, Any]]:
+    """
+    Split a JSONPath-style path into (kind, arg) steps: ('key', name), ('index', n) or ('wildcard', None).
+    Supports an optional leading '$', dotted keys, quoted keys, array indexes and '*' wildcards.
+    Raises ValueError for unsupported syntax.
+    """
+    text = path.strip()
+    if text.startswith('$'):
+        text = text[1:]
+    if text and text[0] not in '.[':
+        text = '.' + text
+    steps: List[Tuple[str, Any]] = []
+    position = 0
+    while position < len(text):
+        match = _STEP.match(text, position)
+        if match is None:
+            raise ValueError(f"Invalid path '{path}' at position {position}.")
+        name, star, index, bracket_star, single, double = match.groups()
+        if star or bracket_star:
+            steps.append(('wildcard', None))
+        elif index is not None:
+            steps.append(('index', int(index)))
+        else:
+            steps.append(('key', next(v for v in (name, single, double) if v is not None)))
+        position = match.end()
+    return steps
+
+def _getter(kind: str, arg: Any) -> Callable[[Any], Any]:
+    if kind == 'key':
+        def get_key(value: Any) -> Any:
+            if isinstance(value, dict):
+                return value.get(arg, _MISSING)
+            return getattr(value, arg, _MISSING)
+        return get_key
+
+    def get_index(value: Any) -> Any:
+        if isinstance(value, (list, tuple)) and -len(value) <= arg < len(value):
+            return value[arg]
+        return _MISSING
+    return get_index
+
+def _children(value: Any) -> List[Any]:
+    if isinstance(value, dict):
+        return list(value.values())
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return []
+
+class PathAccessor:
+    """
+    A path compiled into a chain of item/attribute getters.
+    - Without wildcards it returns the value at the path, or None if any step is missing.
+    - With wildcards it returns the list of all matched values (missing branches are dropped).
+    Keys read dict items, falling back to attributes for other objects.
+    Pickles as its path string, so compiled rules holding accessors can be bundled.
+    """
+    __slots__ = ('path', 'getters', 'wildcard')
+
+    def __init__(self, path: str):
+        self.path = path
+        self.getters = [None if kind == 'wildcard' else _getter(kind, arg) for kind, arg in parse_path(path)]
+        self.wildcard = None in self.getters
+
+    def __call__(self, value: Any) -> Any:
+        if not self.wildcard:
+            for get in self.getters:
+                value = get(value)
+                if value is _MISSING:
+                    return None
+            return value
+        current = [value]
+        for get in self.getters:
+            if get is None:
+                current = [child for v in current for child in _children(v)]
+            else:
+                current = [found for found in map(get, current) if found is not _MISSING]
+        return current
+
+    def __reduce__(self):
+        return compile_path, (self.path,)
+
+@lru_cache(maxsize=1024)
+def compile_path(path: str) -> PathAccessor:
+    """Compile a path into an accessor, once per distinct path. Raises ValueError for invalid paths."""
+    return PathAccessor(path)
+
+def path_accessor(path: Optional[str]) -> Optional[PathAccessor]:
+    """Compiled accessor for an optional RuleCondition.path (None when there is no path)."""
+    return compile_path(path) if path else None
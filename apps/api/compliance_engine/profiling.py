@@ -0,0 +1,138 @@
+import bisect
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Histogram bucket upper bounds, in seconds (last bucket is unbounded).
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_active: contextvars.ContextVar[Optional['EvaluationProfiler']] = contextvars.ContextVar('active_profiler', default=None)
+_current_rule: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('profiled_rule', default=None)
+_trace: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar('evaluation_trace', default=None)
+
+def active_profiler() -> Optional['EvaluationProfiler']:
+    """Profiler of the evaluation running in the current context, if any."""
+    return _active.get()
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram.
+    - observe(seconds): Record a duration.
+    - snapshot(): count, total, mean, max and bucket-estimated p50/p95 (seconds).
+    """
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (max for the last bucket)."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+        }
+
+class EvaluationProfiler:
+    """
+    Opt-in instrumentation for RuleEngine evaluation.
+    - Per-rule and per-fact wall time histograms (call counts included).
+    - Per-rule short-circuit rate: share of condition-group evaluations decided early
+      by a decisive child.
+    - trace_sample_rate: Fraction of runs (entities) whose full evaluation trace is logged.
+    Attach with RuleEngine(profiler=...) or ScanExecutor(profiler=...).
+    """
+    def __init__(self, trace_sample_rate: float = 0.0, logger: Optional[logging.Logger] = None):
+        self.trace_sample_rate = trace_sample_rate
+        self.logger = logger or logging.getLogger(__name__)
+        self.reset()
+
+    def reset(self):
+        self.rule_times: Dict[str, Histogram] = {}
+        self.fact_times: Dict[str, Histogram] = {}
+        self.group_evaluations: Dict[Optional[str], int] = {}
+        self.short_circuits: Dict[Optional[str], int] = {}
+
+    @contextmanager
+    def session(self):
+        """Profile one engine run; logs its evaluation trace if the run is sampled."""
+        trace = [] if self.trace_sample_rate and random.random() < self.trace_sample_rate else None
+        active_token = _active.set(self)
+        trace_token = _trace.set(trace)
+        try:
+            yield
+        finally:
+            _trace.reset(trace_token)
+            _active.reset(active_token)
+            if trace is not None:
+                self.logger.info(f"Evaluation trace: {trace}")
+
+    @contextmanager
+    def rule(self, rule_id: str):
+        """Time the evaluation of one rule and attribute nested records to it."""
+        token = _current_rule.set(rule_id)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_rule.reset(token)
+            self.rule_times.setdefault(rule_id, Histogram()).observe(elapsed)
+            trace = _trace.get()
+            if trace is not None:
+                trace.append({'rule': rule_id, 'seconds': elapsed})
+
+    def record_fact(self, fact: str, seconds: float, value: Any, passed: Any):
+        self.fact_times.setdefault(fact, Histogram()).observe(seconds)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append({'rule': _current_rule.get(), 'fact': fact, 'value': value, 'passed': bool(passed), 'seconds': seconds})
+
+    def record_group(self, short_circuited: bool):
+        rule_id = _current_rule.get()
+        self.group_evaluations[rule_id] = self.group_evaluations.get(rule_id, 0) + 1
+        if short_circuited:
+            self.short_circuits[rule_id] = self.short_circuits.get(rule_id, 0) + 1
+
+    def rule_stats(self, rule_id: str) -> Dict[str, Any]:
+        """Timing snapshot and short-circuit rate for one rule."""
+        stats: Dict[str, Any] = {'rule_id': rule_id, **self.rule_times.get(rule_id, Histogram()).snapshot()}
+        groups = self.group_evaluations.get(rule_id, 0)
+        stats['short_circuit_rate'] = self.short_circuits.get(rule_id, 0) / groups if groups else 0.0
+        return stats
+
+    def fact_stats(self) -> Dict[str, Dict[str, float]]:
+        return {fact: histogram.snapshot() for fact, histogram in self.fact_times.items()}
+
+    def slowest_rules(self, n: int = 10) -> List[Dict[str, Any]]:
+        """Top `n` rules by mean evaluation time."""
+        stats = [self.rule_stats(rule_id) for rule_id in self.rule_times]
+        stats.sort(key=lambda s: s['mean'], reverse=True)
+        return stats[:n]
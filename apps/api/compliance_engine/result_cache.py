@@ -0,0 +1,171 @@
+import datetime
+import decimal
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+from .catalog import RuleCatalog
+from .facts import fact_registry
+from .factstore import FactTable
+from .templates import rule_parameters
+
+# Default upper bound on cached outcomes kept on disk.
+DEFAULT_RESULT_CACHE_SIZE = 1_000_000
+# Buffered writes are flushed to disk once this many are pending.
+FLUSH_THRESHOLD = 1000
+
+def _content(value: Any) -> Any:
+    """JSON form of a value json cannot encode, derived from its contents; TypeError for anything else."""
+    if isinstance(value, FactTable):
+        return value.digest()
+    if isinstance(value, (datetime.date, datetime.time, decimal.Decimal, uuid.UUID)):
+        return str(value)
+    # e.g. an object whose str() is its address, which a later object may reuse
+    raise TypeError(f"{type(value).__name__} has no content digest.")
+
+def _digest(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=_content).encode()).hexdigest()
+
+class ResultCache:
+    """
+    Persistent (SQLite) cache of rule outcomes across scans.
+    - Keyed by rule id, rule version and a hash of the entity facts the rule reads, so unchanged
+      entities skip evaluation. Attribute facts hash only the attribute they read (changing an
+      unrelated attribute keeps the key); facts with handlers and aggregates over collections hash
+      the whole facts[entity_key] section, since they may read any of it.
+    - FactTable sections are hashed by their contents (FactTable.digest). Rules reading a section
+      that has no content digest (arbitrary objects) are not cached.
+    - Rule changes invalidate entries: the key includes the version and a digest of the conditions
+      and effective parameters (per-org overrides included).
+    - Bounded: least recently used entries are evicted beyond max_entries on flush.
+    - hits/misses: Counters for reporting.
+    Only valid for fact handlers that are pure functions of the entity facts; do not attach it
+    when handlers read live external state.
+    """
+    def __init__(self, path: str, max_entries: int = DEFAULT_RESULT_CACHE_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS outcomes (key TEXT PRIMARY KEY, passed INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_outcomes_last_used ON outcomes(last_used)")
+        self._conn.commit()
+        self._pending: Dict[str, Tuple[int, float]] = {}
+        self._touched: Dict[str, float] = {}
+        self._catalog: Optional[RuleCatalog] = None
+        self._rule_keys: List[Tuple[str, Tuple[str, ...]]] = []
+
+    def keys(self, catalog: RuleCatalog, facts: Dict[str, Any]) -> List[Optional[str]]:
+        """Cache key per catalog rule for one entity (None for inactive or uncacheable rules)."""
+        if catalog is not self._catalog:
+            self._rule_keys = [self._rule_key(compiled, catalog.parameters.get(compiled.rule.id)) for compiled in catalog.compiled]
+            self._catalog = catalog
+        # Each fact (or entity section) is hashed once and shared by every rule that reads it
+        hashes: Dict[str, Optional[str]] = {}
+        keys: List[Optional[str]] = []
+        for compiled, (prefix, rule_facts) in zip(catalog.compiled, self._rule_keys):
+            if not compiled.rule.is_active:
+                keys.append(None)
+                continue
+            parts = [prefix]
+            for fact in rule_facts:
+                if fact not in hashes:
+                    hashes[fact] = self._fact_hash(fact, facts, hashes)
+                parts.append(hashes[fact])
+            if None in parts:
+                keys.append(None)
+                continue
+            keys.append(hashlib.sha256('\0'.join(parts).encode()).hexdigest())
+        return keys
+
+    def _fact_hash(self, fact: str, facts: Dict[str, Any], hashes: Dict[str, Optional[str]]) -> Optional[str]:
+        entity_key = fact.split('.')[0]
+        section = facts.get(entity_key, {})
+        try:
+            entry = fact_registry.entry(fact)
+        except KeyError:
+            entry = None
+        if entry is not None and entry.direct and isinstance(section, dict):
+            try:
+                return _digest(entry.handler(section))
+            except TypeError:
+                return None
+        # Handlers may read any attribute: hash the whole section, once per entity key
+        section_key = f"{entity_key}\0"
+        if section_key not in hashes:
+            try:
+                hashes[section_key] = _digest(section)
+            except TypeError:
+                hashes[section_key] = None
+        return hashes[section_key]
+
+    def _rule_key(self, compiled, overrides: Optional[Dict[str, Any]]) -> Tuple[str, Tuple[str, ...]]:
+        rule = compiled.rule
+        conditions = _digest([rule.dict()['conditions'], rule_parameters(rule, overrides)])
+        return f"{rule.id}\0{rule.version}\0{conditions}", tuple(sorted(compiled.facts))
+
+    def get_many(self, keys: List[Optional[str]]) -> Dict[str, bool]:
+        """Cached outcomes for the given keys (missing keys are absent)."""
+        wanted = [key for key in keys if key is not None]
+        found: Dict[str, bool] = {}
+        now = time.time()
+        with self._lock:
+            for key in wanted:
+                if key in self._pending:
+                    found[key] = bool(self._pending[key][0])
+            remaining = [key for key in wanted if key not in found]
+            # Stay below SQLite's host parameter limit
+            for start in range(0, len(remaining), 500):
+                chunk = remaining[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                for key, passed in self._conn.execute(f"SELECT key, passed FROM outcomes WHERE key IN ({placeholders})", chunk):
+                    found[key] = bool(passed)
+                    self._touched[key] = now
+            self.hits += len(found)
+            self.misses += len(wanted) - len(found)
+        return found
+
+    def put(self, key: str, passed: bool):
+        with self._lock:
+            self._pending[key] = (1 if passed else 0, time.time())
+            pending = len(self._pending)
+        if pending >= FLUSH_THRESHOLD:
+            self.flush()
+
+    def flush(self):
+        """Write buffered outcomes and access times, then evict beyond max_entries."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            touched, self._touched = self._touched, {}
+            with self._conn:
+                self._conn.executemany("UPDATE outcomes SET last_used = ? WHERE key = ?",
+                                       [(used, key) for key, used in touched.items()])
+                self._conn.executemany("INSERT OR REPLACE INTO outcomes (key, passed, last_used) VALUES (?, ?, ?)",
+                                       [(key, passed, used) for key, (passed, used) in pending.items()])
+                excess = self._conn.execute("SELECT COUNT(*) FROM outcomes").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._conn.execute("DELETE FROM outcomes WHERE key IN (SELECT key FROM outcomes ORDER BY last_used LIMIT ?)", (excess,))
+
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+            self._touched.clear()
+            with self._conn:
+                self._conn.execute("DELETE FROM outcomes")
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM outcomes").fetchone()[0]
+            return stored + len(self._pending)
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self)}
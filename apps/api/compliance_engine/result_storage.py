@@ -2,6 +2,7 @@ from apps.api import supabase_client
 from typing import Any, Dict, Optional
 import datetime
 from apps.api.compliance_engine.remediation import create_remediation_action, RemediationAction
+from apps.api.compliance_engine.bitmaps import FailureBitmaps, ScanDiff, encode
 
 async def store_scan_result(org_id: str, scan_id: str, user_id: str, finding: str, severity: str, compliance_framework: str, details: Optional[dict] = None, passed: Optional[bool] = None):
     """
@@ -34,4 +35,42 @@ async def store_scan_result(org_id: str, scan_id: str, user_id: str, finding: st
         return result
     except Exception as e:
         # TODO: Add retry logic or error logging as needed
-        raise e 
\ No newline at end of file
+        raise e
+
+
+async def store_failure_bitmaps(org_id: str, scan_id: str, bitmaps: FailureBitmaps):
+    """
+    Store a scan's per-rule failure bitmaps in the scan's metadata (key 'failure_bitmaps', and
+    'indeterminate_bitmaps' for timed-out outcomes). Other metadata keys are preserved.
+    """
+    scan = supabase_client.get_scan(org_id, scan_id)
+    if 'error' in scan:
+        raise ValueError(f"Scan {scan_id} not found.")
+    metadata = dict(scan['data'].get('metadata') or {})
+    metadata['failure_bitmaps'] = bitmaps.to_dict()
+    metadata['indeterminate_bitmaps'] = encode(bitmaps.indeterminate)
+    return supabase_client.update_scan_metadata(org_id, scan_id, metadata)
+
+
+async def get_failure_bitmaps(org_id: str, scan_id: str) -> Optional[FailureBitmaps]:
+    """Load a scan's failure bitmaps, or None if the scan has none stored."""
+    scan = supabase_client.get_scan(org_id, scan_id)
+    if 'error' in scan:
+        return None
+    metadata = scan['data'].get('metadata') or {}
+    stored = metadata.get('failure_bitmaps')
+    if stored is None:
+        return None
+    return FailureBitmaps.from_dict(stored, metadata.get('indeterminate_bitmaps'))
+
+
+async def diff_scans(org_id: str, previous_scan_id: str, scan_id: str) -> Optional[ScanDiff]:
+    """
+    Compare two scans of the same tenant by their failure bitmaps.
+    Returns None if either scan has no stored bitmaps; callers then fall back to get_results_for_scan.
+    """
+    previous = await get_failure_bitmaps(org_id, previous_scan_id)
+    current = await get_failure_bitmaps(org_id, scan_id)
+    if previous is None or current is None:
+        return None
+    return ScanDiff(previous, current)
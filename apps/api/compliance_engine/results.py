@@ -0,0 +1,99 @@
+from array import array
+from typing import Any, Dict, Iterator, List, Optional
+from .catalog import RuleCatalog
+
+# Stored pass byte for an indeterminate outcome (rule timed out, see deadlines.ScanBudget).
+INDETERMINATE = 2
+
+class ResultRecord:
+    """
+    One rule outcome for one entity.
+    - rule_index: Position of the rule in the catalog that produced the result.
+    - entity_index: Position of the entity in the scanned stream.
+    - passed: Whether the rule passed (None if the outcome is indeterminate).
+    """
+    __slots__ = ('rule_index', 'entity_index', 'passed')
+
+    def __init__(self, rule_index: int, entity_index: int, passed: Optional[bool]):
+        self.rule_index = rule_index
+        self.entity_index = entity_index
+        self.passed = passed
+
+    def __eq__(self, other: Any) -> bool:
+        return (isinstance(other, ResultRecord)
+                and (self.rule_index, self.entity_index, self.passed) == (other.rule_index, other.entity_index, other.passed))
+
+    def __repr__(self) -> str:
+        return f"ResultRecord(rule_index={self.rule_index}, entity_index={self.entity_index}, passed={self.passed})"
+
+class ResultSet:
+    """
+    Compact, array-backed scan results: a rule index, entity index and pass byte per result
+    (9 bytes per result instead of a dict with a serialized event). The pass byte is 0 (failed),
+    1 (passed) or INDETERMINATE.
+    Rule metadata and events are referenced through the catalog and only expanded
+    into result dicts by to_dicts(), with each rule's event serialized once.
+    """
+    def __init__(self, catalog: RuleCatalog):
+        self.catalog = catalog
+        self.rule_indexes = array('I')
+        self.entity_indexes = array('I')
+        self.passed = bytearray()
+
+    def append(self, rule_index: int, entity_index: int, passed: Optional[bool]):
+        self.rule_indexes.append(rule_index)
+        self.entity_indexes.append(entity_index)
+        self.passed.append(INDETERMINATE if passed is None else 1 if passed else 0)
+
+    def __len__(self) -> int:
+        return len(self.passed)
+
+    def __iter__(self) -> Iterator[ResultRecord]:
+        for rule_index, entity_index, passed in zip(self.rule_indexes, self.entity_indexes, self.passed):
+            yield ResultRecord(rule_index, entity_index, None if passed == INDETERMINATE else bool(passed))
+
+    def failures(self) -> Iterator[ResultRecord]:
+        return (record for record in self if record.passed is False)
+
+    def indeterminate(self) -> Iterator[ResultRecord]:
+        return (record for record in self if record.passed is None)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate payload size of the stored results."""
+        return (len(self.rule_indexes) * self.rule_indexes.itemsize
+                + len(self.entity_indexes) * self.entity_indexes.itemsize
+                + len(self.passed))
+
+    def rule(self, rule_index: int):
+        return self.catalog.compiled[rule_index].rule
+
+    def to_dicts(self, entity_index: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Expand into the result dicts returned by RuleEngine.run.
+        - entity_index: Only that entity's results (same shape as run()); otherwise all results,
+          each with an added 'entity_index' key.
+        """
+        events: Dict[int, Dict[str, Any]] = {}
+        expanded = []
+        for record in self:
+            if entity_index is not None and record.entity_index != entity_index:
+                continue
+            rule = self.rule(record.rule_index)
+            event = None
+            if record.passed is False:
+                if record.rule_index not in events:
+                    events[record.rule_index] = rule.event.dict()
+                event = dict(events[record.rule_index])
+            result = {
+                'rule_id': rule.id,
+                'name': rule.name,
+                'passed': record.passed,
+                'event': event,
+                'framework': rule.framework,
+                'severity': rule.severity
+            }
+            if entity_index is None:
+                result['entity_index'] = record.entity_index
+            expanded.append(result)
+        return expanded
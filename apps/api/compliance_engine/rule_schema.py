@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Any, Dict, List, Optional, Union
+from typing_extensions import TypeAliasType
 from datetime import datetime
 
 class RuleCondition(BaseModel):
@@ -10,12 +11,24 @@ class RuleCondition(BaseModel):
     - value: The value to compare the fact against.
     - path: Optional JSONPath for nested data.
     - params: Optional parameters for dynamic fact evaluation.
+    - aggregate: Optional collection operator ('count', 'ratio', 'exists', 'forAll', 'min', 'max').
+      The collection is the list at facts[<entity key>]; the aggregate is compared using operator/value.
+    - where: Optional per-item condition tree. For count/ratio/exists/forAll it is the item
+      predicate (default: the item's fact value is truthy); for min/max it filters the items.
     """
     fact: str
     operator: str
     value: Any
     path: Optional[str] = None
     params: Optional[Dict[str, Any]] = None
+    aggregate: Optional[str] = None
+    where: Optional[Dict[str, List['ConditionNode']]] = None
+
+# A condition list entry: a single condition or a nested {'all'|'any'|'not': [...]} group.
+ConditionNode = TypeAliasType(
+    'ConditionNode', Union[RuleCondition, Dict[str, List['ConditionNode']]]
+)
+RuleCondition.model_rebuild()
 
 class RuleEvent(BaseModel):
     """
@@ -34,7 +47,7 @@ class ComplianceRule(BaseModel):
     - description: Rule description.
     - framework: Compliance framework (e.g., 'NIST', 'ISO27001').
     - severity: Severity level ('low', 'medium', 'high', 'critical').
-    - conditions: Dict with 'all', 'any', or 'not' keys and lists of RuleCondition.
+    - conditions: Dict with 'all', 'any', or 'not' keys and lists of RuleCondition or nested groups.
     - event: Event to trigger on rule evaluation.
     - parameters: Optional rule parameters for customization.
     - is_active: Whether the rule is enabled.
@@ -47,7 +60,7 @@ class ComplianceRule(BaseModel):
     description: str
     framework: str  # e.g., 'NIST', 'ISO27001', 'CIS'
     severity: str  # e.g., 'low', 'medium', 'high', 'critical'
-    conditions: Dict[str, List[RuleCondition]]  # 'all', 'any', 'not'
+    conditions: Dict[str, List[ConditionNode]]  # 'all', 'any', 'not'; groups nest
     event: RuleEvent
     parameters: Optional[Dict[str, Any]] = None
     is_active: bool = True
@@ -1,11 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query, Path, Body, Request
-from fastapi.responses import JSONResponse
-from fastapi.encoders import jsonable_encoder
-from fastapi.exceptions import RequestValidationError
-from fastapi.exception_handlers import http_exception_handler, request_validation_exception_handler
-from starlette.exceptions import HTTPException as StarletteHTTPException
 from typing import List, Optional, Dict, Any
+from pydantic import BaseModel
 from .rule_schema import ComplianceRule
+from .analysis import analyze_rule
+from .explain import RuleExplanation, explain_rule
 from ..supabase_client import get_supabase_client
 from ..auth import get_current_user
 import logging
@@ -24,18 +22,7 @@ class ErrorModel(BaseModel):
     detail: Optional[Any] = None
 
 # --- Exception Handlers ---
-@router.exception_handler(RequestValidationError)
-async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    logging.error(f"Validation error: {exc.errors()} | Body: {getattr(exc, 'body', None)}")
-    return JSONResponse(
-        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content=jsonable_encoder({"message": "Validation error", "detail": exc.errors()}),
-    )
-
-@router.exception_handler(StarletteHTTPException)
-async def custom_http_exception_handler(request: Request, exc: StarletteHTTPException):
-    logging.error(f"HTTP error: {exc.detail}")
-    return await http_exception_handler(request, exc)
+# APIRouter has no exception_handler; validation and HTTP errors are handled app-wide in main.py.
 
 # RBAC: Only allow users with 'admin' or 'auditor' roles to manage rules
 # Document required roles in endpoint docs
@@ -45,6 +32,18 @@ def rbac_check(current_user=Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Insufficient permissions. Requires 'admin' or 'auditor' role.")
     return current_user
 
+def check_rule_conditions(rule: ComplianceRule):
+    """
+    Reject rules whose conditions reference undefined parameters, or are contradictory,
+    tautological, duplicated or redundant (they only add scan cost).
+    """
+    try:
+        findings = analyze_rule(rule)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if findings:
+        raise HTTPException(status_code=400, detail={"message": "Rule conditions failed static analysis.", "findings": [f.dict() for f in findings]})
+
 # --- Endpoints ---
 @router.get("/", response_model=List[ComplianceRule], responses={
     200: {"description": "List of rules."},
@@ -128,9 +127,32 @@ def restore_rule_version(rule_id: str = Path(..., description="Rule ID"), versio
         logging.error(f"Error restoring rule version: {e}")
         raise HTTPException(status_code=500, detail="Internal server error.")
 
+@router.post("/explain", response_model=RuleExplanation, responses={
+    200: {"description": "Explain plan and cost estimate."},
+    400: {"model": ErrorModel, "description": "Rule cannot be compiled."},
+    401: {"model": ErrorModel, "description": "Not authenticated."},
+    403: {"model": ErrorModel, "description": "Insufficient permissions."},
+    422: {"model": ErrorModel, "description": "Validation error."},
+    500: {"model": ErrorModel, "description": "Internal server error."},
+}, summary="Explain a rule and estimate its cost", tags=["rules"])
+def explain_rule_cost(rule: ComplianceRule = Body(..., description="Rule object"), org_size: Optional[int] = Query(None, ge=0, description="Entities per scan, for the full-scan estimate"), current_user=Depends(rbac_check)):
+    """
+    Show the compiled form of a rule, the facts it needs (remote ones flagged) and its estimated
+    per-entity and full-scan cost from recorded fact-resolution statistics. Templates are expanded
+    with the posted rule's parameters (post an org's values there to explain its variant).
+    Requires 'admin' or 'auditor' role.
+    """
+    try:
+        return explain_rule(rule, org_size)
+    except (ValueError, NotImplementedError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.error(f"Error explaining rule: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error.")
+
 @router.post("/", response_model=ComplianceRule, status_code=status.HTTP_201_CREATED, responses={
     201: {"description": "Rule created."},
-    400: {"model": ErrorModel, "description": "Validation error."},
+    400: {"model": ErrorModel, "description": "Validation error or conditions failing static analysis."},
     401: {"model": ErrorModel, "description": "Not authenticated."},
     403: {"model": ErrorModel, "description": "Insufficient permissions."},
     409: {"model": ErrorModel, "description": "Conflict creating rule."},
@@ -138,7 +160,8 @@ def restore_rule_version(rule_id: str = Path(..., description="Rule ID"), versio
     500: {"model": ErrorModel, "description": "Internal server error."},
 }, summary="Create a new rule", tags=["rules"])
 def create_rule(request: Request, rule: ComplianceRule = Body(..., description="Rule object"), org_id: str = Query(..., description="Organization ID"), current_user=Depends(rbac_check), supabase=Depends(get_supabase_client)):
-    """Create a new compliance rule. Requires 'admin' or 'auditor' role."""
+    """Create a new compliance rule. Requires 'admin' or 'auditor' role. Rejects conditions that fail static analysis."""
+    check_rule_conditions(rule)
     try:
         rule_dict = rule.dict()
         rule_dict["org_id"] = org_id
@@ -164,7 +187,8 @@ def create_rule(request: Request, rule: ComplianceRule = Body(..., description="
     500: {"model": ErrorModel, "description": "Internal server error."},
 }, summary="Update a rule", tags=["rules"])
 def update_rule(request: Request, rule_id: str = Path(..., description="Rule ID"), rule: ComplianceRule = Body(..., description="Rule object"), org_id: str = Query(..., description="Organization ID"), current_user=Depends(rbac_check), supabase=Depends(get_supabase_client)):
-    """Update a compliance rule. Requires 'admin' or 'auditor' role."""
+    """Update a compliance rule. Requires 'admin' or 'auditor' role. Rejects conditions that fail static analysis."""
+    check_rule_conditions(rule)
     try:
         rule_dict = rule.dict()
         rule_dict["org_id"] = org_id
@@ -1,23 +1,147 @@
 import asyncio
-from .engine import RuleEngine
+from .engine import RuleEngine, DEFAULT_STREAM_WINDOW
+from .facts import fact_registry, DEFAULT_CACHE_SIZE, FactCache
+from .profiling import EvaluationProfiler
+from .results import ResultSet
+from .bitmaps import FailureBitmaps
+from .result_cache import ResultCache
+from .tuning import ConditionTuner
+from .deadlines import ScanBudget
+from .explain import fact_costs
+from .joins import JoinIndexes
 
 class ScanExecutor:
     """
     Orchestrates scan execution:
     - Loads and initializes the rule engine.
-    - Executes scans with provided facts.
-    - Aggregates and returns results.
+    - Executes scans with provided facts, memoizing fact resolution per scan.
+    - Streams scans over large entity inventories with bounded memory (stream_scan).
+    - Scans users, groups or devices with related entities joined via hash indexes (execute_join_scan).
+    - Aggregates and returns results, optionally as per-rule failure bitmaps for scan diffs.
+    - Reuses outcomes of unchanged entities from a persistent result cache when one is attached.
+    - Reports the slowest rules when a profiler is attached, and feeds its fact timings
+      to the cost model used by rule explain plans (explain.fact_costs).
+    - Enforces per-rule and per-scan deadlines; reports each framework's share of the scan budget.
     Extensible: Add support for new scan types, aggregation, and orchestration strategies.
     """
-    def __init__(self, rules_dir: str):
-        """Initialize with rules directory and load rules."""
-        self.engine = RuleEngine(rules_dir)
-        self.engine.load_rules()
+    def __init__(self, rules_dir: str, fact_cache_size: int = DEFAULT_CACHE_SIZE, bundle_path: str = None, profiler: EvaluationProfiler = None, result_cache: ResultCache = None, tuner: ConditionTuner = None, rule_timeout: float = None, scan_timeout: float = None, parameters: dict = None):
+        """
+        Initialize with rules directory and load rules.
+        - fact_cache_size: Max fact values memoized during a single scan.
+        - bundle_path: Optional precompiled rule bundle, used when it matches the rule files.
+        - profiler: Optional EvaluationProfiler for per-rule/per-fact timings.
+        - result_cache: Optional persistent ResultCache; unchanged entities reuse previous outcomes.
+        - tuner: Optional ConditionTuner for adaptive condition ordering (saved with save_bundle).
+        - rule_timeout: Optional seconds per rule and entity; slower rules are cancelled and indeterminate.
+        - scan_timeout: Optional seconds per scan; rules not finished by the deadline are indeterminate.
+        - parameters: Optional per-org rule parameter overrides (rule id -> {name: value}).
+        """
+        self.engine = RuleEngine(rules_dir, profiler=profiler, result_cache=result_cache, tuner=tuner, rule_timeout=rule_timeout, parameters=parameters)
+        self.engine.load_rules(bundle_path)
+        self.fact_cache_size = fact_cache_size
+        self.rule_timeout = rule_timeout
+        self.scan_timeout = scan_timeout
+        self.last_cache_stats: dict = {}
+        self.last_budget_report: dict = {}
 
     async def execute_scan(self, facts: dict) -> list:
         """
         Execute a compliance scan with the given facts.
         Returns a list of rule evaluation results.
+        Fact cache hit/miss counts for the scan are kept in last_cache_stats and its
+        budget usage (see ScanBudget.report) in last_budget_report.
+        """
+        budget = self._budget()
+        try:
+            with fact_registry.scan_cache(self.fact_cache_size) as cache:
+                results = await self.engine.run(facts, budget)
+                self.last_cache_stats = cache.stats()
+        finally:
+            self.last_budget_report = budget.report()
+            self._flush_result_cache()
+            self._record_fact_costs()
+        return results
+
+    async def stream_scan(self, entities, window: int = DEFAULT_STREAM_WINDOW):
+        """
+        Scan a (possibly async) stream of entity facts, yielding (entity index, results) as they complete.
+        Holds at most `window` entities in flight; the scan's fact cache is sized to that window.
+        """
+        cache = self._window_cache(window)
+        budget = self._budget()
+        try:
+            async for item in self.engine.stream(entities, window, cache, budget):
+                yield item
+        finally:
+            self.last_budget_report = budget.report()
+            self.last_cache_stats = cache.stats()
+            cache.clear()
+            self._flush_result_cache()
+            self._record_fact_costs()
+
+    async def execute_compact_scan(self, entities, window: int = DEFAULT_STREAM_WINDOW) -> ResultSet:
+        """
+        Scan a (possibly async) stream of entity facts into a compact ResultSet.
+        Use ResultSet.to_dicts() to expand results for storage or API responses.
+        """
+        cache = self._window_cache(window)
+        budget = self._budget()
+        try:
+            return await self.engine.run_compact(entities, window, cache, budget)
+        finally:
+            self.last_budget_report = budget.report()
+            self.last_cache_stats = cache.stats()
+            cache.clear()
+            self._flush_result_cache()
+            self._record_fact_costs()
+
+    async def execute_bitmap_scan(self, entities, window: int = DEFAULT_STREAM_WINDOW) -> FailureBitmaps:
+        """
+        Scan a stream of entity facts into per-rule failure bitmaps (see result_storage.store_failure_bitmaps).
+        Entities should be enumerated in a stable order so ordinals line up across scans.
+        """
+        return FailureBitmaps.from_result_set(await self.execute_compact_scan(entities, window))
+
+    async def execute_join_scan(self, indexes: JoinIndexes, entity_key: str = 'user', window: int = DEFAULT_STREAM_WINDOW) -> ResultSet:
+        """
+        Scan every user, group or device of a tenant with its related entities joined through
+        hash indexes (see JoinIndexes.entities); only relations the rules reference are joined.
+        """
+        return await self.execute_compact_scan(indexes.entities(entity_key, self.engine.entity_keys()), window)
+
+    def _budget(self) -> ScanBudget:
+        """A fresh budget for one scan; its clock starts now."""
+        return ScanBudget(self.scan_timeout, self.rule_timeout)
+
+    def _window_cache(self, window: int) -> FactCache:
+        """Fact cache sized for `window` in-flight entities."""
+        fact_count = max(1, len(self.engine.fact_index))
+        return FactCache(min(self.fact_cache_size, window * fact_count))
+
+    def _flush_result_cache(self):
+        if self.engine.result_cache is not None:
+            self.engine.result_cache.flush()
+
+    def _record_fact_costs(self):
+        if self.engine.profiler is not None:
+            fact_costs.update(self.engine.profiler.fact_stats())
+
+    async def execute_delta(self, changed_facts: dict, previous_results: list, facts: dict = None) -> list:
+        """
+        Re-evaluate only the rules that depend on changed facts.
+        Returns previous_results with the affected rules' results replaced.
+        """
+        with fact_registry.scan_cache(self.fact_cache_size) as cache:
+            results = await self.engine.evaluate_delta(changed_facts, previous_results, facts)
+            self.last_cache_stats = cache.stats()
+        return results
+
+
+    def slowest_rules(self, n: int = 10) -> list:
+        """
+        Top `n` rules by mean evaluation time, with call counts, p95 and short-circuit rate.
+        Requires a profiler; returns an empty list otherwise.
         """
-        results = await self.engine.run(facts)
-        return results 
\ No newline at end of file
+        if self.engine.profiler is None:
+            return []
+        return self.engine.profiler.slowest_rules(n)
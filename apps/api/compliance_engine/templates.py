@@ -0,0 +1,71 @@
+import json
+from typing import Any, Dict, List, Optional, Set
+from .rule_schema import ComplianceRule, RuleCondition
+
+# A condition value {"$param": "<name>"} refers to a rule parameter.
+PARAMETER_KEY = '$param'
+
+def parameter_name(value: Any) -> Optional[str]:
+    """Name of the parameter a condition value refers to, or None for a constant."""
+    if isinstance(value, dict) and len(value) == 1 and PARAMETER_KEY in value:
+        return value[PARAMETER_KEY]
+    return None
+
+def referenced_parameters(conditions: Dict[str, List[Any]]) -> Set[str]:
+    """Names of the parameters referenced anywhere in a condition tree (aggregate where-trees included)."""
+    names: Set[str] = set()
+    for children in conditions.values():
+        for child in children:
+            if isinstance(child, RuleCondition):
+                name = parameter_name(child.value)
+                if name is not None:
+                    names.add(name)
+                if child.where:
+                    names |= referenced_parameters(child.where)
+            else:
+                names |= referenced_parameters(child)
+    return names
+
+def rule_parameters(rule: ComplianceRule, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Effective parameters of a rule: its defaults (rule.parameters) updated with per-org overrides."""
+    return {**(rule.parameters or {}), **(overrides or {})}
+
+def expand_conditions(conditions: Dict[str, List[Any]], parameters: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """
+    Replace parameter references in a condition tree with constants.
+    Returns the input tree itself when it references no parameters.
+    Raises ValueError for references to parameters that have no value.
+    """
+    expanded: Dict[str, List[Any]] = {}
+    changed = False
+    for mode, children in conditions.items():
+        nodes = []
+        for child in children:
+            node = _expand(child, parameters)
+            changed = changed or node is not child
+            nodes.append(node)
+        expanded[mode] = nodes
+    return expanded if changed else conditions
+
+def _expand(node: Any, parameters: Dict[str, Any]) -> Any:
+    if not isinstance(node, RuleCondition):
+        return expand_conditions(node, parameters)
+    update: Dict[str, Any] = {}
+    name = parameter_name(node.value)
+    if name is not None:
+        if name not in parameters:
+            raise ValueError(f"Condition on '{node.fact}' references undefined parameter '{name}'.")
+        update['value'] = parameters[name]
+    if node.where:
+        where = expand_conditions(node.where, parameters)
+        if where is not node.where:
+            update['where'] = where
+    return node.model_copy(update=update) if update else node
+
+def expand_rule(rule: ComplianceRule, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, List[Any]]:
+    """The rule's conditions with parameter references expanded using its effective parameters."""
+    return expand_conditions(rule.conditions, rule_parameters(rule, overrides))
+
+def parameters_key(parameters: Optional[Dict[str, Dict[str, Any]]]) -> str:
+    """Canonical form of per-org overrides (rule id -> parameter values), for caching catalogs."""
+    return json.dumps(parameters or {}, sort_keys=True, default=repr)
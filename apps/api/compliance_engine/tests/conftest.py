@@ -3,6 +3,8 @@ import asyncio
 import os
 import tempfile
 import json
+from apps.api.compliance_engine.facts import fact_registry
+from apps.api.compliance_engine.rule_schema import ComplianceRule
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -45,5 +47,33 @@ def example_rule():
         "is_active": True
     }
 
+@pytest.fixture
+def make_rule(example_rule):
+    """
+    Factory for ComplianceRule objects built on example_rule: make_rule(rule_id, conditions, **fields).
+    - rule_id: Used as id and name.
+    - conditions: Condition tree; default example_rule's (user.mfa_enabled equal True).
+    - fact/value: Shorthand for {"all": [{"fact": fact, "operator": "equal", "value": value}]}.
+    Other fields (framework, severity, version, parameters, is_active) override example_rule's.
+    """
+    def make(rule_id=example_rule["id"], conditions=None, fact=None, value=True, **fields):
+        if fact is not None:
+            conditions = {"all": [{"fact": fact, "operator": "equal", "value": value}]}
+        if conditions is None:
+            conditions = example_rule["conditions"]
+        return ComplianceRule(**{**example_rule, "id": rule_id, "name": rule_id, "conditions": conditions, **fields})
+    return make
+
+@pytest.fixture(autouse=True)
+def isolated_fact_registry(monkeypatch):
+    """
+    Give every test copies of the global fact_registry's handler tables, so facts registered
+    (or attribute entries cached) during a test are dropped when it ends.
+    """
+    monkeypatch.setattr(fact_registry, '_registry', dict(fact_registry._registry))
+    monkeypatch.setattr(fact_registry, '_entries', dict(fact_registry._entries))
+    monkeypatch.setattr(fact_registry, 'generation', object())
+    return fact_registry
+
 # Enable pytest-cov plugin for coverage
 pytest_plugins = ["pytest_cov"] 
\ No newline at end of file
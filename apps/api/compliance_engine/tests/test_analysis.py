@@ -0,0 +1,109 @@
+import pytest
+from fastapi import HTTPException
+from apps.api.compliance_engine.analysis import ALWAYS_FALSE, ALWAYS_TRUE, analyze_rule, fold_conditions
+from apps.api.compliance_engine.catalog import RuleCatalog
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.rule_schema import ComplianceRule, RuleCondition
+from apps.api.compliance_engine.rules_api import check_rule_conditions
+
+def _cond(operator, value, fact="user.password_length"):
+    return RuleCondition(fact=fact, operator=operator, value=value)
+
+@pytest.mark.parametrize("conditions", [
+    [_cond("lessThanEqual", 5), _cond("greaterThan", 10)],
+    [_cond("lessThan", 5), _cond("greaterThanEqual", 5)],
+    [_cond("equal", 3), _cond("greaterThan", 4)],
+    [_cond("equal", 3), _cond("equal", 4)],
+    [_cond("in", [1, 2]), _cond("notIn", [1, 2])],
+    [_cond("in", [1, 2]), _cond("greaterThan", 2)],
+])
+def test_contradictions_fold_to_false(conditions):
+    folded, findings = fold_conditions({"all": conditions})
+    assert folded == ALWAYS_FALSE
+    assert [f.kind for f in findings] == ["contradiction"]
+
+@pytest.mark.parametrize("conditions", [
+    [_cond("lessThanEqual", 5), _cond("greaterThanEqual", 5)],
+    [_cond("equal", 3), _cond("in", [3, 4])],
+    [_cond("greaterThan", 1), _cond("lessThan", 2)],
+    [_cond("lessThan", 5), _cond("greaterThan", 1, fact="user.other")],
+])
+def test_satisfiable_conditions_are_kept(conditions):
+    folded, findings = fold_conditions({"all": conditions})
+    assert folded == {"all": conditions}
+    assert findings == []
+
+@pytest.mark.parametrize("conditions", [
+    [_cond("equal", 1), _cond("notEqual", 1)],
+    [_cond("notEqual", 1), _cond("notEqual", 2)],
+    [_cond("in", ["a"]), _cond("notIn", ["a"])],
+])
+def test_tautologies_fold_to_true(conditions):
+    folded, findings = fold_conditions({"any": conditions})
+    assert folded == ALWAYS_TRUE
+    assert [f.kind for f in findings] == ["tautology"]
+
+def test_complementary_comparisons_are_not_tautologies():
+    # A missing fact fails both comparisons, so the group can still fail
+    conditions = [_cond("lessThan", 5), _cond("greaterThanEqual", 5)]
+    assert fold_conditions({"any": conditions}) == ({"any": conditions}, [])
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("first, second", [(1, 1.0), (True, 1)])
+async def test_numerically_equal_constants_are_one_value(first, second):
+    conditions = {"any": [_cond("notEqual", first), _cond("notEqual", second)]}
+    assert fold_conditions(conditions) == (conditions, [])
+    assert await RuleEngine(rules_dir="/tmp").evaluate_conditions(conditions, {"user": {"password_length": 1}}) is False
+    folded, findings = fold_conditions({"any": [_cond("equal", first), _cond("notEqual", second)]})
+    assert folded == ALWAYS_TRUE
+    assert [f.kind for f in findings] == ["tautology"]
+
+def test_duplicates_and_redundant_bounds_are_dropped():
+    folded, findings = fold_conditions({"all": [
+        _cond("greaterThan", 3), _cond("greaterThan", 5), _cond("greaterThan", 3),
+        {"any": [_cond("equal", True, "user.mfa_enabled")]},
+        {"any": [_cond("equal", True, "user.mfa_enabled")]},
+    ]})
+    assert folded == {"all": [_cond("greaterThan", 5), {"any": [_cond("equal", True, "user.mfa_enabled")]}]}
+    assert sorted(f.kind for f in findings) == ["duplicate", "duplicate", "redundant"]
+    folded, _ = fold_conditions({"any": [_cond("lessThan", 3), _cond("lessThanEqual", 3)]})
+    assert folded == {"any": [_cond("lessThanEqual", 3)]}
+
+def test_constant_groups_propagate():
+    contradiction = {"all": [_cond("lessThan", 1), _cond("greaterThan", 2)]}
+    assert fold_conditions({"any": [contradiction, _cond("equal", True, "user.mfa_enabled")]})[0] == \
+        {"any": [_cond("equal", True, "user.mfa_enabled")]}
+    assert fold_conditions({"all": [contradiction, _cond("equal", True, "user.mfa_enabled")]})[0] == ALWAYS_FALSE
+    assert fold_conditions({"not": [contradiction]})[0] == ALWAYS_TRUE
+    assert fold_conditions({"not": [_cond("lessThan", 1), _cond("greaterThan", 2)]})[0] == ALWAYS_TRUE
+
+@pytest.mark.asyncio
+async def test_catalog_compiles_folded_conditions(caplog, make_rule):
+    rule = make_rule(conditions={"all": [_cond("lessThanEqual", 5), _cond("greaterThan", 10)]})
+    catalog = RuleCatalog([rule])
+    assert [f.kind for f in catalog.findings[rule.id]] == ["contradiction"]
+    assert catalog.compiled[0].facts == frozenset()
+    assert "contradiction" in caplog.text
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [rule]
+    assert (await engine.run({"user": {"password_length": 7}}))[0]["passed"] is False
+
+def test_analyze_rule_clean(example_rule):
+    assert analyze_rule(ComplianceRule(**example_rule)) == []
+
+def test_check_rule_conditions_rejects_contradictions(make_rule):
+    rule = make_rule(conditions={"all": [_cond("lessThanEqual", 5), _cond("greaterThan", 10)]})
+    with pytest.raises(HTTPException) as excinfo:
+        check_rule_conditions(rule)
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail["findings"][0]["kind"] == "contradiction"
+
+def test_check_rule_conditions_rejects_undefined_parameters(make_rule):
+    rule = make_rule(conditions={"all": [_cond("greaterThan", {"$param": "threshold"}, fact="user.last_login_days")]})
+    with pytest.raises(HTTPException) as excinfo:
+        check_rule_conditions(rule)
+    assert excinfo.value.status_code == 400
+    assert "threshold" in excinfo.value.detail
+
+def test_check_rule_conditions_accepts_clean_rules(example_rule):
+    check_rule_conditions(ComplianceRule(**example_rule))
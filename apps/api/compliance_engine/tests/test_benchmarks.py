@@ -0,0 +1,25 @@
+import json
+from apps.api.compliance_engine.benchmarks.runner import run_benchmarks, write_results
+from apps.api.compliance_engine.benchmarks.synthetic import FACT_SPECS, generate_rules, generate_tenant
+from apps.api.compliance_engine.rule_schema import ComplianceRule
+
+def test_generate_tenant_is_deterministic():
+    first = list(generate_tenant(3, seed=7))
+    assert first == list(generate_tenant(3, seed=7))
+    assert set(first[0]) == {name.split('.')[0] for name in FACT_SPECS}
+
+def test_generated_rules_validate():
+    for rule in generate_rules(20):
+        ComplianceRule(**rule)
+
+def test_run_benchmarks_small_matrix(tmp_path):
+    report = run_benchmarks(sizes=[20], catalog_sizes=[5], memory=True)
+    names = {(r['benchmark'], r.get('catalog')) for r in report['results']}
+    assert ('engine.run', 'shipped') in names
+    assert ('scan_executor.execute_scan', 'generated-5') in names
+    assert ('ingestion.ingest', None) in names
+    run = next(r for r in report['results'] if r['benchmark'] == 'engine.run')
+    assert run['peak_memory_bytes'] > 0
+    path = write_results(report, str(tmp_path / "out" / "bench.json"))
+    with open(path) as f:
+        assert json.load(f)['results']
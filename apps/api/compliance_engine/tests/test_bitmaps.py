@@ -0,0 +1,70 @@
+import pytest
+from unittest.mock import patch
+from apps.api.compliance_engine.bitmaps import FailureBitmaps, ScanDiff
+from apps.api.compliance_engine.result_storage import store_failure_bitmaps, get_failure_bitmaps, diff_scans
+from apps.api.compliance_engine.scan_executor import ScanExecutor
+
+def test_bitmap_set_operations():
+    bitmaps = FailureBitmaps()
+    for entity_index in (0, 3, 200):
+        bitmaps.add("mfa", entity_index)
+    assert bitmaps.entities("mfa") == [0, 3, 200]
+    assert bitmaps.count("mfa") == 3
+    assert ("mfa", 3) in bitmaps and ("mfa", 4) not in bitmaps
+    assert bitmaps.entities("unknown") == []
+
+def test_bitmaps_round_trip():
+    bitmaps = FailureBitmaps({"mfa": (1 << 1000) | 5, "empty": 0})
+    encoded = bitmaps.to_dict()
+    assert set(encoded) == {"mfa"}
+    assert FailureBitmaps.from_dict(encoded) == bitmaps
+
+def test_scan_diff():
+    previous = FailureBitmaps({"mfa": 0b0110, "gone": 0b1})
+    current = FailureBitmaps({"mfa": 0b1100, "new": 0b10})
+    diff = ScanDiff(previous, current)
+    assert diff.to_dict() == {
+        "newly_failing": {"mfa": [3], "new": [1]},
+        "fixed": {"mfa": [1], "gone": [0]},
+    }
+    assert not ScanDiff(current, current)
+
+def test_scan_diff_ignores_indeterminate_outcomes():
+    previous = FailureBitmaps({"mfa": 0b0011}, {"mfa": 0b0100})
+    current = FailureBitmaps({"mfa": 0b0100}, {"mfa": 0b0001})
+    # Entity 0 timed out now and entity 2 timed out before: neither fixed nor newly failing
+    assert ScanDiff(previous, current).to_dict() == {"newly_failing": {}, "fixed": {"mfa": [1]}}
+
+def test_from_results():
+    results = [[{"rule_id": "a", "passed": False}, {"rule_id": "b", "passed": True}],
+               [{"rule_id": "a", "passed": False}, {"rule_id": "b", "passed": None}]]
+    assert FailureBitmaps.from_results(results) == FailureBitmaps({"a": 0b11}, {"b": 0b10})
+
+@pytest.mark.asyncio
+async def test_execute_bitmap_scan(tmp_path, make_rule):
+    executor = ScanExecutor(str(tmp_path))
+    executor.engine.rules = [make_rule("mfa")]
+    entities = [{"user": {"mfa_enabled": enabled}} for enabled in (True, False, True, False)]
+    bitmaps = await executor.execute_bitmap_scan(entities)
+    assert bitmaps.entities("mfa") == [1, 3]
+
+@pytest.mark.asyncio
+async def test_store_and_diff_scans():
+    scans = {"scan-1": {"metadata": {"trigger": "cron"}}, "scan-2": {"metadata": None}}
+    def get_scan(org_id, scan_id):
+        return {"data": scans[scan_id]} if scan_id in scans else {"error": {"message": "Scan not found"}}
+    def update_scan_metadata(org_id, scan_id, metadata):
+        scans[scan_id]["metadata"] = metadata
+        return {"data": [scans[scan_id]]}
+    with patch('apps.api.supabase_client.get_scan', side_effect=get_scan), \
+         patch('apps.api.supabase_client.update_scan_metadata', side_effect=update_scan_metadata):
+        await store_failure_bitmaps("org-1", "scan-1", FailureBitmaps({"mfa": 0b01}))
+        await store_failure_bitmaps("org-1", "scan-2", FailureBitmaps({"mfa": 0b10}, {"mfa": 0b100}))
+        assert scans["scan-1"]["metadata"]["trigger"] == "cron"
+        assert (await get_failure_bitmaps("org-1", "scan-2")).indeterminate == {"mfa": 0b100}
+        diff = await diff_scans("org-1", "scan-1", "scan-2")
+        assert diff.to_dict() == {"newly_failing": {"mfa": [1]}, "fixed": {"mfa": [0]}}
+        assert await get_failure_bitmaps("org-1", "missing") is None
+        assert await diff_scans("org-1", "scan-1", "missing") is None
+        with pytest.raises(ValueError):
+            await store_failure_bitmaps("org-1", "missing", FailureBitmaps())
@@ -0,0 +1,65 @@
+import pytest
+import json
+import os
+from apps.api.compliance_engine.bundle import build_bundle, load_bundle, rules_digest
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.scan_executor import ScanExecutor
+
+@pytest.fixture
+def rules_dir(temp_rules_dir, example_rule):
+    with open(os.path.join(temp_rules_dir, "test_rule.json"), "w") as f:
+        json.dump(example_rule, f)
+    return temp_rules_dir
+
+def test_build_and_load_bundle(rules_dir, tmp_path):
+    path = str(tmp_path / "rules.bundle")
+    digest = build_bundle(rules_dir, path)
+    assert digest == rules_digest(rules_dir)
+    catalog, files = load_bundle(path, rules_dir)
+    assert [r.id for r in catalog.rules] == ["test-rule-1"]
+    assert list(files) == ["test_rule.json"]
+
+def test_stale_bundle_is_ignored(rules_dir, tmp_path, example_rule):
+    path = str(tmp_path / "rules.bundle")
+    build_bundle(rules_dir, path)
+    with open(os.path.join(rules_dir, "test_rule.json"), "w") as f:
+        json.dump({**example_rule, "severity": "high"}, f)
+    assert load_bundle(path, rules_dir) is None
+    assert load_bundle(str(tmp_path / "missing.bundle"), rules_dir) is None
+
+def test_corrupt_bundle_is_ignored(rules_dir, tmp_path):
+    path = tmp_path / "rules.bundle"
+    path.write_bytes(b"not a pickle")
+    assert load_bundle(str(path), rules_dir) is None
+
+def test_engine_loads_from_bundle_without_parsing(rules_dir, tmp_path, mocker):
+    path = str(tmp_path / "rules.bundle")
+    build_bundle(rules_dir, path)
+    engine = RuleEngine(rules_dir)
+    scan = mocker.spy(engine.loader, "scan")
+    engine.load_rules(bundle_path=path)
+    assert scan.call_count == 0
+    assert [r.id for r in engine.rules] == ["test-rule-1"]
+    # Loader state comes from the bundle, so nothing looks changed
+    assert engine.reload_rules() is False
+
+@pytest.mark.asyncio
+async def test_executor_falls_back_to_json(rules_dir, tmp_path):
+    executor = ScanExecutor(rules_dir, bundle_path=str(tmp_path / "missing.bundle"))
+    results = await executor.execute_scan({"user": {"mfa_enabled": True}})
+    assert results[0]["passed"] is True
+    path = str(tmp_path / "saved.bundle")
+    executor.engine.save_bundle(path)
+    assert load_bundle(path, rules_dir) is not None
+
+def test_bundle_is_reexpanded_with_engine_parameters(temp_rules_dir, example_rule, tmp_path):
+    rule = {**example_rule, "parameters": {"required": True},
+            "conditions": {"all": [{"fact": "user.mfa_enabled", "operator": "equal", "value": {"$param": "required"}}]}}
+    with open(os.path.join(temp_rules_dir, "test_rule.json"), "w") as f:
+        json.dump(rule, f)
+    path = str(tmp_path / "rules.bundle")
+    build_bundle(temp_rules_dir, path)
+    engine = RuleEngine(temp_rules_dir, parameters={"test-rule-1": {"required": False}})
+    engine.load_rules(bundle_path=path)
+    assert engine.catalog.parameters == {"test-rule-1": {"required": False}}
+    assert engine.compiled[0].predicate.children[0].source.value is False
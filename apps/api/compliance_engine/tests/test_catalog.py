@@ -0,0 +1,105 @@
+import pytest
+import asyncio
+import json
+import os
+from apps.api.compliance_engine.catalog import RuleFileLoader
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.rule_schema import RuleCondition
+
+def _write_rule(rules_dir, filename, rule_id, value=True):
+    rule = {
+        "id": rule_id,
+        "name": rule_id,
+        "description": "",
+        "framework": "TEST",
+        "severity": "low",
+        "conditions": {"all": [{"fact": "user.mfa_enabled", "operator": "equal", "value": value}]},
+        "event": {"type": "non_compliance"},
+    }
+    path = os.path.join(rules_dir, filename)
+    with open(path, "w") as f:
+        json.dump(rule, f)
+    return path
+
+def _bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+def test_loader_reparses_only_changed_files(temp_rules_dir):
+    _write_rule(temp_rules_dir, "a.json", "a")
+    path_b = _write_rule(temp_rules_dir, "b.json", "b")
+    loader = RuleFileLoader(temp_rules_dir)
+    changed, rules = loader.scan()
+    assert changed and [r.id for r in rules] == ["a", "b"]
+    # Touching a file without changing content is not a change
+    _bump_mtime(path_b)
+    changed, again = loader.scan()
+    assert not changed
+    assert again[1] is rules[1]
+    _write_rule(temp_rules_dir, "b.json", "b", value=False)
+    _bump_mtime(path_b)
+    changed, updated = loader.scan()
+    assert changed
+    assert updated[0] is rules[0]
+    assert updated[1] is not rules[1]
+
+def test_loader_detects_removed_files(temp_rules_dir):
+    _write_rule(temp_rules_dir, "a.json", "a")
+    path_b = _write_rule(temp_rules_dir, "b.json", "b")
+    loader = RuleFileLoader(temp_rules_dir)
+    loader.scan()
+    os.remove(path_b)
+    changed, rules = loader.scan()
+    assert changed and [r.id for r in rules] == ["a"]
+
+def test_reload_swaps_catalog(temp_rules_dir):
+    _write_rule(temp_rules_dir, "a.json", "a")
+    engine = RuleEngine(temp_rules_dir)
+    engine.load_rules()
+    old_catalog = engine.catalog
+    assert engine.reload_rules() is False
+    assert engine.catalog is old_catalog
+    _write_rule(temp_rules_dir, "c.json", "c")
+    assert engine.reload_rules() is True
+    assert engine.catalog is not old_catalog
+    assert engine.catalog.generation == old_catalog.generation + 1
+    assert [r.id for r in engine.rules] == ["a", "c"]
+    # The old catalog is untouched for scans that captured it
+    assert [r.id for r in old_catalog.rules] == ["a"]
+
+@pytest.mark.asyncio
+async def test_inflight_scan_finishes_on_old_catalog(temp_rules_dir):
+    from apps.api.compliance_engine.facts import fact_registry
+    _write_rule(temp_rules_dir, "a.json", "a")
+    engine = RuleEngine(temp_rules_dir)
+    engine.load_rules()
+    gate = asyncio.Event()
+    async def gated(user):
+        await gate.wait()
+        return True
+    fact_registry.register('user.gated', gated)
+    gated_condition = RuleCondition(fact="user.gated", operator="equal", value=True)
+    engine.rules = [engine.rules[0].model_copy(update={"conditions": {"all": [gated_condition]}})]
+    scan = asyncio.ensure_future(engine.run({"user": {}}))
+    await asyncio.sleep(0)
+    _write_rule(temp_rules_dir, "z.json", "z")
+    engine.reload_rules()
+    gate.set()
+    results = await scan
+    assert [r["rule_id"] for r in results] == ["a"]
+    assert [r.id for r in engine.rules] == ["a", "z"]
+
+@pytest.mark.asyncio
+async def test_watch_rules_keeps_catalog_on_invalid_file(temp_rules_dir):
+    _write_rule(temp_rules_dir, "a.json", "a")
+    engine = RuleEngine(temp_rules_dir)
+    engine.load_rules()
+    catalog = engine.catalog
+    with open(os.path.join(temp_rules_dir, "broken.json"), "w") as f:
+        f.write("{not json")
+    watcher = asyncio.ensure_future(engine.watch_rules(interval=0.01))
+    await asyncio.sleep(0.05)
+    watcher.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await watcher
+    assert engine.catalog is catalog
@@ -0,0 +1,231 @@
+import pytest
+from apps.api.compliance_engine.compiler import (
+    CompiledAggregate, CompiledCondition, CompiledConditions, CompiledRule, OPERATORS, compile_node, compile_rules,
+)
+from apps.api.compliance_engine.facts import fact_registry
+from apps.api.compliance_engine.rule_schema import ComplianceRule, RuleCondition
+
+def test_condition_binds_operator_and_splits_fact():
+    compiled = CompiledCondition(RuleCondition(fact="user.mfa_enabled", operator="notEqual", value=False))
+    assert compiled.entity_key == "user"
+    assert compiled.op is OPERATORS["notEqual"]
+
+def test_membership_values_become_frozensets():
+    compiled = CompiledCondition(RuleCondition(fact="user.mfa_enabled", operator="in", value=[True, 1]))
+    assert isinstance(compiled.value, frozenset)
+    unhashable = CompiledCondition(RuleCondition(fact="user.mfa_enabled", operator="notIn", value=[{"a": 1}]))
+    assert isinstance(unhashable.value, tuple)
+
+@pytest.mark.asyncio
+async def test_membership_with_unhashable_fact_value():
+    in_list = CompiledCondition(RuleCondition(fact="user.roles", operator="in", value=["admin", "owner"]))
+    assert await in_list.evaluate({"user": {"roles": ["admin"]}}) is False
+    not_in = CompiledCondition(RuleCondition(fact="user.location", operator="notIn", value=["x"]))
+    assert await not_in.evaluate({"user": {"location": {"country": "AU"}}}) is True
+    assert OPERATORS["in"]([1], frozenset({1, 2})) is False
+
+def test_unknown_operator_raises_at_compile_time():
+    with pytest.raises(NotImplementedError):
+        CompiledCondition(RuleCondition(fact="user.mfa_enabled", operator="unknown", value=True))
+
+@pytest.mark.parametrize("op,fact_value,value,expected", [
+    ("lessThan", 3, 5, True),
+    ("lessThanEqual", 5, 5, True),
+    ("greaterThan", 91, 90, True),
+    ("greaterThanEqual", 11, 12, False),
+    ("greaterThan", None, 90, False),
+])
+def test_comparison_operators(op, fact_value, value, expected):
+    assert OPERATORS[op](fact_value, value) is expected
+
+@pytest.mark.asyncio
+async def test_compiled_rule_evaluates(example_rule):
+    compiled = compile_rules([ComplianceRule(**example_rule)])
+    assert isinstance(compiled[0], CompiledRule)
+    assert await compiled[0].evaluate({"user": {"mfa_enabled": True}}) is True
+    assert await compiled[0].evaluate({"user": {"mfa_enabled": False}}) is False
+
+@pytest.mark.asyncio
+async def test_empty_conditions_fail():
+    assert await CompiledConditions({}).evaluate({}) is False
+
+@pytest.mark.asyncio
+async def test_all_short_circuits_on_first_failure():
+    from apps.api.compliance_engine.facts import fact_registry
+    calls = []
+    fact_registry.register('sc.first', lambda e: calls.append('first') or False)
+    fact_registry.register('sc.second', lambda e: calls.append('second') or True)
+    group = CompiledConditions({"all": [
+        RuleCondition(fact="sc.first", operator="equal", value=True),
+        RuleCondition(fact="sc.second", operator="equal", value=True),
+    ]})
+    assert await group.evaluate({"sc": {}}) is False
+    assert calls == ['first']
+
+@pytest.mark.asyncio
+async def test_async_facts_resolve_concurrently_with_bound():
+    import asyncio
+    from apps.api.compliance_engine.facts import fact_registry
+    state = {"active": 0, "peak": 0}
+    async def slow_true(entity):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return True
+    fact_registry.register('conc.slow', slow_true)
+    group = CompiledConditions({"all": [RuleCondition(fact="conc.slow", operator="equal", value=True)] * 5}, concurrency=2)
+    assert await group.evaluate({"conc": {}}) is True
+    assert state["peak"] == 2
+
+@pytest.mark.asyncio
+async def test_decided_group_cancels_pending_async_facts():
+    import asyncio
+    from apps.api.compliance_engine.facts import fact_registry
+    finished = []
+    async def fast_true(entity):
+        return True
+    async def slow_false(entity):
+        await asyncio.sleep(0.5)
+        finished.append(True)
+        return False
+    fact_registry.register('cancel.fast', fast_true)
+    fact_registry.register('cancel.slow', slow_false)
+    group = CompiledConditions({"any": [
+        RuleCondition(fact="cancel.slow", operator="equal", value=True),
+        RuleCondition(fact="cancel.fast", operator="equal", value=True),
+    ]})
+    assert await group.evaluate({"cancel": {}}) is True
+    await asyncio.sleep(0)
+    assert finished == []
+
+MFA = {"fact": "user.mfa_enabled", "operator": "equal", "value": True}
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("user,expected", [
+    ({"mfa_enabled": True, "tier": 1, "is_admin": False}, True),
+    ({"mfa_enabled": True, "tier": 3, "is_admin": True}, False),
+    ({"mfa_enabled": True, "tier": 3, "is_admin": False}, True),
+    ({"mfa_enabled": False, "tier": 1, "is_admin": False}, False),
+])
+async def test_nested_condition_tree(user, expected, make_rule):
+    from apps.api.compliance_engine.facts import fact_registry
+    fact_registry.register('nest.tier', lambda e: e.get('tier'))
+    fact_registry.register('nest.is_admin', lambda e: e.get('is_admin'))
+    rule = make_rule("nested", {"all": [
+        MFA,
+        {"any": [
+            {"fact": "nest.tier", "operator": "lessThanEqual", "value": 2},
+            {"not": [{"fact": "nest.is_admin", "operator": "equal", "value": True}]},
+        ]},
+    ]})
+    [compiled] = compile_rules([rule])
+    assert compiled.facts == {"user.mfa_enabled", "nest.tier", "nest.is_admin"}
+    assert await compiled.evaluate({"user": user, "nest": user}) is expected
+
+def test_identical_subconditions_are_shared_across_rules(make_rule):
+    tree = {"any": [{"fact": "user.role", "operator": "in", "value": ["admin", "owner"]}]}
+    first, second = compile_rules([
+        make_rule("nist", {"all": [MFA, tree]}),
+        make_rule("iso", {"all": [dict(MFA), {"any": [{"fact": "user.role", "operator": "in", "value": ["admin", "owner"]}]}]}),
+    ])
+    assert first.predicate is second.predicate
+    third, = compile_rules([make_rule("e8", {"any": [MFA]})])
+    assert third.predicate.children[0] is not first.predicate.children[0]
+
+@pytest.mark.asyncio
+async def test_shared_condition_evaluated_once_per_run(make_rule):
+    from apps.api.compliance_engine.facts import fact_registry
+    calls = []
+    fact_registry.register('shared.flag', lambda e: calls.append(1) or True)
+    shared = {"fact": "shared.flag", "operator": "equal", "value": True}
+    rules = compile_rules([
+        make_rule("a", {"all": [shared]}),
+        make_rule("b", {"any": [shared, {"fact": "shared.flag", "operator": "equal", "value": False}]}),
+    ])
+    memo = {}
+    for compiled in rules:
+        assert await compiled.evaluate({"shared": {}}, memo) is True
+    assert calls == [1]
+
+def _aggregate(aggregate, operator, value, where=None, fact="member.mfa_enabled"):
+    return compile_node(RuleCondition(fact=fact, aggregate=aggregate, operator=operator, value=value, where=where))
+
+@pytest.fixture
+def member_facts():
+    fact_registry.register('member.mfa_enabled', lambda m: m.get('mfa_enabled', False))
+    fact_registry.register('member.role', lambda m: m.get('role'))
+    fact_registry.register('member.age_days', lambda m: m.get('age_days'))
+    members = [
+        {"mfa_enabled": True, "role": "admin", "age_days": 10},
+        {"mfa_enabled": True, "role": "user", "age_days": 400},
+        {"mfa_enabled": False, "role": "admin", "age_days": None},
+        {"mfa_enabled": True, "role": "user", "age_days": 3},
+    ]
+    return {"member": members}
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("aggregate,operator,value,where,expected", [
+    ("count", "equal", 3, None, True),
+    ("ratio", "greaterThanEqual", 0.98, None, False),
+    ("ratio", "equal", 0.75, None, True),
+    ("exists", "equal", False, None, False),
+    ("forAll", "equal", True, None, False),
+    ("count", "equal", 2, {"all": [{"fact": "member.role", "operator": "equal", "value": "admin"}]}, True),
+    ("exists", "equal", True, {"all": [{"fact": "member.role", "operator": "equal", "value": "auditor"}]}, False),
+    ("forAll", "equal", True, {"any": [{"fact": "member.role", "operator": "equal", "value": "user"},
+                                       {"fact": "member.role", "operator": "equal", "value": "admin"}]}, True),
+])
+async def test_aggregate_operators(member_facts, aggregate, operator, value, where, expected):
+    assert await _aggregate(aggregate, operator, value, where).evaluate(member_facts) is expected
+
+@pytest.mark.asyncio
+async def test_min_max_skip_missing_and_filter(member_facts):
+    assert await _aggregate("max", "equal", 400, fact="member.age_days").evaluate(member_facts)
+    assert await _aggregate("min", "equal", 3, fact="member.age_days").evaluate(member_facts)
+    admins = {"all": [{"fact": "member.role", "operator": "equal", "value": "admin"}]}
+    assert await _aggregate("max", "equal", 10, admins, fact="member.age_days").evaluate(member_facts)
+
+@pytest.mark.asyncio
+async def test_empty_collection(member_facts):
+    assert await _aggregate("forAll", "equal", True).evaluate({"member": []})
+    assert not await _aggregate("ratio", "greaterThanEqual", 0.0).evaluate({})
+
+@pytest.mark.asyncio
+async def test_exists_stops_at_first_match():
+    seen = []
+    def flagged(device):
+        seen.append(device)
+        return device["jail_broken"]
+    fact_registry.register('dev.jail_broken', flagged)
+    node = _aggregate("exists", "equal", False, fact="dev.jail_broken")
+    assert not await node.evaluate({"dev": [{"jail_broken": False}, {"jail_broken": True}, {"jail_broken": False}]})
+    assert len(seen) == 2
+
+def test_unknown_aggregate_raises_at_compile_time():
+    with pytest.raises(NotImplementedError):
+        _aggregate("median", "equal", 1)
+
+def test_aggregates_are_shared_across_rules(member_facts, make_rule):
+    cond = {"fact": "member.mfa_enabled", "aggregate": "ratio", "operator": "greaterThan", "value": 0.5}
+    first, second = compile_rules([make_rule("a", {"all": [cond]}), make_rule("b", {"all": [cond]})])
+    assert isinstance(first.predicate.children[0], CompiledAggregate)
+    assert first.predicate.children[0] is second.predicate.children[0]
+
+def test_is_async_is_cached_until_facts_are_registered(monkeypatch):
+    fact_registry.register("cached.flag", lambda entity: True)
+    group = compile_node({"all": [RuleCondition(fact="cached.flag", operator="equal", value=True),
+                                  {"any": [RuleCondition(fact="member.mfa_enabled", operator="equal", value=True)]}]})
+    lookups = []
+    entry = fact_registry.entry
+    monkeypatch.setattr(fact_registry, "entry", lambda name, cache=True: lookups.append(name) or entry(name, cache))
+    assert group.is_async() is False
+    assert group.is_async() is False
+    assert lookups == []
+    async def flag(entity):
+        return True
+    fact_registry.register("cached.flag", flag)
+    assert group.is_async() is True
+    assert lookups == ["cached.flag"]
+    assert group.is_async() is True
+    assert lookups == ["cached.flag"]
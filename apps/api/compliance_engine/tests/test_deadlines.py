@@ -0,0 +1,56 @@
+import pytest
+import asyncio
+from apps.api.compliance_engine.bitmaps import FailureBitmaps
+from apps.api.compliance_engine.deadlines import ScanBudget
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.facts import fact_registry
+from apps.api.compliance_engine.scan_executor import ScanExecutor
+
+@pytest.fixture
+def slow_fact():
+    cancelled = []
+    async def slow(facts):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+        return True
+    fact_registry.register('user.slow_check', slow)
+    return cancelled
+
+@pytest.mark.asyncio
+async def test_rule_timeout_marks_rule_indeterminate(slow_fact, make_rule):
+    engine = RuleEngine(rules_dir="/tmp", rule_timeout=0.01)
+    engine.rules = [make_rule("slow", fact="user.slow_check"), make_rule("mfa", fact="user.mfa_enabled")]
+    results = await engine.run({"user": {"mfa_enabled": False}})
+    assert [(r["rule_id"], r["passed"]) for r in results] == [("slow", None), ("mfa", False)]
+    assert results[0]["event"] is None
+    assert slow_fact == [1]
+
+@pytest.mark.asyncio
+async def test_expired_scan_budget_skips_remaining_rules(slow_fact, make_rule):
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [make_rule("slow", fact="user.slow_check", framework="NIST"), make_rule("mfa", fact="user.mfa_enabled", framework="CIS")]
+    budget = ScanBudget(timeout=0.02)
+    results = await engine.run({"user": {"mfa_enabled": True}}, budget)
+    assert [r["passed"] for r in results] == [None, None]
+    report = budget.report()
+    assert report["frameworks"]["NIST"]["indeterminate"] == 1
+    assert report["frameworks"]["CIS"]["indeterminate"] == 1
+    assert report["frameworks"]["NIST"]["budget_share"] > 0.5
+
+@pytest.mark.asyncio
+async def test_scan_executor_reports_budget_per_framework(temp_rules_dir, slow_fact, make_rule):
+    executor = ScanExecutor(temp_rules_dir, rule_timeout=0.01, scan_timeout=5)
+    executor.engine.rules = [make_rule("slow", fact="user.slow_check", framework="NIST"), make_rule("mfa", fact="user.mfa_enabled", framework="CIS")]
+    result_set = await executor.execute_compact_scan([{"user": {"mfa_enabled": False}}] * 3)
+    assert len(list(result_set.indeterminate())) == 3
+    assert len(list(result_set.failures())) == 3
+    bitmaps = FailureBitmaps.from_result_set(result_set)
+    assert bitmaps.entities("slow") == [] and bitmaps.indeterminate == {"slow": 0b111}
+    frameworks = executor.last_budget_report["frameworks"]
+    assert frameworks["NIST"] == pytest.approx({"seconds": frameworks["NIST"]["seconds"], "rules": 3, "indeterminate": 3,
+                                                "budget_share": frameworks["NIST"]["seconds"] / 5})
+    assert frameworks["CIS"]["indeterminate"] == 0
+    assert executor.last_budget_report["timeout"] == 5
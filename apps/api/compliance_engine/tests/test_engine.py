@@ -5,7 +5,6 @@ from apps.api.compliance_engine.rule_schema import ComplianceRule, RuleCondition
 import os
 import tempfile
 import json
-from unittest.mock import AsyncMock
 
 @pytest.fixture
 def rules_dir(tmp_path):
@@ -105,9 +104,108 @@ def test_run_event_dict_for_failed_rule():
     from apps.api.compliance_engine.engine import RuleEngine
     from apps.api.compliance_engine.rule_schema import ComplianceRule, RuleCondition, RuleEvent
     engine = RuleEngine(rules_dir="/tmp")
-    rule = ComplianceRule(id="2", name="Fail", description="", framework="", severity="high", conditions={"all": []}, event=RuleEvent(type="fail", params={}), is_active=True)
+    # Empty conditions compile to a predicate that always fails
+    rule = ComplianceRule(id="2", name="Fail", description="", framework="", severity="high", conditions={}, event=RuleEvent(type="fail", params={}), is_active=True)
     engine.rules = [rule]
-    # Patch evaluate_conditions to return False (fail)
-    engine.evaluate_conditions = AsyncMock(return_value=False)
     results = asyncio.get_event_loop().run_until_complete(engine.run({}))
-    assert results[0]['event'] == rule.event.dict() 
\ No newline at end of file
+    assert results[0]['event'] == rule.event.dict() 
+
+def test_run_batch_returns_mask_per_rule(rules_dir):
+    np = pytest.importorskip("numpy")
+    engine = RuleEngine(rules_dir)
+    engine.load_rules()
+    masks = engine.run_batch({"user.mfa_enabled": np.array([True, False, True])})
+    assert masks["test-rule-1"].tolist() == [True, False, True]
+
+@pytest.mark.parametrize("conditions,expected", [
+    ({"all": [{"fact": "user.last_login_days", "operator": "greaterThan", "value": 90}]}, [False, True, False]),
+    ({"any": [{"fact": "user.last_login_days", "operator": "lessThanEqual", "value": 10},
+              {"fact": "user.role", "operator": "in", "value": ["admin"]}]}, [True, False, True]),
+    ({"not": [{"fact": "user.role", "operator": "notIn", "value": ["admin", "owner"]}]}, [False, False, True]),
+    ({}, [False, False, False]),
+])
+def test_run_batch_vector_operators(conditions, expected):
+    np = pytest.importorskip("numpy")
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [ComplianceRule(id="r", name="", description="", framework="", severity="low", conditions=conditions, event=RuleEvent(type="fail"))]
+    columns = {
+        "user.last_login_days": np.array([5, 120, 40]),
+        "user.role": np.array(["user", "user", "admin"]),
+    }
+    assert engine.run_batch(columns)["r"].tolist() == expected
+
+def test_run_batch_rejects_ragged_columns(rules_dir):
+    np = pytest.importorskip("numpy")
+    engine = RuleEngine(rules_dir)
+    engine.load_rules()
+    with pytest.raises(ValueError):
+        engine.run_batch({"user.mfa_enabled": np.array([True]), "user.is_admin": np.array([True, False])})
+
+def test_run_batch_skips_rules_without_columns():
+    np = pytest.importorskip("numpy")
+    engine = RuleEngine(os.path.join(os.path.dirname(__file__), "..", "rules"))
+    engine.load_rules()
+    masks = engine.run_batch({"user.mfa_enabled": np.array([True, False]), "user.last_login_days": np.array([10, 120])})
+    assert set(masks) == {"nist-mfa-001", "cis-inactive-users-001"}
+    assert masks["nist-mfa-001"].tolist() == [True, False]
+    assert masks["cis-inactive-users-001"].tolist() == [False, True]
+
+def test_run_batch_skips_rules_without_vectorized_form(make_rule):
+    np = pytest.importorskip("numpy")
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [make_rule("aggregate", {"all": [{"fact": "user.mfa_enabled", "aggregate": "ratio", "operator": "greaterThan", "value": 0.5}]}),
+                    make_rule("path", {"all": [{"fact": "user.profile", "path": "$.country", "operator": "equal", "value": "NZ"}]}),
+                    make_rule("mfa", fact="user.mfa_enabled")]
+    masks = engine.run_batch({"user.mfa_enabled": np.array([True, False]), "user.profile": np.array([{"country": "NZ"}, {}], dtype=object)})
+    assert list(masks) == ["mfa"]
+    assert masks["mfa"].tolist() == [True, False]
+
+def test_fact_index_maps_facts_to_rules(make_rule):
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [make_rule("mfa", fact="user.mfa_enabled"), make_rule("fw", fact="endpoint.firewall_enabled")]
+    assert [c.rule.id for c in engine.fact_index["user.mfa_enabled"]] == ["mfa"]
+    assert [c.rule.id for c in engine.affected_rules({"endpoint": {"firewall_enabled": True}})] == ["fw"]
+    assert engine.affected_rules({"user": {"unrelated": 1}}) == []
+
+@pytest.mark.asyncio
+async def test_evaluate_delta_matches_nested_fact_paths(make_rule):
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [make_rule("os", fact="device.os.version", value="11"), make_rule("os-any", fact="device.os", value={"version": "11", "build": 2}),
+                    make_rule("owner", fact="device.owner", value="a")]
+    assert [c.rule.id for c in engine.affected_rules({"device": {"os": {"version": "11"}}})] == ["os", "os-any"]
+    assert [c.rule.id for c in engine.affected_rules({"device": {"os": None}})] == ["os", "os-any"]
+    facts = {"device": {"os": {"version": "10", "build": 2}, "owner": "a"}}
+    previous = await engine.run(facts)
+    assert [r["passed"] for r in previous] == [False, False, True]
+    results = await engine.evaluate_delta({"device": {"os": {"version": "11"}}}, previous, facts)
+    assert [r["passed"] for r in results] == [True, True, True]
+    assert results[2] is previous[2]
+
+@pytest.mark.asyncio
+async def test_evaluate_delta_reevaluates_only_affected_rules(make_rule):
+    from apps.api.compliance_engine.facts import fact_registry
+    calls = []
+    fact_registry.register('endpoint.firewall_enabled', lambda e: calls.append(1) or e.get('firewall_enabled'))
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [make_rule("mfa", fact="user.mfa_enabled"), make_rule("fw", fact="endpoint.firewall_enabled")]
+    facts = {"user": {"mfa_enabled": False}, "endpoint": {"firewall_enabled": True}}
+    previous = await engine.run(facts)
+    assert [r["passed"] for r in previous] == [False, True]
+    calls.clear()
+    results = await engine.evaluate_delta({"user": {"mfa_enabled": True}}, previous, facts)
+    assert [r["rule_id"] for r in results] == ["mfa", "fw"]
+    assert [r["passed"] for r in results] == [True, True]
+    assert results[1] is previous[1]
+    assert calls == []
+
+@pytest.mark.asyncio
+async def test_evaluate_delta_without_snapshot_requires_every_read_fact(make_rule):
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [make_rule("admin-mfa", {"any": [{"fact": "user.mfa_enabled", "operator": "equal", "value": True},
+                                                    {"fact": "user.is_admin", "operator": "equal", "value": False}]}),
+                    make_rule("mfa", fact="user.mfa_enabled")]
+    previous = await engine.run({"user": {"mfa_enabled": True, "is_admin": False}})
+    with pytest.raises(ValueError, match="user.is_admin"):
+        await engine.evaluate_delta({"user": {"mfa_enabled": False}}, previous)
+    results = await engine.evaluate_delta({"user": {"mfa_enabled": False, "is_admin": False}}, previous)
+    assert [r["passed"] for r in results] == [True, False]
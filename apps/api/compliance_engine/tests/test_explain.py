@@ -0,0 +1,59 @@
+import pytest
+from fastapi import HTTPException
+from apps.api.compliance_engine import rules_api
+from apps.api.compliance_engine.explain import FactCostModel, UNMEASURED_FACT_SECONDS, explain_rule
+from apps.api.compliance_engine.facts import fact_registry
+from apps.api.compliance_engine.profiling import EvaluationProfiler
+from apps.api.compliance_engine.scan_executor import ScanExecutor
+
+@pytest.fixture
+def remote_fact():
+    async def risk(user):
+        return user.get("risk", 0)
+    fact_registry.register('user.risk_score', risk)
+
+def test_explain_lists_facts_and_flags_remote(remote_fact, make_rule):
+    rule = make_rule(conditions={"all": [{"fact": "user.department", "operator": "equal", "value": "it"},
+                          {"fact": "user.risk_score", "operator": "lessThan", "value": {"$param": "max_risk"}}]},
+                      parameters={"max_risk": 50})
+    explanation = explain_rule(rule, org_size=200, costs=FactCostModel(), parameters={"max_risk": 20})
+    assert [(f.fact, f.kind, f.remote) for f in explanation.facts] == [("user.department", "attribute", False), ("user.risk_score", "remote", True)]
+    assert explanation.plan["mode"] == "all"
+    assert explanation.plan["children"][1] == {"fact": "user.risk_score", "operator": "lessThan", "value": 20, "remote": True}
+    expected = UNMEASURED_FACT_SECONDS["attribute"] + UNMEASURED_FACT_SECONDS["remote"]
+    assert explanation.entity_seconds == pytest.approx(expected)
+    assert explanation.scan_seconds == pytest.approx(expected * 200)
+
+def test_explain_shows_folded_plan_and_findings(make_rule):
+    rule = make_rule(conditions={"all": [{"fact": "user.password_length", "operator": "lessThanEqual", "value": 5},
+                          {"fact": "user.password_length", "operator": "greaterThan", "value": 10}]})
+    explanation = explain_rule(rule, costs=FactCostModel())
+    assert explanation.plan == {"mode": "any", "children": []}
+    assert explanation.facts == [] and explanation.scan_seconds is None
+    assert explanation.findings[0].kind == "contradiction"
+
+@pytest.mark.asyncio
+async def test_profiled_scans_feed_recorded_costs(temp_rules_dir, remote_fact, make_rule):
+    from apps.api.compliance_engine.explain import fact_costs
+    executor = ScanExecutor(temp_rules_dir, profiler=EvaluationProfiler())
+    executor.engine.rules = [make_rule(conditions={"all": [{"fact": "user.risk_score", "operator": "lessThan", "value": 50}]})]
+    await executor.execute_scan({"user": {"risk": 10}})
+    assert fact_costs.cost("user.risk_score", "remote")["count"] == 1
+    explanation = explain_rule(executor.engine.rules[0], org_size=10)
+    assert explanation.facts[0].samples == 1
+    assert explanation.entity_seconds < UNMEASURED_FACT_SECONDS["remote"]
+
+def test_explain_does_not_keep_registry_entries_for_input_facts(make_rule):
+    rule = make_rule(conditions={"all": [{"fact": "user.posted.by_request", "operator": "equal", "value": 1}]})
+    assert explain_rule(rule, costs=FactCostModel()).facts[0].kind == "attribute"
+    assert "user.posted.by_request" not in fact_registry._entries
+
+def test_explain_endpoint_estimates_scan_cost(make_rule):
+    rule = make_rule(conditions={"all": [{"fact": "user.last_login_days", "operator": "greaterThan", "value": {"$param": "days"}}]},
+                      parameters={"days": 90})
+    explanation = rules_api.explain_rule_cost(rule=rule, org_size=1000, current_user={"role": "admin"})
+    assert explanation.plan["children"][0]["value"] == 90
+    assert explanation.scan_seconds == pytest.approx(explanation.entity_seconds * 1000)
+    with pytest.raises(HTTPException) as excinfo:
+        rules_api.explain_rule_cost(rule=rule.model_copy(update={"parameters": None}), org_size=None, current_user={"role": "admin"})
+    assert excinfo.value.status_code == 400
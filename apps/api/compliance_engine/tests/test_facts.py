@@ -31,4 +31,140 @@ async def test_resolve_async_handler(registry):
 
 def test_get_missing_fact_handler_raises(registry):
     with pytest.raises(KeyError):
-        registry.get('missing.fact') 
\ No newline at end of file
+        registry.get('missing.fact') 
+
+@pytest.mark.asyncio
+async def test_scan_cache_memoizes_per_entity(registry):
+    calls = []
+    def handler(entity):
+        calls.append(entity['id'])
+        return entity['id'] * 2
+    registry.register('test.memo', handler)
+    alice, bob = {'id': 1}, {'id': 2}
+    with registry.scan_cache() as cache:
+        assert await registry.resolve('test.memo', alice) == 2
+        assert await registry.resolve('test.memo', alice) == 2
+        assert await registry.resolve('test.memo', bob) == 4
+    assert calls == [1, 2]
+    assert (cache.hits, cache.misses) == (1, 2)
+    # Outside the scan nothing is memoized
+    await registry.resolve('test.memo', alice)
+    assert calls == [1, 2, 1]
+
+@pytest.mark.asyncio
+async def test_scan_cache_keys_on_params(registry):
+    registry.register('test.params', lambda entity, params=None: (params or {}).get('n'))
+    entity = {}
+    with registry.scan_cache() as cache:
+        assert await registry.resolve('test.params', entity, params={'n': 1}) == 1
+        assert await registry.resolve('test.params', entity, params={'n': 2}) == 2
+        assert cache.misses == 2
+
+@pytest.mark.asyncio
+async def test_scan_cache_shares_inflight_async_resolution(registry):
+    calls = []
+    async def handler(entity):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return True
+    registry.register('test.inflight', handler)
+    entity = {}
+    with registry.scan_cache():
+        results = await asyncio.gather(*[registry.resolve('test.inflight', entity) for _ in range(3)])
+    assert results == [True, True, True]
+    assert calls == [1]
+
+@pytest.mark.asyncio
+async def test_scan_cache_is_bounded(registry):
+    registry.register('test.bounded', lambda entity: entity['id'])
+    entities = [{'id': i} for i in range(5)]
+    with registry.scan_cache(max_entries=2) as cache:
+        for entity in entities:
+            await registry.resolve('test.bounded', entity)
+        assert cache.stats()['size'] == 2
+
+@pytest.mark.asyncio
+async def test_unregistered_dotted_fact_reads_attribute(registry):
+    entity = {'password_length': 14, 'os': {'version': '17.1'}}
+    assert await registry.resolve('user.password_length', entity) == 14
+    assert await registry.resolve('device.os.version', entity) == '17.1'
+    assert await registry.resolve('user.missing', entity) is None
+    assert await registry.resolve('device.os.missing.deeper', entity) is None
+    assert registry.entry('user.password_length').direct
+    assert not registry.is_async('user.password_length')
+    with pytest.raises(KeyError):
+        registry.get('user.password_length')
+    with pytest.raises(KeyError):
+        registry.entry('undotted')
+
+@pytest.mark.asyncio
+async def test_registered_handler_overrides_attribute_fact(registry):
+    assert await registry.resolve('user.flag', {'flag': True}) is True
+    async def handler(entity):
+        return 'registered'
+    registry.register('user.flag', handler)
+    assert registry.is_async('user.flag')
+    assert await registry.resolve('user.flag', {'flag': True}) == 'registered'
+
+@pytest.mark.asyncio
+async def test_batched_handler_groups_concurrent_resolutions(registry):
+    calls = []
+    async def handler(entities):
+        calls.append([e['id'] for e in entities])
+        return [e['id'] * 10 for e in entities]
+    registry.register_batch('test.batch', handler, batch_size=3)
+    entities = [{'id': i} for i in range(7)]
+    values = await asyncio.gather(*(registry.resolve('test.batch', e) for e in entities))
+    assert values == [0, 10, 20, 30, 40, 50, 60]
+    assert calls == [[0, 1, 2], [3, 4, 5], [6]]
+    assert registry.is_async('test.batch')
+
+@pytest.mark.asyncio
+async def test_batched_handler_shares_cache_and_errors(registry):
+    calls = []
+    def handler(entities, params=None):
+        calls.append(len(entities))
+        if params:
+            raise RuntimeError('remote failure')
+        return [True] * len(entities)
+    registry.register_batch('test.cached_batch', handler)
+    alice, bob = {'id': 1}, {'id': 2}
+    with registry.scan_cache():
+        assert await asyncio.gather(*(registry.resolve('test.cached_batch', e) for e in (alice, bob, alice))) == [True] * 3
+        assert await registry.resolve('test.cached_batch', bob) is True
+    assert calls == [2]
+    with pytest.raises(RuntimeError):
+        await registry.resolve('test.cached_batch', alice, params={'fail': True})
+
+
+@pytest.mark.asyncio
+async def test_full_batch_cancels_its_scheduled_flush(registry):
+    calls = []
+    def handler(entities):
+        calls.append([e['id'] for e in entities])
+        return [e['id'] for e in entities]
+    registry.register_batch('test.sized_batch', handler, batch_size=2)
+    async def next_tick(entity):
+        await asyncio.sleep(0)
+        return await registry.resolve('test.sized_batch', entity)
+    entities = [{'id': i} for i in range(4)]
+    values = await asyncio.gather(registry.resolve('test.sized_batch', entities[0]), registry.resolve('test.sized_batch', entities[1]),
+                                  next_tick(entities[3]), registry.resolve('test.sized_batch', entities[2]))
+    assert values == [0, 1, 3, 2]
+    assert calls == [[0, 1], [2, 3]]
+
+@pytest.mark.asyncio
+async def test_pending_batch_calls_are_held_until_done(registry):
+    release = asyncio.Event()
+    async def handler(entities):
+        await release.wait()
+        return [e['id'] for e in entities]
+    registry.register_batch('test.held_batch', handler)
+    resolution = asyncio.ensure_future(registry.resolve('test.held_batch', {'id': 7}))
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert len(registry._batch_tasks) == 1
+    release.set()
+    assert await resolution == 7
+    await asyncio.sleep(0)
+    assert not registry._batch_tasks
@@ -0,0 +1,96 @@
+import os
+import pytest
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.facts import fact_registry
+
+np = pytest.importorskip("numpy")
+from apps.api.compliance_engine.factstore import Column, DictionaryColumn, FactStore, ObjectColumn, build_column
+
+USERS = [
+    {"id": "a", "mfa_enabled": True, "last_login_days": 10, "department": "finance"},
+    {"id": "b", "mfa_enabled": False, "last_login_days": 120, "department": "it"},
+    {"id": "c", "mfa_enabled": True, "department": "finance", "groups": ["admins"]},
+]
+
+def test_columns_are_typed_and_dictionary_encoded():
+    table = FactStore.from_facts({"user": USERS}).table("user")
+    assert isinstance(table.columns["mfa_enabled"], Column) and table.columns["mfa_enabled"].values.dtype == bool
+    assert table.columns["last_login_days"].values.dtype == np.int64
+    assert table.columns["last_login_days"].nulls.tolist() == [False, False, True]
+    department = table.columns["department"]
+    assert isinstance(department, DictionaryColumn)
+    assert department.dictionary == ["finance", "it"] and department.codes.dtype == np.int8
+    assert isinstance(table.columns["groups"], ObjectColumn)
+    assert table.row(2) == USERS[2]
+    assert list(table.entities())[1] == {"user": USERS[1]}
+
+def test_missing_values_compare_like_none():
+    column = build_column([1, None, 3])
+    assert column.compare("greaterThan", 0).tolist() == [True, False, True]
+    assert column.compare("notEqual", 1).tolist() == [False, True, True]
+    strings = build_column(["x", None, "y"])
+    assert strings.compare("in", ["x", "z"]).tolist() == [True, False, False]
+    assert strings.compare("notEqual", "x").tolist() == [False, True, True]
+
+def test_run_batch_on_fact_table_matches_run(make_rule):
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [
+        make_rule("mfa", {"all": [{"fact": "user.mfa_enabled", "operator": "equal", "value": True},
+                              {"fact": "user.department", "operator": "in", "value": ["finance", "hr"]}]}),
+        make_rule("inactive", {"any": [{"fact": "user.last_login_days", "operator": "lessThanEqual", "value": 90}]}),
+    ]
+    table = FactStore.from_facts({"user": USERS}).table("user")
+    masks = engine.run_batch(table)
+    assert masks["mfa"].tolist() == [True, False, True]
+    assert masks["inactive"].tolist() == [True, False, False]
+
+@pytest.mark.asyncio
+async def test_aggregates_run_on_table_columns(make_rule):
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [
+        make_rule("ratio", {"all": [{"fact": "user.mfa_enabled", "aggregate": "ratio", "operator": "greaterThan", "value": 0.5}]}),
+        make_rule("max", {"all": [{"fact": "user.last_login_days", "aggregate": "max", "operator": "lessThan", "value": 100,
+                               "where": {"all": [{"fact": "user.department", "operator": "equal", "value": "finance"}]}}]}),
+        make_rule("count", {"all": [{"fact": "user.id", "aggregate": "count", "operator": "equal", "value": 1,
+                                 "where": {"all": [{"fact": "user.mfa_enabled", "operator": "equal", "value": False}]}}]}),
+    ]
+    store = FactStore.from_facts({"user": USERS})
+    columnar = await engine.run(store.facts())
+    assert [r["passed"] for r in columnar] == [True, True, True]
+    assert [r["passed"] for r in await engine.run({"user": USERS})] == [r["passed"] for r in columnar]
+
+@pytest.mark.asyncio
+async def test_per_entity_conditions_reject_table_sections(make_rule):
+    facts = FactStore.from_facts({"user": USERS}).facts()
+    engine = RuleEngine(os.path.join(os.path.dirname(__file__), "..", "rules"))
+    engine.load_rules()
+    with pytest.raises(TypeError, match="is a FactTable"):
+        await engine.run(facts)
+    engine.rules = [make_rule("department", fact="user.department", value="it")]
+    with pytest.raises(TypeError, match="user.department"):
+        await engine.run(facts)
+
+@pytest.mark.asyncio
+async def test_aggregate_over_table_with_batched_fact(make_rule):
+    calls = []
+    async def risky(users):
+        calls.append(len(users))
+        return [u.get("last_login_days", 0) > 90 for u in users]
+    fact_registry.register_batch("user.risky", risky)
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [
+        make_rule("count", {"all": [{"fact": "user.risky", "aggregate": "count", "operator": "equal", "value": 1}]}),
+        make_rule("exists", {"all": [{"fact": "user.risky", "aggregate": "exists", "operator": "equal", "value": True}]}),
+        make_rule("forAll", {"all": [{"fact": "user.risky", "aggregate": "forAll", "operator": "equal", "value": False}]}),
+    ]
+    columnar = await engine.run(FactStore.from_facts({"user": USERS}).facts())
+    assert [r["passed"] for r in columnar] == [True, True, True]
+    assert [r["passed"] for r in await engine.run({"user": USERS})] == [True, True, True]
+    assert calls == [3, 3, 3, 3, 3, 3]
+
+def test_store_is_smaller_than_dicts():
+    users = [{"mfa_enabled": i % 2 == 0, "last_login_days": i % 365, "department": f"dept-{i % 20}"} for i in range(10000)]
+    table = FactStore.from_facts({"user": users}).table("user")
+    assert table.nbytes / len(table) < 16
+    assert table.aggregate("count", "user.mfa_enabled") == 5000
+    assert table.aggregate("min", "user.last_login_days", table.mask("user.department", "equal", "dept-3")) == 3
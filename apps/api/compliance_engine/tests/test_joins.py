@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from apps.api import ms_api
+from apps.api.compliance_engine.joins import HashIndex, JoinIndexes
+from apps.api.compliance_engine.rule_schema import ComplianceRule
+from apps.api.compliance_engine.scan_executor import ScanExecutor
+
+USERS = [{"id": "u1", "display_name": "Ann"}, {"id": "u2", "display_name": "Bob"}, {"id": "u3", "display_name": "Cy"}]
+GROUPS = [{"id": "g-admins", "display_name": "Admins", "member_ids": ["u1", "u2", "sp-1"]},
+          {"id": "g-all", "display_name": "All", "member_ids": ["u1", "u2", "u3"]}]
+DEVICES = [{"id": "d1", "user_id": "u1", "compliance_state": "compliant"},
+           {"id": "d2", "user_id": "u2", "compliance_state": "noncompliant"},
+           {"id": "d3", "user_id": "u3", "compliance_state": "noncompliant"},
+           {"id": "d4", "user_id": None, "compliance_state": "noncompliant"}]
+
+# Members of the admins group that own a non-compliant Intune device
+ADMIN_DEVICE_RULE = ComplianceRule(
+    id="admin-device", name="Admin devices", description="", framework="CIS", severity="high",
+    conditions={"not": [{"all": [
+        {"fact": "group.id", "aggregate": "exists", "operator": "equal", "value": True,
+         "where": {"all": [{"fact": "group.id", "operator": "equal", "value": "g-admins"}]}},
+        {"fact": "device.compliance_state", "aggregate": "exists", "operator": "equal", "value": True,
+         "where": {"all": [{"fact": "device.compliance_state", "operator": "notEqual", "value": "compliant"}]}},
+    ]}]},
+    event={"type": "non_compliance"})
+
+@pytest.fixture
+def indexes():
+    return JoinIndexes(USERS, GROUPS, DEVICES)
+
+def test_hash_index_skips_missing_keys():
+    index = HashIndex(DEVICES, lambda device: (device["user_id"],))
+    assert [d["id"] for d in index.get("u1")] == ["d1"]
+    assert index.get(None) == [] and len(index) == 3
+
+def test_related_entities(indexes):
+    assert [g["id"] for g in indexes.related("user", "group", USERS[0])] == ["g-admins", "g-all"]
+    assert [u["id"] for u in indexes.related("group", "user", GROUPS[0])] == ["u1", "u2"]
+    assert [d["id"] for d in indexes.related("group", "device", GROUPS[1])] == ["d1", "d2", "d3"]
+    assert [u["id"] for u in indexes.related("device", "user", DEVICES[1])] == ["u2"]
+    assert indexes.related("device", "group", DEVICES[3]) == []
+    with pytest.raises(KeyError):
+        indexes.related("user", "policy", USERS[0])
+
+def test_entities_join_only_requested_keys(indexes):
+    facts = next(indexes.entities("user", {"user", "device"}))
+    assert facts == {"user": USERS[0], "device": [DEVICES[0]]}
+
+@pytest.mark.asyncio
+async def test_join_scan_evaluates_cross_entity_rule(temp_rules_dir, indexes):
+    executor = ScanExecutor(temp_rules_dir)
+    executor.engine.rules = [ADMIN_DEVICE_RULE]
+    assert executor.engine.entity_keys() == {"group", "device"}
+    result_set = await executor.execute_join_scan(indexes, "user")
+    assert [record.entity_index for record in result_set.failures()] == [1]
+
+@pytest.mark.asyncio
+async def test_group_member_requests_are_bounded(mocker):
+    running, peak = 0, 0
+
+    async def members(group_id):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+        return [SimpleNamespace(id=f"{group_id}-member")]
+
+    async def fetch_all_graph_pages(call):
+        if call is client.groups.get:
+            return [SimpleNamespace(id=f"g{i}", display_name=f"G{i}", mail=None) for i in range(20)]
+        return await call()
+
+    client = SimpleNamespace(groups=SimpleNamespace(
+        get=object(), by_group_id=lambda group_id: SimpleNamespace(members=SimpleNamespace(get=lambda: members(group_id)))))
+    mocker.patch.object(ms_api, 'get_graph_client', return_value=client)
+    mocker.patch.object(ms_api, 'fetch_all_graph_pages', side_effect=fetch_all_graph_pages)
+    groups = await ms_api.list_ms_groups("org-1", include_members=True)
+    assert groups[3]["member_ids"] == ["g3-member"]
+    assert peak == ms_api.MAX_CONCURRENT_MEMBER_CALLS
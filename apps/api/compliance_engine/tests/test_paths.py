@@ -0,0 +1,55 @@
+import pickle
+import pytest
+from apps.api.compliance_engine.compiler import compile_node
+from apps.api.compliance_engine.facts import fact_registry
+from apps.api.compliance_engine.paths import compile_path, parse_path
+from apps.api.compliance_engine.rule_schema import RuleCondition
+
+GRAPH_USER = {
+    "displayName": "Ada",
+    "assignedLicenses": [{"skuId": "e5"}, {"skuId": "p2"}],
+    "authentication": {"methods": [{"@odata.type": "#microsoft.graph.fido2AuthenticationMethod"}]},
+    "signInActivity": {"lastSignInDateTime": "2024-05-01T00:00:00Z"},
+}
+
+def test_parse_path():
+    assert parse_path("$.a['b c'][0][*].d.*") == [
+        ("key", "a"), ("key", "b c"), ("index", 0), ("wildcard", None), ("key", "d"), ("wildcard", None),
+    ]
+    assert parse_path("a.b") == parse_path("$.a.b")
+    with pytest.raises(ValueError):
+        parse_path("$.a[")
+
+@pytest.mark.parametrize("path,expected", [
+    ("$.signInActivity.lastSignInDateTime", "2024-05-01T00:00:00Z"),
+    ("$.assignedLicenses[1].skuId", "p2"),
+    ("$.assignedLicenses[-1].skuId", "p2"),
+    ("$.assignedLicenses[5].skuId", None),
+    ("$.manager.displayName", None),
+    ("$.assignedLicenses[*].skuId", ["e5", "p2"]),
+    ("$.authentication.methods[*]['@odata.type']", ["#microsoft.graph.fido2AuthenticationMethod"]),
+    ("$.missing[*].skuId", []),
+    ("$", GRAPH_USER),
+])
+def test_accessor(path, expected):
+    assert compile_path(path)(GRAPH_USER) == expected
+
+def test_accessors_are_cached_and_picklable():
+    accessor = compile_path("$.assignedLicenses[*].skuId")
+    assert compile_path("$.assignedLicenses[*].skuId") is accessor
+    assert pickle.loads(pickle.dumps(accessor))(GRAPH_USER) == ["e5", "p2"]
+
+@pytest.mark.asyncio
+async def test_condition_applies_path_to_fact_value():
+    fact_registry.register("graph.user", lambda user: user)
+    node = compile_node(RuleCondition(fact="graph.user", path="$.assignedLicenses[*].skuId", operator="equal", value=["e5", "p2"]))
+    assert await node.evaluate({"graph": GRAPH_USER})
+    node = compile_node(RuleCondition(fact="graph.user", path="$.signInActivity.lastSignInDateTime", operator="greaterThan", value="2024-01-01"))
+    assert await node.evaluate({"graph": GRAPH_USER})
+
+@pytest.mark.asyncio
+async def test_aggregate_applies_path_to_items():
+    fact_registry.register("graph.user", lambda user: user)
+    node = compile_node(RuleCondition(fact="graph.user", path="$.signInActivity.lastSignInDateTime",
+                                      aggregate="min", operator="equal", value="2024-05-01T00:00:00Z"))
+    assert await node.evaluate({"graph": [GRAPH_USER, {"signInActivity": None}]})
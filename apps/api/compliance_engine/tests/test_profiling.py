@@ -0,0 +1,59 @@
+import pytest
+import asyncio
+import logging
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.facts import fact_registry
+from apps.api.compliance_engine.profiling import EvaluationProfiler, Histogram, active_profiler
+from apps.api.compliance_engine.scan_executor import ScanExecutor
+
+def test_histogram_snapshot():
+    histogram = Histogram()
+    for seconds in (0.0002, 0.0002, 0.003, 0.2):
+        histogram.observe(seconds)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 4
+    assert snapshot["max"] == 0.2
+    assert snapshot["p50"] == 0.00025
+    assert snapshot["p95"] == 0.2
+
+@pytest.mark.asyncio
+async def test_profiler_records_rules_facts_and_short_circuits(make_rule):
+    async def slow(entity):
+        await asyncio.sleep(0.02)
+        return True
+    fact_registry.register('prof.slow', slow)
+    fact_registry.register('prof.fast', lambda e: False)
+    profiler = EvaluationProfiler()
+    engine = RuleEngine(rules_dir="/tmp", profiler=profiler)
+    engine.rules = [
+        make_rule("slow", {"all": [{"fact": "prof.slow", "operator": "equal", "value": True}]}),
+        make_rule("fast", {"all": [{"fact": "prof.fast", "operator": "equal", "value": True},
+                               {"fact": "prof.slow", "operator": "equal", "value": True}]}),
+    ]
+    await engine.run({"prof": {}})
+    await engine.run({"prof": {}})
+    assert [s["rule_id"] for s in profiler.slowest_rules(1)] == ["slow"]
+    assert profiler.rule_stats("slow")["count"] == 2
+    assert profiler.rule_stats("fast")["short_circuit_rate"] == 1.0
+    assert profiler.rule_stats("slow")["short_circuit_rate"] == 0.0
+    assert profiler.fact_stats()["prof.fast"]["count"] == 2
+    assert active_profiler() is None
+
+@pytest.mark.asyncio
+async def test_sampled_trace_is_logged(caplog, make_rule):
+    profiler = EvaluationProfiler(trace_sample_rate=1.0)
+    engine = RuleEngine(rules_dir="/tmp", profiler=profiler)
+    engine.rules = [make_rule("mfa", {"all": [{"fact": "user.mfa_enabled", "operator": "equal", "value": True}]})]
+    with caplog.at_level(logging.INFO):
+        await engine.run({"user": {"mfa_enabled": False}})
+    assert "Evaluation trace" in caplog.text
+    assert "'fact': 'user.mfa_enabled'" in caplog.text
+
+@pytest.mark.asyncio
+async def test_executor_slowest_rules(tmp_path, make_rule):
+    executor = ScanExecutor(str(tmp_path))
+    assert executor.slowest_rules() == []
+    executor = ScanExecutor(str(tmp_path), profiler=EvaluationProfiler())
+    executor.engine.rules = [make_rule("mfa", {"all": [{"fact": "user.mfa_enabled", "operator": "equal", "value": True}]})]
+    await executor.execute_scan({"user": {"mfa_enabled": True}})
+    assert executor.slowest_rules(5)[0]["rule_id"] == "mfa"
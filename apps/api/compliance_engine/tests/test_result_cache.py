@@ -0,0 +1,102 @@
+import gc
+import pytest
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.facts import fact_registry
+from apps.api.compliance_engine.factstore import FactStore
+from apps.api.compliance_engine.result_cache import ResultCache
+from apps.api.compliance_engine.scan_executor import ScanExecutor
+
+@pytest.fixture
+def counted_fact():
+    calls = []
+    def flag(entity):
+        calls.append(entity)
+        return entity.get("flag", False)
+    fact_registry.register("cache.flag", flag)
+    return calls
+
+@pytest.mark.asyncio
+async def test_unchanged_entities_skip_evaluation(tmp_path, counted_fact, make_rule):
+    cache = ResultCache(str(tmp_path / "results.db"))
+    engine = RuleEngine(rules_dir="/tmp", result_cache=cache)
+    engine.rules = [make_rule("a", fact="cache.flag")]
+    first = await engine.run({"cache": {"flag": True}})
+    cache.flush()
+    second = await engine.run({"cache": {"flag": True}})
+    assert first == second
+    assert len(counted_fact) == 1
+    assert cache.stats()["hits"] == 1
+    await engine.run({"cache": {"flag": False}})
+    assert len(counted_fact) == 2
+
+@pytest.mark.asyncio
+async def test_rule_changes_invalidate(tmp_path, counted_fact, make_rule):
+    cache = ResultCache(str(tmp_path / "results.db"))
+    engine = RuleEngine(rules_dir="/tmp", result_cache=cache)
+    engine.rules = [make_rule("a", fact="cache.flag")]
+    await engine.run({"cache": {"flag": True}})
+    engine.rules = [make_rule("a", fact="cache.flag", version="2")]
+    assert (await engine.run({"cache": {"flag": True}}))[0]["passed"] is True
+    engine.rules = [make_rule("a", fact="cache.flag", version="2", value=False)]
+    assert (await engine.run({"cache": {"flag": True}}))[0]["passed"] is False
+    assert len(counted_fact) == 3
+
+@pytest.mark.asyncio
+async def test_only_dependent_facts_are_hashed(tmp_path, counted_fact, make_rule):
+    cache = ResultCache(str(tmp_path / "results.db"))
+    engine = RuleEngine(rules_dir="/tmp", result_cache=cache)
+    engine.rules = [make_rule("a", fact="cache.flag")]
+    await engine.run({"cache": {"flag": True}, "device": {"os": "ios"}})
+    await engine.run({"cache": {"flag": True}, "device": {"os": "android"}})
+    assert len(counted_fact) == 1
+
+@pytest.mark.asyncio
+async def test_attribute_facts_hash_only_read_attributes(tmp_path, counted_fact, make_rule):
+    cache = ResultCache(str(tmp_path / "results.db"))
+    engine = RuleEngine(rules_dir="/tmp", result_cache=cache)
+    engine.rules = [make_rule("attr", fact="account.mfa"), make_rule("handler", fact="cache.flag")]
+    await engine.run({"account": {"mfa": True, "last_login_days": 1}, "cache": {"flag": True, "n": 1}})
+    await engine.run({"account": {"mfa": True, "last_login_days": 2}, "cache": {"flag": True, "n": 2}})
+    # The attribute rule still hits; the handler may read "n", so it is re-evaluated
+    assert cache.stats()["hits"] == 1
+    assert len(counted_fact) == 2
+    assert (await engine.run({"account": {"mfa": False, "last_login_days": 2}, "cache": {"flag": True, "n": 2}}))[0]["passed"] is False
+
+@pytest.mark.asyncio
+async def test_cache_persists_and_evicts(tmp_path, counted_fact, make_rule):
+    path = str(tmp_path / "results.db")
+    executor = ScanExecutor(str(tmp_path), result_cache=ResultCache(path))
+    executor.engine.rules = [make_rule("a", fact="cache.flag")]
+    await executor.execute_compact_scan([{"cache": {"flag": i % 2 == 0, "n": i}} for i in range(5)])
+    executor.engine.result_cache.close()
+    reopened = ResultCache(path, max_entries=3)
+    assert len(reopened) == 5
+    executor.engine.result_cache = reopened
+    result_set = await executor.execute_compact_scan([{"cache": {"flag": i % 2 == 0, "n": i}} for i in range(5)])
+    assert [r.passed for r in result_set] == [True, False, True, False, True]
+    assert len(counted_fact) == 5
+    assert len(reopened) == 3
+
+class _Inventory:
+    def __init__(self, flag):
+        self.flag = flag
+
+@pytest.mark.asyncio
+async def test_sections_are_keyed_on_contents(tmp_path, make_rule):
+    pytest.importorskip("numpy")
+    cache = ResultCache(str(tmp_path / "results.db"))
+    engine = RuleEngine(rules_dir="/tmp", result_cache=cache)
+    engine.rules = [make_rule("ratio", {"all": [{"fact": "member.mfa_enabled", "aggregate": "ratio", "operator": "greaterThan", "value": 0.5}]})]
+    # A freed table's address is reused by the next one; only its contents may key the outcome
+    for mfa in (True, False, True, False):
+        facts = FactStore.from_facts({"member": [{"mfa_enabled": mfa}] * 2}).facts()
+        assert (await engine.run(facts))[0]["passed"] is mfa
+        del facts
+        gc.collect()
+    assert cache.stats()["hits"] == 2
+    # Sections without a content digest are never cached
+    fact_registry.register("inventory.flag", lambda inventory: inventory.flag)
+    engine.rules = [make_rule("object", fact="inventory.flag")]
+    for flag in (True, False, True):
+        assert (await engine.run({"inventory": _Inventory(flag)}))[0]["passed"] is flag
+    assert cache.stats()["hits"] == 2
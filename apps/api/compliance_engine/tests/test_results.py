@@ -0,0 +1,43 @@
+import pytest
+from apps.api.compliance_engine.catalog import RuleCatalog
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.results import ResultRecord, ResultSet
+from apps.api.compliance_engine.scan_executor import ScanExecutor
+
+def test_result_set_stores_compact_records(make_rule):
+    result_set = ResultSet(RuleCatalog([make_rule("a"), make_rule("b")]))
+    result_set.append(0, 0, True)
+    result_set.append(1, 0, False)
+    assert len(result_set) == 2
+    assert list(result_set.failures()) == [ResultRecord(1, 0, False)]
+    assert result_set.nbytes == 18
+
+def test_to_dicts_expands_like_run(make_rule):
+    result_set = ResultSet(RuleCatalog([make_rule("a")]))
+    result_set.append(0, 0, False)
+    result_set.append(0, 1, True)
+    failed, passed = result_set.to_dicts()
+    assert failed["event"] == {"type": "non_compliance", "params": {"message": "MFA not enabled."}}
+    assert failed["entity_index"] == 0
+    assert passed["event"] is None
+    assert result_set.to_dicts(entity_index=1) == [{
+        "rule_id": "a", "name": "a", "passed": True, "event": None, "framework": "TEST", "severity": "low",
+    }]
+
+@pytest.mark.asyncio
+async def test_run_compact_matches_run(make_rule):
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [make_rule("a"), make_rule("inactive", is_active=False), make_rule("b")]
+    entities = [{"user": {"mfa_enabled": i % 3 == 0}} for i in range(6)]
+    result_set = await engine.run_compact(entities, window=2)
+    assert len(result_set) == 12
+    assert {r.rule_index for r in result_set} == {0, 2}
+    for index, facts in enumerate(entities):
+        assert result_set.to_dicts(entity_index=index) == await engine.run(facts)
+
+@pytest.mark.asyncio
+async def test_execute_compact_scan(tmp_path, make_rule):
+    executor = ScanExecutor(str(tmp_path))
+    executor.engine.rules = [make_rule("a")]
+    result_set = await executor.execute_compact_scan({"user": {"mfa_enabled": False}} for _ in range(3))
+    assert [r.entity_index for r in result_set.failures()] == [0, 1, 2]
@@ -37,4 +37,16 @@ def test_compliance_rule_validation():
     assert rule.is_active is True
     # Test serialization
     data = rule.dict()
-    assert data['id'] == 'rule-1' 
\ No newline at end of file
+    assert data['id'] == 'rule-1' 
+
+def test_compliance_rule_nested_conditions():
+    rule = ComplianceRule(
+        id='rule-2', name='Nested', description='', framework='ISO', severity='low',
+        conditions={'all': [
+            {'fact': 'user.mfa_enabled', 'operator': 'equal', 'value': True},
+            {'any': [{'fact': 'user.is_admin', 'operator': 'equal', 'value': False}]},
+        ]},
+        event={'type': 'non_compliance'},
+    )
+    assert isinstance(rule.conditions['all'][0], RuleCondition)
+    assert isinstance(rule.conditions['all'][1]['any'][0], RuleCondition)
@@ -35,4 +35,10 @@ async def test_execute_scan_fail(rules_dir):
     facts = {"user": {"mfa_enabled": False}}
     results = await executor.execute_scan(facts)
     assert results[0]["passed"] is False
-    assert results[0]["event"]["type"] == "non_compliance" 
\ No newline at end of file
+    assert results[0]["event"]["type"] == "non_compliance" 
+
+@pytest.mark.asyncio
+async def test_execute_scan_reports_cache_stats(rules_dir):
+    executor = ScanExecutor(rules_dir)
+    await executor.execute_scan({"user": {"mfa_enabled": True}})
+    assert executor.last_cache_stats["misses"] == 1
@@ -0,0 +1,100 @@
+import pytest
+import asyncio
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.facts import fact_registry
+from apps.api.compliance_engine.rule_schema import ComplianceRule
+from apps.api.compliance_engine.scan_executor import ScanExecutor
+
+def _engine(fact="user.mfa_enabled"):
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [ComplianceRule(id="mfa", name="MFA", description="", framework="TEST", severity="low",
+                                   conditions={"all": [{"fact": fact, "operator": "equal", "value": True}]},
+                                   event={"type": "non_compliance"})]
+    return engine
+
+async def _users(count, pulled):
+    for i in range(count):
+        pulled.append(i)
+        yield {"user": {"mfa_enabled": i % 2 == 0}}
+
+@pytest.mark.asyncio
+async def test_stream_yields_results_in_order():
+    engine = _engine()
+    pulled = []
+    outcomes = [(index, results[0]["passed"]) async for index, results in engine.stream(_users(5, pulled), window=2)]
+    assert outcomes == [(0, True), (1, False), (2, True), (3, False), (4, True)]
+
+@pytest.mark.asyncio
+async def test_stream_accepts_sync_iterables():
+    engine = _engine()
+    items = [item async for item in engine.stream([{"user": {"mfa_enabled": True}}])]
+    assert items[0][1][0]["passed"] is True
+
+@pytest.mark.asyncio
+async def test_stream_window_bounds_buffered_entities():
+    engine = _engine()
+    pulled = []
+    stream = engine.stream(_users(100, pulled), window=3)
+    await stream.__anext__()
+    assert len(pulled) == 3
+    await stream.aclose()
+
+@pytest.mark.asyncio
+async def test_closing_stream_cancels_inflight_and_closes_source():
+    started, cancelled = [], []
+    async def blocked(user):
+        started.append(1)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(1)
+            raise
+    fact_registry.register('user.blocked', blocked)
+    engine = _engine("user.blocked")
+    closed = []
+    async def source():
+        try:
+            while True:
+                yield {"user": {}}
+        finally:
+            closed.append(True)
+    stream = engine.stream(source(), window=4)
+    consumer = asyncio.ensure_future(stream.__anext__())
+    await asyncio.sleep(0.01)
+    consumer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await consumer
+    await stream.aclose()
+    assert len(started) == 4
+    assert len(cancelled) == 4
+    assert closed == [True]
+
+def test_stream_rejects_empty_window():
+    engine = _engine()
+    with pytest.raises(ValueError):
+        asyncio.run(engine.stream([], window=0).__anext__())
+
+@pytest.mark.asyncio
+async def test_stream_scan_uses_bounded_fact_cache(tmp_path):
+    executor = ScanExecutor(str(tmp_path))
+    executor.engine.rules = _engine().rules
+    results = [item async for item in executor.stream_scan(({"user": {"mfa_enabled": True}} for _ in range(10)), window=2)]
+    assert len(results) == 10
+    assert executor.last_cache_stats["misses"] == 10
+    assert executor.last_cache_stats["size"] <= 2
+
+@pytest.mark.asyncio
+async def test_stream_batches_fact_resolution_across_window():
+    calls = []
+    async def lookup(users):
+        calls.append(len(users))
+        return [u["registered"] for u in users]
+    fact_registry.register_batch('batched.mfa_registered', lookup)
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [ComplianceRule(id="mfa", name="mfa", description="", framework="TEST", severity="high",
+                                   conditions={"all": [{"fact": "batched.mfa_registered", "operator": "equal", "value": True}]},
+                                   event={"type": "non_compliance"})]
+    entities = [{"batched": {"registered": i % 2 == 0}} for i in range(10)]
+    results = [r async for _, r in engine.stream(entities, window=5)]
+    assert [r[0]["passed"] for r in results] == [i % 2 == 0 for i in range(10)]
+    assert calls == [5, 5]
@@ -0,0 +1,66 @@
+import pytest
+import json
+import os
+from apps.api.compliance_engine.catalog import RuleCatalog
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.rule_schema import ComplianceRule, RuleCondition
+from apps.api.compliance_engine.templates import expand_conditions, expand_rule, referenced_parameters
+
+def _inactive_rule(rule_id="inactive", threshold=90):
+    return ComplianceRule(id=rule_id, name="Inactive", description="", framework="CIS", severity="medium",
+                          conditions={"all": [{"fact": "user.last_login_days", "operator": "greaterThan", "value": {"$param": "threshold"}},
+                                              {"fact": "user.enabled", "operator": "equal", "value": True}]},
+                          event={"type": "non_compliance"}, parameters={"threshold": threshold})
+
+def test_expand_replaces_references_with_constants():
+    rule = _inactive_rule()
+    assert referenced_parameters(rule.conditions) == {"threshold"}
+    assert expand_rule(rule)["all"][0].value == 90
+    assert expand_rule(rule, {"threshold": 30})["all"][0].value == 30
+    assert rule.conditions["all"][0].value == {"$param": "threshold"}
+
+def test_expand_without_references_returns_input():
+    conditions = {"any": [RuleCondition(fact="user.mfa_enabled", operator="equal", value=True)]}
+    assert expand_conditions(conditions, {}) is conditions
+
+def test_undefined_parameter_raises():
+    rule = _inactive_rule().model_copy(update={"parameters": None})
+    with pytest.raises(ValueError):
+        RuleCatalog([rule])
+
+@pytest.mark.asyncio
+async def test_org_overrides_change_outcome():
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [_inactive_rule()]
+    facts = {"user": {"last_login_days": 45, "enabled": True}}
+    assert (await engine.run(facts))[0]["passed"] is False
+    assert (await engine.for_org({"inactive": {"threshold": 30}}).run(facts))[0]["passed"] is True
+    assert (await engine.run(facts))[0]["passed"] is False
+
+def test_org_catalogs_share_unchanged_nodes():
+    engine = RuleEngine(rules_dir="/tmp")
+    engine.rules = [_inactive_rule()]
+    first = engine.org_catalog({"inactive": {"threshold": 30}})
+    second = engine.org_catalog({"inactive": {"threshold": 60}})
+    assert engine.org_catalog({"inactive": {"threshold": 30}}) is first
+    assert engine.org_catalog({}) is engine.catalog
+    first_children, second_children = first.compiled[0].predicate.children, second.compiled[0].predicate.children
+    assert first_children[0] is not second_children[0]
+    assert first_children[1] is second_children[1]
+
+def test_shipped_rules_expand_to_their_default_thresholds():
+    rules_dir = os.path.join(os.path.dirname(__file__), "..", "rules")
+    with open(os.path.join(rules_dir, "cis_inactive_users_rule.json")) as f:
+        rule = ComplianceRule(**json.load(f))
+    assert expand_rule(rule)["all"][0].value == rule.parameters["inactivity_threshold"]
+    assert rule.version == "1.1.0"
+
+@pytest.mark.asyncio
+async def test_evaluate_conditions_expands_parameters():
+    engine = RuleEngine(rules_dir="/tmp")
+    rule = _inactive_rule()
+    facts = {"user": {"last_login_days": 120, "enabled": True}}
+    assert await engine.evaluate_conditions(rule.conditions, facts, rule.parameters) is True
+    assert await engine.evaluate_condition(rule.conditions["all"][0], facts, {"threshold": 150}) is False
+    with pytest.raises(ValueError, match="undefined parameter 'threshold'"):
+        await engine.evaluate_conditions(rule.conditions, facts)
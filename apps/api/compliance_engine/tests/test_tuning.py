@@ -0,0 +1,68 @@
+import pytest
+import time
+from apps.api.compliance_engine.engine import RuleEngine
+from apps.api.compliance_engine.facts import fact_registry
+from apps.api.compliance_engine.tuning import ConditionTuner, NodeStats
+
+EXPENSIVE = {"fact": "tune.expensive", "operator": "equal", "value": True}
+CHEAP = {"fact": "tune.cheap", "operator": "equal", "value": True}
+TUNED = {"all": [EXPENSIVE, CHEAP]}
+
+@pytest.fixture
+def calls():
+    calls = []
+    def expensive(entity):
+        calls.append("expensive")
+        time.sleep(0.002)
+        return True
+    fact_registry.register("tune.expensive", expensive)
+    fact_registry.register("tune.cheap", lambda entity: False)
+    return calls
+
+def _order(engine, rule_index=0):
+    return [child.fact for child in engine.compiled[rule_index].predicate.children]
+
+def test_rank_prefers_cheap_decisive_children():
+    cheap_decisive = NodeStats(evaluations=100, passes=0, seconds=0.001)
+    expensive_passing = NodeStats(evaluations=100, passes=100, seconds=0.2)
+    assert cheap_decisive.rank(False, 20) < expensive_passing.rank(False, 20)
+    assert NodeStats(evaluations=3, passes=0, seconds=1.0).rank(False, 20) == 0.0
+
+@pytest.mark.asyncio
+async def test_cheap_decisive_condition_moves_first(calls, make_rule):
+    engine = RuleEngine(rules_dir="/tmp", tuner=ConditionTuner(sample_rate=1.0, reorder_every=10, min_samples=5))
+    engine.rules = [make_rule("tuned", TUNED)]
+    assert _order(engine) == ["tune.expensive", "tune.cheap"]
+    for _ in range(10):
+        await engine.run({"tune": {}})
+    assert _order(engine) == ["tune.cheap", "tune.expensive"]
+    calls.clear()
+    assert (await engine.run({"tune": {}}))[0]["passed"] is False
+    assert calls == []
+
+@pytest.mark.asyncio
+async def test_tuning_survives_reload_and_bundle(calls, tmp_path, make_rule):
+    rules_dir = tmp_path / "rules"
+    rules_dir.mkdir()
+    (rules_dir / "tuned.json").write_text(make_rule("tuned", TUNED).json())
+    tuner = ConditionTuner(sample_rate=1.0, reorder_every=10, min_samples=5)
+    engine = RuleEngine(str(rules_dir), tuner=tuner)
+    engine.load_rules()
+    for _ in range(10):
+        await engine.run({"tune": {}})
+    engine.rules = engine.rules + [make_rule("other", {"any": [CHEAP]})]
+    assert _order(engine) == ["tune.cheap", "tune.expensive"]
+    engine.rules = engine.rules[:1]
+    bundle = str(tmp_path / "rules.bundle")
+    engine.save_bundle(bundle)
+    restored = RuleEngine(str(rules_dir))
+    restored.load_rules(bundle_path=bundle)
+    assert _order(restored) == ["tune.cheap", "tune.expensive"]
+    assert restored.catalog.condition_stats.nodes
+
+@pytest.mark.asyncio
+async def test_unsampled_runs_record_nothing(calls, make_rule):
+    engine = RuleEngine(rules_dir="/tmp", tuner=ConditionTuner(sample_rate=0.0))
+    engine.rules = [make_rule("tuned", TUNED)]
+    await engine.run({"tune": {}})
+    assert not engine.catalog.condition_stats.nodes
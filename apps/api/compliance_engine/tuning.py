@@ -0,0 +1,153 @@
+import contextvars
+import json
+import random
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+_active: contextvars.ContextVar[Optional['ConditionStats']] = contextvars.ContextVar('condition_stats', default=None)
+
+def active_condition_stats() -> Optional['ConditionStats']:
+    """Condition stats being recorded for the evaluation running in the current context, if any."""
+    return _active.get()
+
+class NodeStats:
+    """Observed outcomes of one condition node: evaluation count, passes and total seconds."""
+    __slots__ = ('evaluations', 'passes', 'seconds')
+
+    def __init__(self, evaluations: int = 0, passes: int = 0, seconds: float = 0.0):
+        self.evaluations = evaluations
+        self.passes = passes
+        self.seconds = seconds
+
+    def rank(self, decisive: bool, min_samples: int) -> float:
+        """
+        Expected cost per decisive outcome (lower runs first). Nodes with fewer than
+        `min_samples` evaluations rank 0 so they run early enough to be measured.
+        """
+        if self.evaluations < min_samples:
+            return 0.0
+        hits = self.passes if decisive else self.evaluations - self.passes
+        # Laplace-smoothed probability that this child decides the group
+        probability = (hits + 1) / (self.evaluations + 2)
+        return (self.seconds / self.evaluations) / probability
+
+class ConditionStats:
+    """
+    Per-node pass counts and evaluation cost for the condition nodes of one catalog.
+    Keyed by compiled node; travels with the catalog (and its bundle).
+    """
+    def __init__(self):
+        self.nodes: Dict[Any, NodeStats] = {}
+
+    def record(self, node: Any, passed: bool, seconds: float):
+        stats = self.nodes.get(node)
+        if stats is None:
+            stats = self.nodes[node] = NodeStats()
+        stats.evaluations += 1
+        if passed:
+            stats.passes += 1
+        stats.seconds += seconds
+
+    def get(self, node: Any) -> NodeStats:
+        return self.nodes.get(node) or NodeStats()
+
+    @contextmanager
+    def recording(self):
+        """Record condition outcomes into these stats within the block."""
+        token = _active.set(self)
+        try:
+            yield self
+        finally:
+            _active.reset(token)
+
+def _groups(node: Any, seen: set) -> Iterator[Any]:
+    """Yield each condition group under `node` once (nested groups and aggregate where-trees included)."""
+    if id(node) in seen:
+        return
+    seen.add(id(node))
+    children = getattr(node, 'children', None)
+    if children is not None:
+        yield node
+        for child in children:
+            yield from _groups(child, seen)
+    where = getattr(node, 'where', None)
+    if where is not None:
+        yield from _groups(where, seen)
+
+def catalog_groups(catalog) -> List[Any]:
+    seen: set = set()
+    return [group for compiled in catalog.compiled for group in _groups(compiled.predicate, seen)]
+
+def _signature(node: Any) -> str:
+    """Structural identity of a node, stable across recompiles (used to carry stats over reloads)."""
+    children = getattr(node, 'children', None)
+    if children is not None:
+        return json.dumps([node.mode, sorted(_signature(c) for c in children)])
+    return json.dumps(node.source.dict(), sort_keys=True, default=repr)
+
+def _nodes(node: Any, seen: set) -> Iterator[Any]:
+    if id(node) in seen:
+        return
+    seen.add(id(node))
+    yield node
+    for child in getattr(node, 'children', None) or ():
+        yield from _nodes(child, seen)
+    where = getattr(node, 'where', None)
+    if where is not None:
+        yield from _nodes(where, seen)
+
+class ConditionTuner:
+    """
+    Adaptive condition ordering for all/any/not groups.
+    - sample_rate: Fraction of runs (entities) that record per-condition pass rates and cost.
+    - reorder_every: Sampled runs between reorders of the catalog's groups.
+    - min_samples: Evaluations a child needs before its measured rank is trusted.
+    Children are ordered by expected cost per decisive outcome (mean seconds divided by the
+    probability of failing an 'all'/'not' group or passing an 'any' group), so cheap, decisive
+    conditions run first. Stats and orders live on the catalog and are saved with its bundle;
+    adopt() carries them over to a recompiled catalog on hot reload.
+    """
+    def __init__(self, sample_rate: float = 0.05, reorder_every: int = 500, min_samples: int = 20):
+        self.sample_rate = sample_rate
+        self.reorder_every = reorder_every
+        self.min_samples = min_samples
+        self._sampled = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self, catalog):
+        """Sample one run against `catalog`; reorders its groups every `reorder_every` sampled runs."""
+        if not self.sample_rate or random.random() >= self.sample_rate:
+            yield
+            return
+        with catalog.condition_stats.recording():
+            yield
+        with self._lock:
+            self._sampled += 1
+            due = self._sampled % self.reorder_every == 0
+        if due:
+            self.reorder(catalog)
+
+    def reorder(self, catalog):
+        """Reorder the children of every group in the catalog by observed rank."""
+        stats = catalog.condition_stats
+        for group in catalog_groups(catalog):
+            decisive = group.mode == 'any'
+            ordered = sorted(group.children, key=lambda child: stats.get(child).rank(decisive, self.min_samples))
+            if ordered != group.children:
+                # Swap in a new list; evaluations iterating the old one are unaffected
+                group.children = ordered
+
+    def adopt(self, previous, catalog):
+        """Carry stats from a previous catalog to a recompiled one, matching nodes by structure, then reorder."""
+        if not previous.condition_stats.nodes:
+            return
+        by_signature = {_signature(node): stats for node, stats in previous.condition_stats.nodes.items()}
+        seen: set = set()
+        for compiled in catalog.compiled:
+            for node in _nodes(compiled.predicate, seen):
+                stats = by_signature.get(_signature(node))
+                if stats is not None:
+                    catalog.condition_stats.nodes[node] = NodeStats(stats.evaluations, stats.passes, stats.seconds)
+        self.reorder(catalog)
@@ -21,6 +21,9 @@ ENABLE_INTUNE = os.getenv("ENABLE_INTUNE", "false").lower() == "true"
 ENABLE_POWER_PLATFORM = os.getenv("ENABLE_POWER_PLATFORM", "false").lower() == "true"
 ENABLE_POWER_BI = os.getenv("ENABLE_POWER_BI", "false").lower() == "true"
 
+# Max concurrent per-group Graph members requests in list_ms_groups(include_members=True)
+MAX_CONCURRENT_MEMBER_CALLS = 8
+
 # Utility to get per-org credentials (from Supabase + Key Vault)
 def get_org_ms_creds(org_id: str):
     # Fetch secret_ref from Supabase
@@ -106,16 +109,28 @@ async def list_ms_users(org_id: str) -> List[Dict]:
     ]
 
 # List groups in Microsoft 365 tenant
-async def list_ms_groups(org_id: str) -> List[Dict]:
+# include_members adds each group's direct member ids ("member_ids"), one paged call per group,
+# at most MAX_CONCURRENT_MEMBER_CALLS at a time to stay clear of Graph throttling.
+async def list_ms_groups(org_id: str, include_members: bool = False) -> List[Dict]:
     if not ENABLE_M365_CORE:
         print(f"[INFO] M365 Core collection disabled for groups (org_id={org_id})")
         return []
     client = get_graph_client(org_id)
     all_groups = await fetch_all_graph_pages(client.groups.get)
-    return [
+    groups = [
         {"id": group.id, "display_name": group.display_name, "mail": getattr(group, 'mail', None)}
         for group in all_groups
     ]
+    if include_members:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_MEMBER_CALLS)
+
+        async def fetch_members(group_id: str) -> List[Any]:
+            async with semaphore:
+                return await fetch_all_graph_pages(client.groups.by_group_id(group_id).members.get)
+        members = await asyncio.gather(*(fetch_members(group["id"]) for group in groups))
+        for group, group_members in zip(groups, members):
+            group["member_ids"] = [member.id for member in group_members]
+    return groups
 
 # Check conditional access policies (stub)
 async def check_conditional_access_policies(org_id: str) -> List[Dict]:
@@ -197,7 +212,7 @@ async def list_intune_devices(org_id: str) -> List[Dict]:
         devices = await fetch_all_graph_pages(client.device_management.managed_devices.get)
         print(f"[INFO] Intune: Retrieved {len(devices)} managed devices for org_id={org_id}")
         return [
-            {"id": d.id, "device_name": getattr(d, 'device_name', None), "operating_system": getattr(d, 'operating_system', None), "compliance_state": getattr(d, 'compliance_state', None), "jail_broken": getattr(d, 'jail_broken', None), "enrollment_type": getattr(d, 'enrollment_type', None), "last_sync_date_time": getattr(d, 'last_sync_date_time', None)}
+            {"id": d.id, "user_id": getattr(d, 'user_id', None), "device_name": getattr(d, 'device_name', None), "operating_system": getattr(d, 'operating_system', None), "compliance_state": getattr(d, 'compliance_state', None), "jail_broken": getattr(d, 'jail_broken', None), "enrollment_type": getattr(d, 'enrollment_type', None), "last_sync_date_time": getattr(d, 'last_sync_date_time', None)}
             for d in devices
         ]
     except Exception as e:
@@ -143,6 +143,12 @@ def get_scan(org_id, scan_id):
             return {"error": {"message": "Scan not found"}}
     return data
 
+def update_scan_metadata(org_id, scan_id, metadata):
+    url = f"{SUPABASE_URL}/rest/v1/scans?org_id=eq.{org_id}&id=eq.{scan_id}"
+    payload = {"metadata": metadata}
+    resp = requests.patch(url, headers=headers, json=payload)
+    return _handle_response(resp)
+
 # RESULTS CRUD
 
 def create_result(org_id, scan_id, user_id, finding, severity=None, compliance_framework=None, details=None):